@@ -0,0 +1,87 @@
+"""
+bench_backtest.py
+
+Compare the bulk backtest engine with a per-window prediction loop.
+
+The loop normalizes one window and calls the serving engine once per window,
+as looping /predict over history would (without the HTTP overhead). The bulk
+engine forecasts the same windows in chunks. Throughput is extrapolated to a
+multi-year minute-level history.
+
+Usage:
+    python benchmarks/bench_backtest.py --windows 20000 --loop-windows 2000 --workers 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(SRC_DIR)
+from backtest import DEFAULT_CHUNK_SIZE, run_backtest  # noqa: E402
+from preprocessing import denormalize_windows, normalize_windows  # noqa: E402
+
+MINUTES_PER_YEAR = 525_600
+
+
+def synthetic_prices(rows: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    prices = 1.0 + 0.2 * np.sin(np.arange(rows) / 50.0) + np.cumsum(rng.normal(scale=2e-3, size=rows))
+    return prices.astype(np.float32)
+
+
+def per_window_loop(prices: np.ndarray, engine, sequence_length: int, windows: int) -> float:
+    started_at = time.perf_counter()
+    for start in range(windows):
+        norm, mins, maxs = normalize_windows(prices[None, start:start + sequence_length])
+        denormalize_windows(engine.predict(norm[:, :, None])[:, 0], mins, maxs)
+    return time.perf_counter() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sequence-length", type=int, default=60)
+    parser.add_argument("--windows", type=int, default=20_000, help="Windows for the bulk engine")
+    parser.add_argument("--loop-windows", type=int, default=2_000, help="Windows for the per-window loop")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--years", type=float, default=3.0, help="Minute-level history to extrapolate to")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    from lite import export_model
+    from model import PiPriceLSTM
+    from serving import create_engine
+
+    prices = synthetic_prices(args.windows + args.sequence_length)
+    model = PiPriceLSTM(sequence_length=args.sequence_length).model
+    engine = create_engine("compiled", model)
+    engine.warmup()
+    loop_seconds = per_window_loop(prices, engine, args.sequence_length, args.loop_windows)
+
+    results = {"per_window_loop": args.loop_windows / loop_seconds}
+    with tempfile.TemporaryDirectory() as tmp:
+        h5_path, npz_path = os.path.join(tmp, "model.h5"), os.path.join(tmp, "model.npz")
+        model.save(h5_path)
+        export_model(model, npz_path)
+        for name, path in (("compiled", h5_path), ("numpy", npz_path)):
+            report = run_backtest(prices, path, chunk_size=args.chunk_size, workers=args.workers)
+            results[f"bulk_{name}"] = report["windows_per_second"]
+
+    history = int(args.years * MINUTES_PER_YEAR)
+    print(f"{'path':<18}{'windows/s':>11}{f'{args.years:g}y of minutes':>18}")
+    for name, rate in results.items():
+        print(f"{name:<18}{rate:>11.0f}{history / rate / 60:>15.1f} min")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"workers": args.workers, "chunk_size": args.chunk_size, "windows_per_second": results}, f,
+                      indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+bench_cache_formats.py
+
+Compare load time and memory of PiPriceDataManager cache formats.
+
+Each format is written once from the same synthetic minute-level history, then
+loaded in a fresh subprocess so that import cost and peak RSS are isolated.
+
+Usage:
+    python benchmarks/bench_cache_formats.py --rows 2000000 --output cache_formats.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(SRC_DIR)
+from storage import CACHE_FORMATS, get_store  # noqa: E402
+
+
+def synthetic_history(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range("2020-01-01", periods=rows, freq="min")
+    prices = 0.8 + np.cumsum(rng.normal(scale=1e-4, size=rows))
+    return pd.DataFrame({"timestamp": timestamps, "price": np.abs(prices) + 0.01})
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process; falls back to peak RSS off Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def child(cache_format: str, base_path: str, mode: str, tail: int):
+    """Load one cache in isolation and print timing/RSS as JSON."""
+    from data import PiPriceDataManager
+
+    rss_before = current_rss_mb()
+    started_at = time.perf_counter()
+    manager = PiPriceDataManager(cache_dir=os.path.dirname(base_path), version="bench", cache_format=cache_format)
+    if mode == "mmap":
+        manager.open_cache()
+    else:
+        manager.load_cache()
+    load_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    window = manager.get_historical_prices(tail)
+    slice_seconds = time.perf_counter() - started_at
+    rss_after = current_rss_mb()
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "slice_seconds": slice_seconds,
+        "rss_delta_mb": rss_after - rss_before,
+        "window_len": int(len(window)),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=1440)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--child", nargs=3, metavar=("FORMAT", "BASE_PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, tail=args.tail)
+        return
+
+    df = synthetic_history(args.rows)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = os.path.join(tmp, "pi_price_data_bench")
+        for cache_format in CACHE_FORMATS:
+            try:
+                store = get_store(cache_format, base_path)
+            except ImportError as e:
+                print(f"skipping {cache_format}: {e}")
+                continue
+            started_at = time.perf_counter()
+            store.save(df)
+            save_seconds = time.perf_counter() - started_at
+            paths = [store.path] + ([store.price_path] if cache_format == "mmap" else [])
+            size_mb = sum(os.path.getsize(path) for path in paths) / 2 ** 20
+
+            modes = ["frame", "mmap"] if cache_format == "mmap" else ["frame"]
+            for mode in modes:
+                out = subprocess.run([sys.executable, __file__, "--tail", str(args.tail),
+                                      "--child", cache_format, base_path, mode],
+                                     check=True, capture_output=True, text=True, cwd=SRC_DIR)
+                measured = json.loads(out.stdout.strip().splitlines()[-1])
+                results.append({"format": cache_format, "mode": mode, "rows": args.rows,
+                                "save_seconds": save_seconds, "size_mb": size_mb, **measured})
+
+    print(f"{'format':<10}{'mode':<7}{'save s':>9}{'load s':>9}{'slice ms':>10}{'RSS MB':>9}{'size MB':>9}")
+    for r in results:
+        print(f"{r['format']:<10}{r['mode']:<7}{r['save_seconds']:>9.3f}{r['load_seconds']:>9.3f}"
+              f"{r['slice_seconds'] * 1000:>10.3f}{r['rss_delta_mb']:>9.1f}{r['size_mb']:>9.1f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+bench_hot_paths.py
+
+Reproducible micro-benchmarks for the ai-service hot paths, with a baseline check.
+
+Covers sequence building, min-max scaling, API response parsing and cleaning,
+the CSV cache, PiPriceLSTM.predict at batch sizes 1-1024, and end-to-end /predict
+through an in-process ASGI client with a fake Redis. Every case reports the median
+and minimum seconds per call over several repeats on fixed-seed synthetic data.
+
+Usage:
+    python benchmarks/bench_hot_paths.py --output results.json
+    python benchmarks/bench_hot_paths.py --baseline benchmarks/baseline.json --tolerance 0.3
+    python benchmarks/bench_hot_paths.py --save-baseline benchmarks/baseline.json
+
+Results record the CPU, core count and Python/NumPy/pandas/TensorFlow versions.
+With --baseline, every case is reported as a speedup over the baseline median
+(above 1.0 is faster). Cases more than ``tolerance`` slower are regressions and the
+script exits with status 1, but only when the baseline was recorded on the same
+CPU and library versions; against a foreign baseline the speedups are printed for
+reference only. Record a baseline per machine with --save-baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(SRC_DIR)
+from model import create_sequences, normalize_data, denormalize_data  # noqa: E402
+from data import PiPriceDataManager  # noqa: E402
+
+SEQUENCE_LENGTH = 60
+PREDICT_BATCH_SIZES = (1, 4, 16, 64, 256, 1024)
+
+
+def measure(fn, repeat: int = 5, number: int = 1, warmup: int = 1) -> dict:
+    """
+    Time ``fn`` as ``repeat`` samples of ``number`` calls each.
+
+    Returns:
+        dict: median_s and min_s per call, plus the sample counts
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started_at) / number)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "repeat": repeat, "number": number}
+
+
+def measure_async(loop, make_coro, repeat: int = 5, number: int = 1, warmup: int = 1) -> dict:
+    async def run():
+        for _ in range(warmup):
+            await make_coro()
+        samples = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            for _ in range(number):
+                await make_coro()
+            samples.append((time.perf_counter() - started_at) / number)
+        return samples
+
+    samples = loop.run_until_complete(run())
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "repeat": repeat, "number": number}
+
+
+def synthetic_prices(rows: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return np.abs(0.8 + np.cumsum(rng.normal(scale=1e-3, size=rows))) + 0.01
+
+
+def synthetic_api_records(rows: int) -> list:
+    prices = synthetic_prices(rows)
+    start = 1577836800
+    # Mix of field spellings, as returned by different price APIs
+    return [{"timestamp": start + i * 60, "price": float(p)} if i % 3 else {"time": start + i * 60, "close": str(p)}
+            for i, p in enumerate(prices)]
+
+
+def bench_sequences(results: dict):
+    for rows in (10_000, 100_000, 1_000_000):
+        data = synthetic_prices(rows)
+        results[f"create_sequences/rows={rows}"] = measure(lambda: create_sequences(data, SEQUENCE_LENGTH), number=10)
+
+
+def bench_scaling(results: dict):
+    data = synthetic_prices(1_000_000)
+    normalized, min_val, max_val = normalize_data(data)
+    results["normalize_data/rows=1000000"] = measure(lambda: normalize_data(data))
+    results["denormalize_data/rows=1000000"] = measure(lambda: denormalize_data(normalized, min_val, max_val))
+
+
+def bench_cleaning(results: dict, tmp: str):
+    manager = PiPriceDataManager(cache_dir=tmp, version="bench")
+    for rows in (10_000, 100_000):
+        records = synthetic_api_records(rows)
+        results[f"parse_api_response/rows={rows}"] = measure(lambda: manager._parse_api_response(records))
+        parsed = manager._parse_api_response(records)
+        results[f"validate_and_clean/rows={rows}"] = measure(lambda: manager._validate_and_clean(parsed.copy()))
+
+
+def bench_csv_cache(results: dict, tmp: str):
+    rows = 100_000
+    manager = PiPriceDataManager(cache_dir=tmp, version="bench_csv")
+    manager.data = pd.DataFrame({"timestamp": pd.date_range("2020-01-01", periods=rows, freq="min"),
+                                 "price": synthetic_prices(rows)})
+    results[f"csv_cache/save/rows={rows}"] = measure(lambda: manager.store.save(manager.data))
+    results[f"csv_cache/load/rows={rows}"] = measure(manager.load_cache)
+
+
+def bench_predict(results: dict):
+    from model import PiPriceLSTM
+
+    model = PiPriceLSTM(sequence_length=SEQUENCE_LENGTH)
+    rng = np.random.default_rng(0)
+    for batch_size in PREDICT_BATCH_SIZES:
+        inputs = rng.uniform(size=(batch_size, SEQUENCE_LENGTH, 1)).astype(np.float32)
+        results[f"predict/batch={batch_size}"] = measure(lambda: model.predict(inputs), repeat=5, number=3)
+
+
+class FakeRedis:
+    """In-memory stand-in for the aioredis client."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+def bench_e2e(results: dict, tmp: str):
+    import httpx
+    from model import PiPriceLSTM
+    import main
+
+    model_path = os.path.join(tmp, "bench_model")
+    PiPriceLSTM(sequence_length=SEQUENCE_LENGTH).model.save(model_path)
+    main.MODEL_PATH = model_path
+    main.STARTUP_MODE = "eager"
+    # Unreachable URL: the fake Redis below is attached instead
+    main.REDIS_URL = "redis://127.0.0.1:1"
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(main.startup_event())
+    main.prediction_cache.redis = FakeRedis()
+    client = httpx.AsyncClient(app=main.app, base_url="http://bench")
+    rng = np.random.default_rng(0)
+    hit_body = {"historical_prices": synthetic_prices(SEQUENCE_LENGTH).tolist(), "sequence_length": SEQUENCE_LENGTH}
+
+    async def predict_miss():
+        prices = (1.0 + rng.random(SEQUENCE_LENGTH).cumsum() * 1e-3).tolist()
+        response = await client.post("/predict", json={"historical_prices": prices,
+                                                        "sequence_length": SEQUENCE_LENGTH})
+        response.raise_for_status()
+
+    async def predict_hit():
+        response = await client.post("/predict", json=hit_body)
+        response.raise_for_status()
+
+    try:
+        results["e2e_predict/cache_miss"] = measure_async(loop, predict_miss, repeat=5, number=20)
+        results["e2e_predict/cache_hit"] = measure_async(loop, predict_hit, repeat=5, number=50)
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.run_until_complete(main.shutdown_event())
+        loop.close()
+
+
+BENCHMARKS = {
+    "create_sequences": bench_sequences,
+    "scaling": bench_scaling,
+    "cleaning": bench_cleaning,
+    "csv_cache": bench_csv_cache,
+    "predict": bench_predict,
+    "e2e_predict": bench_e2e,
+}
+
+
+# Environment fields that must match for timings to be comparable across runs
+COMPARABLE_FIELDS = ("cpu", "cpu_count", "python", "numpy", "pandas", "tensorflow")
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def environment() -> dict:
+    meta = {"python": platform.python_version(), "platform": platform.platform(), "cpu": cpu_model(),
+            "cpu_count": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__}
+    try:
+        import tensorflow as tf
+        meta["tensorflow"] = tf.__version__
+    except ImportError:
+        pass
+    return meta
+
+
+def environment_mismatches(current: dict, baseline: dict) -> list:
+    """
+    Fields of COMPARABLE_FIELDS that differ between two environments, as (field, baseline, current).
+    """
+    return [(field, baseline.get(field), current.get(field)) for field in COMPARABLE_FIELDS
+            if baseline.get(field) != current.get(field)]
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Report each case's speedup over the baseline median (baseline / current).
+
+    Returns:
+        list: (case, speedup) for every case slower than 1 + tolerance
+    """
+    regressions = []
+    print(f"\n{'case':<40}{'speedup':>9}")
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            print(f"{case:<40}{'new':>9}")
+            continue
+        speedup = previous["median_s"] / current["median_s"]
+        flag = "  REGRESSION" if speedup < 1 / (1 + tolerance) else ""
+        print(f"{case:<40}{speedup:>8.2f}x{flag}")
+        if flag:
+            regressions.append((case, speedup))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Run only these benchmark groups")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against; regressions exit with status 1")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown vs. baseline (0.3 = 30%%)")
+    parser.add_argument("--save-baseline", help="Write these results as the new baseline")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.only or BENCHMARKS:
+            bench = BENCHMARKS[name]
+            started_at = time.perf_counter()
+            if name in ("cleaning", "csv_cache", "e2e_predict"):
+                bench(results, tmp)
+            else:
+                bench(results)
+            print(f"{name}: done in {time.perf_counter() - started_at:.1f}s")
+
+    print(f"\n{'case':<40}{'median ms':>12}{'min ms':>12}")
+    for case, r in results.items():
+        print(f"{case:<40}{r['median_s'] * 1000:>12.3f}{r['min_s'] * 1000:>12.3f}")
+
+    report = {"environment": environment(), "results": results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = environment_mismatches(report["environment"], baseline.get("environment", {}))
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if mismatches:
+            print("\nBaseline was recorded in a different environment; speedups are for reference only:")
+            for field, previous, current in mismatches:
+                print(f"  {field}: {previous} -> {current}")
+            print("Record a baseline on this machine with --save-baseline to check for regressions.")
+            return
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for case, speedup in regressions:
+                print(f"  {case}: {speedup:.2f}x")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+bench_lite.py
+
+Compare the TensorFlow serving engines with the NumPy engine on exported models.
+
+A PiPriceLSTM is saved once as .h5 and exported as float32, float16 and int8 .npz
+artifacts. Each configuration is then served in a fresh subprocess, so startup
+(imports, model load, warmup) and RSS are measured in isolation, followed by
+per-call latency at batch sizes 1 and 32 and the maximum error against Keras.
+
+Usage:
+    python benchmarks/bench_lite.py --sequence-length 60 --output lite.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(SRC_DIR)
+
+CONFIGS = [
+    ("compiled", "model.h5"),
+    ("numpy", "model_float32.npz"),
+    ("numpy", "model_float16.npz"),
+    ("numpy", "model_int8.npz"),
+]
+BATCH_SIZES = (1, 32)
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process; falls back to peak RSS off Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def child(backend: str, model_path: str, inputs_path: str, repeat: int):
+    """Load and serve one model in isolation and print timings/RSS as JSON."""
+    rss_before = current_rss_mb()
+    started_at = time.perf_counter()
+    if backend != "numpy":
+        import tensorflow  # noqa: F401
+    from serving import create_engine
+    import_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    if model_path.endswith(".npz"):
+        from lite import LiteModel
+        model = LiteModel.load(model_path)
+    else:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(model_path)
+    engine = create_engine(backend, model)
+    engine.warmup()
+    load_seconds = time.perf_counter() - started_at
+
+    inputs = np.load(inputs_path)
+    latency_ms = {}
+    for batch_size in BATCH_SIZES:
+        batch = inputs[:batch_size]
+        engine.predict(batch)
+        timings = []
+        for _ in range(repeat):
+            call_started = time.perf_counter()
+            engine.predict(batch)
+            timings.append((time.perf_counter() - call_started) * 1000)
+        latency_ms[batch_size] = float(np.median(timings))
+    outputs = engine.predict(inputs)
+    np.save(inputs_path.replace("inputs", f"outputs_{os.path.basename(model_path)}"), outputs)
+
+    print(json.dumps({
+        "import_seconds": import_seconds,
+        "load_seconds": load_seconds,
+        "rss_mb": current_rss_mb() - rss_before,
+        "latency_ms": latency_ms,
+        "tensorflow_imported": "tensorflow" in sys.modules,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sequence-length", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per batch size")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--child", nargs=3, metavar=("BACKEND", "MODEL_PATH", "INPUTS_PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, repeat=args.repeat)
+        return
+
+    from model import PiPriceLSTM
+    from lite import export_model
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        model = PiPriceLSTM(sequence_length=args.sequence_length).model
+        model.save(os.path.join(tmp, "model.h5"))
+        for quantization in ("float32", "float16", "int8"):
+            export_model(model, os.path.join(tmp, f"model_{quantization}.npz"), quantization)
+        inputs_path = os.path.join(tmp, "inputs.npy")
+        inputs = np.random.default_rng(0).uniform(size=(max(BATCH_SIZES), args.sequence_length, 1))
+        np.save(inputs_path, inputs.astype(np.float32))
+        reference = model.predict(inputs, verbose=0)
+
+        for backend, name in CONFIGS:
+            model_path = os.path.join(tmp, name)
+            started_at = time.perf_counter()
+            out = subprocess.run([sys.executable, __file__, "--repeat", str(args.repeat),
+                                  "--child", backend, model_path, inputs_path],
+                                 check=True, capture_output=True, text=True, cwd=SRC_DIR)
+            startup_seconds = time.perf_counter() - started_at
+            measured = json.loads(out.stdout.strip().splitlines()[-1])
+            outputs = np.load(os.path.join(tmp, f"outputs_{name}.npy"))
+            results.append({"backend": backend, "artifact": name, "size_kb": os.path.getsize(model_path) / 1024,
+                            "process_seconds": startup_seconds,
+                            "max_abs_error": float(np.abs(outputs - reference).max()), **measured})
+
+    print(f"{'backend':<10}{'artifact':<20}{'size KB':>9}{'import s':>10}{'load s':>8}{'RSS MB':>8}"
+          f"{'b=1 ms':>8}{'b=32 ms':>9}{'max err':>10}")
+    for r in results:
+        latency = r["latency_ms"]
+        print(f"{r['backend']:<10}{r['artifact']:<20}{r['size_kb']:>9.1f}{r['import_seconds']:>10.2f}"
+              f"{r['load_seconds']:>8.3f}{r['rss_mb']:>8.1f}{latency['1']:>8.2f}{latency['32']:>9.2f}"
+              f"{r['max_abs_error']:>10.1e}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+load_test.py
+
+Closed-loop load test for a running AI service.
+
+At each concurrency level, that many clients send /predict requests back to back
+with random price windows (so the prediction cache does not hide inference cost)
+while /health is polled in the background. Reports throughput, p50/p99 latency,
+503 backpressure rejections and /health latency under load.
+
+Usage:
+    WEB_CONCURRENCY=4 uvicorn main:app --port 8000   # from src/
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 1,4,16,64 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+import numpy as np
+
+
+async def client(session, url, sequence_length, deadline, rng, latencies, statuses):
+    while time.perf_counter() < deadline:
+        prices = (1.0 + rng.random(sequence_length).cumsum() * 1e-3).tolist()
+        body = {"historical_prices": prices, "sequence_length": sequence_length}
+        started_at = time.perf_counter()
+        try:
+            async with session.post(url + "/predict", json=body) as response:
+                await response.read()
+                status = response.status
+        except aiohttp.ClientError:
+            status = "error"
+        if status == 200:
+            latencies.append((time.perf_counter() - started_at) * 1000.0)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def health_poller(session, url, deadline, latencies, interval=0.05):
+    while time.perf_counter() < deadline:
+        started_at = time.perf_counter()
+        try:
+            async with session.get(url + "/health") as response:
+                await response.read()
+            latencies.append((time.perf_counter() - started_at) * 1000.0)
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(interval)
+
+
+def percentiles(samples):
+    if not samples:
+        return {"p50_ms": None, "p99_ms": None}
+    values = np.asarray(samples)
+    return {"p50_ms": float(np.percentile(values, 50)), "p99_ms": float(np.percentile(values, 99))}
+
+
+async def run_level(url, concurrency, sequence_length, duration):
+    connector = aiohttp.TCPConnector(limit=concurrency + 1)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+        latencies, statuses, health = [], {}, []
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            health_poller(session, url, deadline, health),
+            *(client(session, url, sequence_length, deadline, np.random.default_rng(seed), latencies, statuses)
+              for seed in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+    return {
+        "concurrency": concurrency,
+        "requests": sum(statuses.values()),
+        "throughput_rps": len(latencies) / elapsed,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "latency": percentiles(latencies),
+        "health_latency": percentiles(health),
+    }
+
+
+async def main_async(args):
+    results = []
+    for concurrency in args.concurrency:
+        result = await run_level(args.url.rstrip("/"), concurrency, args.sequence_length, args.duration)
+        results.append(result)
+        print(f"c={concurrency:4d}  {result['throughput_rps']:8.1f} req/s  "
+              f"p50={result['latency']['p50_ms'] or 0:7.1f}ms  p99={result['latency']['p99_ms'] or 0:7.1f}ms  "
+              f"health p99={result['health_latency']['p99_ms'] or 0:6.1f}ms  statuses={result['statuses']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--sequence-length", type=int, default=20)
+    parser.add_argument("--concurrency", type=lambda value: [int(n) for n in value.split(",")],
+                        default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"url": args.url, "sequence_length": args.sequence_length, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+backtest.py
+
+Bulk historical backtests of a price model over PiPriceDataManager series.
+
+Features:
+- Every rolling window of the history as one strided view, min-max normalized
+  per window exactly as /predict does, one chunk at a time.
+- Chunked, batched inference through a serving engine (numpy, compiled or keras),
+  so memory is bounded by the chunk size rather than the length of the history.
+- Streaming NumPy error metrics per forecast step: MAE, MAPE and directional
+  accuracy, plus the MAE of a naive last-price forecast for reference. Partial
+  metrics of chunks and workers merge exactly.
+- Long histories split into contiguous window ranges across worker processes.
+  Each worker's price slice runs on past its last window start by the
+  sequence_length + horizon prices that window needs, so neighbouring slices
+  overlap and no window is lost or counted twice at a boundary.
+- Optional .npy of every forecast, written in place by each worker.
+
+Usage:
+    python src/backtest.py --model model/pi_price_lstm.npz --data prices.csv --freq 1min --horizon 5 --workers 4
+    python src/backtest.py --model model/pi_price_lstm_best.h5 --backend compiled --synthetic 1000000
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from lite import LiteModel
+from preprocessing import denormalize_windows, normalize_windows, window_count, window_views
+from serving import SERVING_BACKENDS, create_engine, model_sequence_lengths
+
+logger = logging.getLogger("ai-service-backtest")
+
+# Large enough to amortize per-call overhead; larger chunks only add memory
+DEFAULT_CHUNK_SIZE = 1024
+
+
+class BacktestMetrics:
+    """
+    Running error sums per forecast step, mergeable across chunks and workers.
+
+    Args:
+        horizon (int): Number of forecast steps per window
+    """
+
+    def __init__(self, horizon: int):
+        self.horizon = horizon
+        self.windows = 0
+        self.abs_error = np.zeros(horizon)
+        self.naive_abs_error = np.zeros(horizon)
+        self.pct_error = np.zeros(horizon)
+        self.pct_count = np.zeros(horizon, dtype=np.int64)
+        self.direction_hits = np.zeros(horizon, dtype=np.int64)
+        self.direction_count = np.zeros(horizon, dtype=np.int64)
+
+    def update(self, predicted: np.ndarray, actual: np.ndarray, last: np.ndarray):
+        """
+        Add a chunk of forecasts.
+
+        Args:
+            predicted (np.ndarray): Forecast prices shape (windows, horizon)
+            actual (np.ndarray): Realized prices shape (windows, horizon)
+            last (np.ndarray): Last price of each input window shape (windows,)
+        """
+        predicted = predicted.astype(np.float64)
+        actual = actual.astype(np.float64)
+        last = last.astype(np.float64)[:, None]
+        error = np.abs(predicted - actual)
+        self.windows += len(actual)
+        self.abs_error += error.sum(axis=0)
+        self.naive_abs_error += np.abs(actual - last).sum(axis=0)
+        # Percentage error is undefined for zero prices, so those are left out
+        nonzero = actual != 0
+        self.pct_error += np.divide(error, np.abs(actual), out=np.zeros_like(error), where=nonzero).sum(axis=0)
+        self.pct_count += nonzero.sum(axis=0)
+        # Direction is relative to the last price in the window; flat moves are left out
+        moved = actual != last
+        self.direction_hits += (moved & (np.sign(predicted - last) == np.sign(actual - last))).sum(axis=0)
+        self.direction_count += moved.sum(axis=0)
+
+    def merge(self, other: "BacktestMetrics") -> "BacktestMetrics":
+        self.windows += other.windows
+        for name in ("abs_error", "naive_abs_error", "pct_error", "pct_count", "direction_hits", "direction_count"):
+            getattr(self, name).__iadd__(getattr(other, name))
+        return self
+
+    def result(self) -> dict:
+        """
+        Returns:
+            dict: windows, then mae, mape (in percent), directional_accuracy and
+            naive_mae over all steps, and the same metrics per step under per_step;
+            a metric is None when no window counts towards it
+        """
+        counts = np.full(self.horizon, self.windows)
+        metrics = {
+            "mae": (self.abs_error, counts),
+            "mape": (100.0 * self.pct_error, self.pct_count),
+            "directional_accuracy": (self.direction_hits, self.direction_count),
+            "naive_mae": (self.naive_abs_error, counts),
+        }
+        result = {"windows": self.windows}
+        for name, (total, count) in metrics.items():
+            result[name] = _ratio(total.sum(), count.sum())
+        result["per_step"] = {name: [_ratio(t, c) for t, c in zip(total, count)]
+                              for name, (total, count) in metrics.items()}
+        return result
+
+
+def _ratio(total, count) -> Optional[float]:
+    return float(total / count) if count else None
+
+
+def load_model(path: str):
+    """
+    Load an exported .npz LiteModel, or a Keras model (imports TensorFlow).
+    """
+    if path.endswith(".npz"):
+        return LiteModel.load(path)
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+def resolve_sequence_length(model, sequence_length: Optional[int] = None) -> int:
+    fixed = model_sequence_lengths(model)
+    if sequence_length is None:
+        if not fixed:
+            raise ValueError("sequence_length is required for models that accept any length")
+        return fixed[0]
+    if fixed and fixed[0] != sequence_length:
+        raise ValueError(f"Model expects sequence_length={fixed[0]}, got {sequence_length}")
+    return sequence_length
+
+
+def backtest_series(prices: np.ndarray, engine, sequence_length: int, horizon: int = 1, stride: int = 1,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, output: Optional[np.ndarray] = None,
+                    offset: int = 0) -> BacktestMetrics:
+    """
+    Forecast every window of a price series and accumulate error metrics.
+
+    Only one chunk of windows is copied and normalized at a time; the window and
+    label arrays are views of ``prices``.
+
+    Args:
+        prices (np.ndarray): 1D price series
+        engine: Serving engine from serving.create_engine
+        sequence_length (int): Prices per input window
+        horizon (int): Future steps forecast and scored per window
+        stride (int): Offset between the starts of consecutive windows
+        chunk_size (int): Windows per inference call
+        output (np.ndarray): Optional array shape (total_windows, horizon) for the forecasts
+        offset (int): Row of ``output`` that holds the first window of this series
+
+    Returns:
+        BacktestMetrics: Metrics over every window
+    """
+    inputs, labels = window_views(np.asarray(prices, dtype=np.float32), sequence_length, stride, horizon)
+    windows = inputs[:, :, 0]
+    labels = labels.reshape(len(labels), horizon)
+    metrics = BacktestMetrics(horizon)
+    for start in range(0, len(windows), chunk_size):
+        chunk = np.ascontiguousarray(windows[start:start + chunk_size])
+        norm, min_prices, max_prices = normalize_windows(chunk)
+        predicted = denormalize_windows(engine.forecast(norm[:, :, None], horizon), min_prices, max_prices)
+        metrics.update(predicted, labels[start:start + chunk_size], chunk[:, -1])
+        if output is not None:
+            output[offset + start:offset + start + len(chunk)] = predicted
+    return metrics
+
+
+def split_ranges(num_windows: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Split window indices [0, num_windows) into at most ``parts`` contiguous ranges.
+    """
+    bounds = np.linspace(0, num_windows, min(parts, num_windows) + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+_worker = {}
+
+
+def _init_worker(model_path: str, backend: str, sequence_length: int, threads: int):
+    if not model_path.endswith(".npz"):
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    engine = create_engine(backend, load_model(model_path), [sequence_length])
+    engine.warmup()
+    _worker["engine"] = engine
+
+
+def _backtest_range(prices: np.ndarray, options: dict, output_path: Optional[str], offset: int):
+    started_at = time.perf_counter()
+    output = np.load(output_path, mmap_mode="r+") if output_path else None
+    metrics = backtest_series(prices, _worker["engine"], output=output, offset=offset, **options)
+    if output is not None:
+        output.flush()
+    return metrics, time.perf_counter() - started_at
+
+
+def run_backtest(prices: np.ndarray, model, sequence_length: Optional[int] = None, horizon: int = 1,
+                 stride: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE, backend: str = "compiled",
+                 workers: int = 1, output_path: Optional[str] = None) -> dict:
+    """
+    Backtest a model over a whole price history.
+
+    Args:
+        prices (np.ndarray): 1D price series, oldest first
+        model: Model path (.npz, .h5, .keras or SavedModel), or a loaded model when workers is 1
+        sequence_length (int): Prices per window; defaults to the model's input length
+        horizon (int): Future steps forecast and scored per window
+        stride (int): Offset between the starts of consecutive windows
+        chunk_size (int): Windows per inference call, bounding memory per process
+        backend (str): Serving engine, see serving.SERVING_BACKENDS; .npz models
+            always run on the numpy engine
+        workers (int): Processes to split the windows across
+        output_path (str): Optional .npy path for the forecasts, shape (windows, horizon)
+
+    Returns:
+        dict: metrics (see BacktestMetrics.result), windows, wall_seconds,
+        windows_per_second and the settings used
+    """
+    if workers > 1 and not isinstance(model, str):
+        raise ValueError("Pass the model path to backtest with several workers")
+    started_at = time.perf_counter()
+    prices = np.asarray(prices, dtype=np.float32)
+    # With several workers and a given sequence_length, only the workers load the model
+    loaded = load_model(model) if isinstance(model, str) and (workers == 1 or sequence_length is None) else model
+    if not isinstance(loaded, str):
+        sequence_length = resolve_sequence_length(loaded, sequence_length)
+    num_windows = window_count(len(prices), sequence_length, stride, horizon)
+    if num_windows == 0:
+        raise ValueError(f"{len(prices)} prices are too few for sequence_length={sequence_length}, "
+                         f"horizon={horizon}")
+
+    output = None
+    if output_path:
+        output = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float32, shape=(num_windows, horizon))
+    options = {"sequence_length": sequence_length, "horizon": horizon, "stride": stride, "chunk_size": chunk_size}
+    ranges = split_ranges(num_windows, workers)
+
+    if len(ranges) == 1:
+        engine = create_engine(backend, loaded, [sequence_length])
+        engine.warmup()
+        metrics = backtest_series(prices, engine, output=output, **options)
+        worker_seconds = [time.perf_counter() - started_at]
+    else:
+        if output is not None:
+            output.flush()
+            output = None
+        threads = max(1, (os.cpu_count() or 1) // len(ranges))
+        # spawn: TensorFlow is not fork-safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(ranges), mp_context=context, initializer=_init_worker,
+                                 initargs=(model, backend, sequence_length, threads)) as pool:
+            # Each slice carries the sequence_length + horizon - 1 prices its last window needs
+            futures = [pool.submit(_backtest_range,
+                                   prices[start * stride:(stop - 1) * stride + sequence_length + horizon],
+                                   options, output_path, start)
+                       for start, stop in ranges]
+            metrics, worker_seconds = BacktestMetrics(horizon), []
+            for future in futures:
+                partial, seconds = future.result()
+                metrics.merge(partial)
+                worker_seconds.append(seconds)
+    if output is not None:
+        output.flush()
+    wall_seconds = time.perf_counter() - started_at
+
+    return {
+        "metrics": metrics.result(),
+        "windows": num_windows,
+        "sequence_length": sequence_length,
+        "horizon": horizon,
+        "stride": stride,
+        "chunk_size": chunk_size,
+        "backend": backend,
+        "workers": len(ranges),
+        "wall_seconds": wall_seconds,
+        "worker_seconds": worker_seconds,
+        "windows_per_second": num_windows / wall_seconds,
+    }
+
+
+def backtest_manager(manager, model, bars: Optional[int] = None, resolution: Optional[str] = None,
+                     **kwargs) -> dict:
+    """
+    Backtest over the prices held by a PiPriceDataManager.
+
+    Args:
+        manager (PiPriceDataManager): Manager with data loaded, cached or memory-mapped
+        model: See run_backtest
+        bars (int): Backtest only the last N bars; defaults to the whole history
+        resolution (str): Rollup to read mean prices from; defaults to the manager's freq
+        **kwargs: Passed to run_backtest
+
+    Returns:
+        dict: Report from run_backtest
+    """
+    prices = manager.get_historical_prices(bars if bars is not None else sys.maxsize, resolution)
+    if prices is None:
+        raise ValueError("No price data available for the backtest")
+    return run_backtest(prices, model, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Model path (.npz, .h5, .keras or SavedModel directory)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="CSV with timestamp and price columns")
+    source.add_argument("--synthetic", type=int, help="Backtest on a synthetic series of this many prices")
+    parser.add_argument("--freq", default="D", help="Bucket width the CSV is resampled to, e.g. 1min")
+    parser.add_argument("--resolution", help="Rollup to backtest on instead of --freq")
+    parser.add_argument("--bars", type=int, help="Backtest only the last N bars")
+    parser.add_argument("--cache-dir", default="./cache", help="PiPriceDataManager cache directory")
+    parser.add_argument("--sequence-length", type=int, help="Window length (default: the model's input length)")
+    parser.add_argument("--horizon", type=int, default=1, help="Future steps forecast per window")
+    parser.add_argument("--stride", type=int, default=1, help="Offset between consecutive windows")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Windows per inference call")
+    parser.add_argument("--backend", default="compiled", choices=SERVING_BACKENDS,
+                        help="Serving engine for Keras models (.npz models always use numpy)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--predictions", help="Write every forecast to this .npy file")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    options = {"sequence_length": args.sequence_length, "horizon": args.horizon, "stride": args.stride,
+               "chunk_size": args.chunk_size, "backend": args.backend, "workers": args.workers,
+               "output_path": args.predictions}
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        steps = np.arange(args.synthetic)
+        prices = 1.0 + 0.2 * np.sin(steps / 50.0) + np.cumsum(rng.normal(scale=2e-3, size=args.synthetic))
+        report = run_backtest(prices, args.model, **options)
+    else:
+        from data import PiPriceDataManager
+        manager = PiPriceDataManager(cache_dir=args.cache_dir, freq=args.freq,
+                                     rollups=[args.resolution] if args.resolution else ())
+        manager.load_from_csv(args.data)
+        report = backtest_manager(manager, args.model, args.bars, args.resolution, **options)
+
+    metrics = report["metrics"]
+    print(f"{report['windows']} windows (sequence_length={report['sequence_length']}, horizon={report['horizon']}) "
+          f"on {report['workers']} workers in {report['wall_seconds']:.1f}s "
+          f"({report['windows_per_second']:.0f} windows/s)")
+    print(f"{'step':<6}{'MAE':>12}{'MAPE %':>10}{'direction':>11}{'naive MAE':>12}")
+    per_step = metrics["per_step"]
+    rows = [(str(step + 1), *(per_step[name][step] for name in ("mae", "mape", "directional_accuracy", "naive_mae")))
+            for step in range(report["horizon"])]
+    rows.append(("all", metrics["mae"], metrics["mape"], metrics["directional_accuracy"], metrics["naive_mae"]))
+    for step, mae, mape, direction, naive in rows:
+        print(f"{step:<6}{_fmt(mae, '.6f'):>12}{_fmt(mape, '.3f'):>10}{_fmt(direction, '.3f'):>11}"
+              f"{_fmt(naive, '.6f'):>12}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+cache.py
+
+Two-tier prediction cache for the Pi price prediction service.
+
+Features:
+- Bounded in-process LRU cache with per-entry TTL (tier 1).
+- Shared Redis cache (tier 2), promoted into tier 1 on hit.
+- Compact fixed-size keys: a hash of the float32 window bytes plus the model version,
+  forecast horizon and Monte Carlo sample count.
+- Uncertainty intervals cached alongside their prediction.
+- Optional normalization-invariant keys: windows that differ only by an affine
+  rescale share one entry holding the normalized prediction.
+- Hit/miss/eviction counters per tier.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("ai-service-cache")
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache whose entries expire after ``ttl_seconds``.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (self.clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def window_digest(prices: np.ndarray) -> str:
+    """
+    Fixed-size hex digest of a price window's float32 bytes.
+    """
+    window = np.ascontiguousarray(prices, dtype=np.float32)
+    return hashlib.blake2b(window.tobytes(), digest_size=16).hexdigest()
+
+
+def normalized_digest(norm_prices: np.ndarray, precision: int) -> str:
+    """
+    Fixed-size hex digest of a normalized window quantized to ``precision`` decimals.
+    """
+    quantized = np.rint(np.asarray(norm_prices, dtype=np.float64) * 10 ** precision).astype(np.int32)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+
+
+def encode_value(value: tuple) -> str:
+    """
+    Serialize a cached (prediction, confidence[, interval]) tuple for Redis.
+    """
+    return json.dumps(value, separators=(",", ":"))
+
+
+def decode_value(text) -> tuple:
+    """
+    Restore a tuple written by encode_value, with JSON lists back as tuples.
+    Plain "prediction,confidence" values from earlier releases are accepted too.
+    """
+    if isinstance(text, bytes):
+        text = text.decode()
+    if not text.startswith("["):
+        return tuple(map(float, text.split(",")))
+
+    def to_tuple(item):
+        return tuple(to_tuple(x) for x in item) if isinstance(item, list) else item
+
+    return to_tuple(json.loads(text))
+
+
+CACHE_KEY_MODES = ("raw", "normalized")
+
+
+class PredictionCache:
+    """
+    In-process LRU cache in front of Redis for (prediction, confidence) pairs, or
+    (prediction, confidence, (lower, upper)) for Monte Carlo predictions. Predictions
+    and bounds are floats, or tuples of floats for multi-step forecasts.
+
+    In ``raw`` key mode the stored prediction is the price itself. In ``normalized``
+    key mode the key is derived from the min-max normalized window, quantized to
+    ``key_precision`` decimals, and the stored prediction is normalized; callers
+    restore it with each request's own min/max via ``price_from``.
+    """
+
+    def __init__(self, redis=None, model_version: str = "v1", local_max_entries: int = 10000,
+                 local_ttl_seconds: float = 60.0, redis_ttl_seconds: int = 600, prefix: str = "pi_pred",
+                 key_mode: str = "raw", key_precision: int = 4,
+                 observer: Optional[Callable[[str, str], None]] = None):
+        if key_mode not in CACHE_KEY_MODES:
+            raise ValueError(f"Unknown cache key mode '{key_mode}', expected one of {CACHE_KEY_MODES}")
+        if not 0 <= key_precision <= 9:
+            raise ValueError("key_precision must be between 0 and 9 decimals")
+        self.redis = redis
+        self.model_version = model_version
+        self.key_mode = key_mode
+        self.key_precision = key_precision
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.prefix = prefix
+        self.local = LRUCache(local_max_entries, local_ttl_seconds)
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        # Called with (tier, "hit" | "miss" | "error") for every tier consulted, e.g. to export metrics
+        self.observer = observer
+
+    @property
+    def stores_normalized(self) -> bool:
+        return self.key_mode == "normalized"
+
+    def make_key(self, prices: np.ndarray, norm_prices: Optional[np.ndarray] = None,
+                 model_version: Optional[str] = None, horizon: int = 1, samples: int = 0) -> str:
+        """
+        Build the cache key for a price window under a model version.
+
+        Args:
+            prices (np.ndarray): Raw price window
+            norm_prices (np.ndarray): Min-max normalized window, required in normalized key mode
+            model_version (str): Identity of the version that serves the window, e.g.
+                ModelVersion.cache_identity; defaults to the cache's version
+            horizon (int): Number of forecast steps; single-step keys carry no horizon suffix
+            samples (int): Monte Carlo dropout samples behind the prediction, 0 if deterministic
+
+        Returns:
+            str: Cache key
+        """
+        model_version = model_version or self.model_version
+        suffix = (f":h{horizon}" if horizon > 1 else "") + (f":mc{samples}" if samples else "")
+        if self.stores_normalized:
+            if norm_prices is None:
+                raise ValueError("Normalized key mode requires the normalized window")
+            digest = normalized_digest(norm_prices, self.key_precision)
+            return f"{self.prefix}:{model_version}:n{self.key_precision}:{digest}{suffix}"
+        return f"{self.prefix}:{model_version}:{window_digest(prices)}{suffix}"
+
+    def value_for(self, pred_norm, predicted_price):
+        """
+        Select the prediction to store for the active key mode: a float for one
+        step, a tuple of floats for a forecast vector.
+        """
+        values = np.atleast_1d(np.asarray(pred_norm if self.stores_normalized else predicted_price,
+                                          dtype=np.float64))
+        return float(values[0]) if values.size == 1 else tuple(values.tolist())
+
+    def price_from(self, value, min_price: float, max_price: float):
+        """
+        Restore a cached prediction to the requesting window's price scale.
+        """
+        if self.stores_normalized:
+            if isinstance(value, tuple):
+                return tuple((np.asarray(value) * (max_price - min_price) + min_price).tolist())
+            return value * (max_price - min_price) + min_price
+        return value
+
+    async def get(self, key: str) -> Optional[tuple[float, float]]:
+        """
+        Look up a prediction, trying the local tier before Redis.
+        """
+        value = self.local.get(key)
+        self._observe("local", "miss" if value is None else "hit")
+        if value is not None:
+            return value
+        if self.redis is None:
+            return None
+        try:
+            cached = await self.redis.get(key)
+        except Exception as e:
+            self.redis_errors += 1
+            self._observe("redis", "error")
+            logger.warning(f"Redis GET failed, treating as miss: {e}")
+            return None
+        if not cached:
+            self.redis_misses += 1
+            self._observe("redis", "miss")
+            return None
+        self.redis_hits += 1
+        self._observe("redis", "hit")
+        value = decode_value(cached)
+        self.local.set(key, value)
+        return value
+
+    def _observe(self, tier: str, result: str):
+        if self.observer is not None:
+            self.observer(tier, result)
+
+    async def set(self, key: str, value: tuple[float, float]):
+        """
+        Store a prediction in both tiers.
+        """
+        self.local.set(key, value)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(key, encode_value(value), ex=self.redis_ttl_seconds)
+        except Exception as e:
+            self.redis_errors += 1
+            self._observe("redis", "error")
+            logger.warning(f"Redis SET failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "model_version": self.model_version,
+            "key_mode": self.key_mode,
+            "key_precision": self.key_precision if self.stores_normalized else None,
+            "local": self.local.stats(),
+            "redis": {
+                "connected": self.redis is not None,
+                "ttl_seconds": self.redis_ttl_seconds,
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "errors": self.redis_errors,
+            },
+        }
@@ -6,36 +6,60 @@ Advanced, high-performance data management module for Pi price historical data.
 Features:
 - Efficient data ingestion from multiple sources (CSV, APIs).
 - Robust cleaning and validation.
-- Support for time-series resampling and windowing.
-- Dataset versioning and caching.
-- Async fetching with request throttling.
+- Support for time-series resampling and windowing, with a configurable bucket
+  width and precomputed OHLC/mean rollups at several resolutions.
+- Incremental ingest: new rows are merged against the tail of the series and
+  appended to the on-disk cache, at a cost proportional to the update.
+- Dataset versioning and caching (CSV, memory-mapped NumPy, Parquet, Feather).
+- Async fetching with request throttling: pooled connections, per-host rate
+  limits and concurrent multi-source fetches.
+- Vectorized API response parsing, with an optional streaming JSON mode.
 - Integration hooks for Redis caching.
 
 """
 
-import asyncio
-import aiohttp
+import json
 import pandas as pd
 import numpy as np
 import os
 import logging
-import datetime
-from typing import Optional
+from typing import Iterable, Optional
+
+from storage import get_store, MmapStore
+from rollups import Rollup, freq_nanos
+from fetcher import PriceFetcher, FetchRequest
+from parsing import parse_price_records, parse_price_stream
 
 logger = logging.getLogger("ai-service-data")
 logging.basicConfig(level=logging.INFO)
 
+# Read size for streamed API responses
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
 class PiPriceDataManager:
     """
     High-tech data manager class for Pi price time series.
     """
 
-    def __init__(self, cache_dir: str = "./cache", version: str = "v1"):
+    def __init__(self, cache_dir: str = "./cache", version: str = "v1", cache_format: str = "csv",
+                 freq: str = "D", rollups: Iterable[str] = (), fetcher: Optional[PriceFetcher] = None):
         self.cache_dir = cache_dir
         self.version = version
+        self.cache_format = cache_format
+        # 'data' holds the mean price per freq bucket; every rollup is kept up to date alongside it
+        self.freq = freq
+        self.rollups = {resolution: Rollup(resolution) for resolution in dict.fromkeys([freq, *rollups])}
         os.makedirs(cache_dir, exist_ok=True)
-        self.cached_file_path = os.path.join(self.cache_dir, f"pi_price_data_{self.version}.csv")
+        self.store = get_store(cache_format, os.path.join(self.cache_dir, f"pi_price_data_{self.version}"))
+        self.cached_file_path = self.store.path
         self.data = None
+        self.fetcher = fetcher or PriceFetcher()
+        # Memory-mapped (timestamps, prices) when opened from an mmap cache without a DataFrame
+        self._mapped = None
+        # Latest ingested raw timestamp; older rows are rejected by ingest()
+        self._last_ts = None
+        self._tail_path = self.store.base_path + ".tail.json"
 
     def load_from_csv(self, csv_path: str):
         """
@@ -50,31 +74,58 @@ class PiPriceDataManager:
         self._cache_data()
         return self.data
 
-    async def fetch_from_api(self, url: str, params: Optional[dict] = None, max_retries: int = 3):
+    async def fetch_from_api(self, url: str, params: Optional[dict] = None, max_retries: int = 3,
+                             stream: bool = False):
         """
         Async fetch historical price data from external API.
         Expected JSON response with time series data.
+        Uses the manager's shared, rate-limited fetcher; its pooled session stays
+        open across calls until close().
+        With stream=True the JSON array is parsed incrementally as it arrives,
+        so very large responses are never held as a decoded list.
+        """
+        if stream:
+            df = await self.fetcher.fetch_parsed(
+                url, lambda response: parse_price_stream(response.content.iter_chunked(STREAM_CHUNK_BYTES)),
+                params, max_retries=max_retries)
+        else:
+            json_data = await self.fetcher.fetch_json(url, params, max_retries=max_retries)
+            df = self._parse_api_response(json_data)
+        self.data = self._validate_and_clean(df)
+        logger.info(f"Fetched and loaded Pi price data from API: {url}")
+        self._cache_data()
+        return self.data
+
+    async def fetch_many_from_api(self, requests: Iterable[FetchRequest]):
+        """
+        Concurrently fetch several sources, symbols or date-range pages and merge
+        them into one cleaned series.
+
+        Requests are URLs or (url, params) pairs, e.g. from fetcher.date_range_requests.
+        Failed requests are logged and skipped; if every request fails the first
+        error is raised.
+        """
+        requests = list(requests)
+        results = await self.fetcher.fetch_many(requests)
+        frames, errors = [], []
+        for request, result in zip(requests, results):
+            if isinstance(result, Exception):
+                errors.append(result)
+                logger.error(f"Skipping failed request {request}: {result}")
+                continue
+            frames.append(self._parse_api_response(result))
+        if not frames:
+            raise errors[0] if errors else ValueError("No requests given")
+        self.data = self._validate_and_clean(pd.concat(frames, ignore_index=True))
+        logger.info(f"Fetched and merged {len(frames)}/{len(requests)} API responses, {len(self.data)} rows")
+        self._cache_data()
+        return self.data
+
+    async def close(self):
         """
-        retries = 0
-        last_exc = None
-        async with aiohttp.ClientSession() as session:
-            while retries < max_retries:
-                try:
-                    async with session.get(url, params=params, timeout=10) as response:
-                        response.raise_for_status()
-                        json_data = await response.json()
-                        df = self._parse_api_response(json_data)
-                        self.data = self._validate_and_clean(df)
-                        logger.info(f"Fetched and loaded Pi price data from API: {url}")
-                        self._cache_data()
-                        return self.data
-                except Exception as e:
-                    retries += 1
-                    last_exc = e
-                    logger.warning(f"API fetch attempt {retries} failed: {e}")
-                    await asyncio.sleep(2 ** retries)  # Exponential backoff
-            logger.error(f"Failed to fetch data from API after {max_retries} attempts")
-            raise last_exc
+        Close the shared HTTP session, e.g. from a shutdown hook.
+        """
+        await self.fetcher.close()
 
     def _parse_api_response(self, json_data):
         """
@@ -84,25 +135,7 @@ class PiPriceDataManager:
         # Example assumes json_data is list of dicts with keys 'timestamp' and 'price'
         if not isinstance(json_data, list):
             raise ValueError("Unexpected API data format")
-
-        rows = []
-        for entry in json_data:
-            ts = entry.get("timestamp") or entry.get("time") or entry.get("date")
-            price = entry.get("price") or entry.get("close")
-            if ts is None or price is None:
-                continue
-            # Convert timestamp to pandas datetime
-            if isinstance(ts, (int, float)):
-                ts = pd.to_datetime(ts, unit='s')
-            else:
-                ts = pd.to_datetime(ts)
-            try:
-                price = float(price)
-            except Exception:
-                continue
-            rows.append({"timestamp": ts, "price": price})
-        df = pd.DataFrame(rows).sort_values("timestamp").reset_index(drop=True)
-        return df
+        return parse_price_records(json_data)
 
     def _validate_and_clean(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -110,63 +143,211 @@ class PiPriceDataManager:
         - Drop duplicates
         - Fill missing timestamps with interpolation
         - Remove negative or zero prices
+        Rebuilds every rollup and returns the mean price per freq bucket.
         """
         df = df.drop_duplicates(subset=["timestamp"])
         df = df[df["price"] > 0].copy()
         df = df.sort_values("timestamp").reset_index(drop=True)
+        if df.empty:
+            logger.warning("No valid price rows after cleaning")
+            return pd.DataFrame({"timestamp": pd.Series(dtype="datetime64[ns]"), "price": pd.Series(dtype=float)})
 
-        # Resample to daily frequency filling missing days by interpolation
-        df.set_index("timestamp", inplace=True)
-        df = df.resample("D").mean()
-        df["price"] = df["price"].interpolate(method="linear")
+        # Resample to each rollup frequency filling missing buckets by interpolation
+        for rollup in self.rollups.values():
+            rollup.rebuild(df)
+        self._last_ts = df["timestamp"].iloc[-1]
 
-        df.reset_index(inplace=True)
-        if df["price"].isnull().any():
+        result = self.rollups[self.freq].frame(("price",))
+        if result["price"].isnull().any():
             logger.warning("Null prices detected after interpolation, filling with forward fill")
-            df["price"].fillna(method="ffill", inplace=True)
-        return df
+            result["price"].fillna(method="ffill", inplace=True)
+        return result
 
     def _cache_data(self):
         """
-        Cache current data to CSV for fast future loading.
+        Cache current data in the configured format for fast future loading.
         """
         if self.data is not None:
-            self.data.to_csv(self.cached_file_path, index=False)
+            self.store.save(self.data)
+            self._save_tail()
+            self._mapped = None
             logger.info(f"Cached data to {self.cached_file_path}")
 
+    def _save_tail(self):
+        if self._last_ts is None:
+            return
+        with open(self._tail_path, "w") as f:
+            json.dump({"last_ts": self._last_ts.isoformat(),
+                       "rollups": {freq: rollup.dump_tail() for freq, rollup in self.rollups.items() if len(rollup)}}, f)
+
+    def _restore_rollups(self):
+        """
+        Rebuild rollups from the cached series and restore saved last-bucket state.
+
+        The cache holds only the mean price per freq bucket, so coarser rollups are
+        re-aggregated from those means and finer rollups stay empty until the next
+        full load. Without saved state the last bucket counts as one observation.
+        """
+        series = self.data[["timestamp", "price"]]
+        width = freq_nanos(self.freq)
+        for freq, rollup in self.rollups.items():
+            rollup_width = freq_nanos(freq)
+            if freq != self.freq and width is not None and rollup_width is not None and rollup_width < width:
+                logger.warning(f"Rollup {freq} is finer than the cached {self.freq} series, left empty")
+                rollup.buffer = None
+                continue
+            rollup.rebuild(series)
+        self._last_ts = series["timestamp"].iloc[-1]
+
+        if os.path.exists(self._tail_path):
+            with open(self._tail_path) as f:
+                tail = json.load(f)
+            self._last_ts = pd.Timestamp(tail["last_ts"])
+            for freq, state in tail["rollups"].items():
+                if freq in self.rollups and len(self.rollups[freq]):
+                    self.rollups[freq].restore_tail(state)
+
+    def ingest(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Incrementally merge new raw rows into the cleaned series and all rollups.
+
+        Only the last existing bucket and the buckets covered by the update are
+        re-resampled and interpolated, and the on-disk cache is appended to rather
+        than rewritten (CSV and mmap formats). Rows at or before the latest
+        ingested timestamp are dropped as late duplicates.
+
+        Args:
+            df (pd.DataFrame): New rows with 'timestamp' and 'price' columns
+
+        Returns:
+            pd.DataFrame: Updated cleaned series
+        """
+        if self.data is None and self.store.exists():
+            self.load_cache()
+        if self.data is None or self.data.empty:
+            self.data = self._validate_and_clean(df)
+            self._cache_data()
+            return self.data
+        if self._last_ts is None:
+            self._restore_rollups()
+
+        new = df.drop_duplicates(subset=["timestamp"])
+        new = new[new["price"] > 0].sort_values("timestamp")
+        late = new["timestamp"] <= self._last_ts
+        if late.any():
+            logger.warning(f"Dropping {int(late.sum())} rows at or before {self._last_ts}")
+            new = new[~late]
+        if new.empty:
+            return self.data
+
+        # Update every rollup together; the primary one supplies the rows to persist
+        rows = None
+        for freq, rollup in self.rollups.items():
+            if not len(rollup):
+                continue
+            updated = rollup.update(new)
+            if freq == self.freq:
+                rows = updated[["timestamp", "price"]]
+        self._last_ts = new["timestamp"].iloc[-1]
+        self.data = self.rollups[self.freq].frame(("price",))
+        self._mapped = None
+
+        self.store.append(rows, replace_last=1, full=self.data)
+        self._save_tail()
+        logger.info(f"Ingested {len(new)} rows, {len(rows) - 1} new buckets")
+        return self.data
+
     def load_cache(self) -> Optional[pd.DataFrame]:
         """
         Load cached data if available.
         """
-        if os.path.exists(self.cached_file_path):
-            df = pd.read_csv(self.cached_file_path, parse_dates=["timestamp"])
+        if self.store.exists():
+            df = self.store.load()
             self.data = df
+            self._mapped = None
+            self._last_ts = None
             logger.info(f"Loaded cached data from {self.cached_file_path}")
             return df
         return None
 
+    def open_cache(self) -> bool:
+        """
+        Memory-map cached arrays without building a DataFrame.
+
+        Only the mmap cache format supports this; other formats fall back to
+        load_cache. Price lookups then slice the mapped arrays directly.
+
+        Returns:
+            bool: True if cached data is available
+        """
+        if not isinstance(self.store, MmapStore):
+            return self.load_cache() is not None
+        if not self.store.exists():
+            return False
+        self._mapped = self.store.load_arrays()
+        self.data = None
+        logger.info(f"Memory-mapped cached data from {self.cached_file_path}")
+        return True
+
+    def _prices(self) -> Optional[np.ndarray]:
+        if self.data is not None:
+            return self.data["price"].to_numpy()
+        if self._mapped is not None:
+            return self._mapped[1]
+        return None
+
     def get_latest_price(self) -> Optional[float]:
         """
         Return the most recent price available in data.
         """
-        if self.data is None or self.data.empty:
+        prices = self._prices()
+        if prices is None or len(prices) == 0:
             return None
-        return float(self.data["price"].iloc[-1])
+        return float(prices[-1])
 
-    def get_historical_prices(self, days: int) -> Optional[np.ndarray]:
+    def get_historical_prices(self, days: int, resolution: Optional[str] = None) -> Optional[np.ndarray]:
         """
-        Get historical prices for the last N days.
+        Get historical prices for the last N days (or bars).
 
         Args:
-            days (int): Number of last days to retrieve
+            days (int): Number of last buckets to retrieve
+            resolution (str): Rollup frequency to read mean prices from; defaults to
+                the manager's freq. Served from precomputed bars in O(days).
 
         Returns:
             np.ndarray or None: Array of prices or None if data unavailable
         """
-        if self.data is None or self.data.empty:
+        if resolution is not None and resolution != self.freq:
+            rollup = self._rollup(resolution)
+            return rollup.tail(days) if rollup is not None else None
+        prices = self._prices()
+        if prices is None or len(prices) == 0:
             return None
-        subset = self.data.tail(days)
-        return subset["price"].to_numpy()
+        return np.asarray(prices[-days:]) if days > 0 else prices[:0]
+
+    def get_ohlc(self, bars: int, resolution: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Get the last N OHLC/mean bars of a rollup.
+
+        Args:
+            bars (int): Number of last bars to retrieve
+            resolution (str): Rollup frequency; defaults to the manager's freq
+
+        Returns:
+            pd.DataFrame or None: Columns timestamp, open, high, low, close, price
+        """
+        rollup = self._rollup(resolution or self.freq)
+        if rollup is None:
+            return None
+        return rollup.frame().iloc[-bars:] if bars > 0 else rollup.frame().iloc[:0]
+
+    def _rollup(self, resolution: str) -> Optional[Rollup]:
+        if resolution not in self.rollups:
+            raise ValueError(f"No rollup at resolution '{resolution}', available: {list(self.rollups)}")
+        if self.data is not None and self._last_ts is None:
+            self._restore_rollups()
+        rollup = self.rollups[resolution]
+        return rollup if len(rollup) else None
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,182 @@
+"""
+fetcher.py
+
+Concurrent, rate-limited HTTP fetcher for Pi price history sources.
+
+Features:
+- One shared, pooled aiohttp session (keep-alive connections, DNS cache),
+  created lazily for the running event loop.
+- Token-bucket rate limit per host plus a global concurrency cap.
+- Retries with capped exponential backoff.
+- Custom response parsers, e.g. streaming a large body instead of decoding it at once.
+- Helpers to split a long date range into paginated requests.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, Optional, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+import pandas as pd
+
+logger = logging.getLogger("ai-service-fetcher")
+
+# A request is either a bare URL or a (url, params) pair
+FetchRequest = Union[str, tuple[str, Optional[dict]]]
+
+
+class TokenBucket:
+    """
+    Asyncio token bucket: ``rate`` requests per second with bursts up to ``capacity``.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        # Waiters queue on the lock so tokens are handed out in arrival order
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class PriceFetcher:
+    """
+    Fetches JSON from many URLs concurrently over a shared connection pool.
+    """
+
+    def __init__(self, rate_per_host: float = 5.0, burst: Optional[float] = None,
+                 max_concurrency: int = 10, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 4.0, timeout: float = 10.0, pool_size: int = 100):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._buckets: dict[str, TokenBucket] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests_sent = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _bind_loop(self):
+        # The session, semaphore and bucket locks belong to one event loop; a fetcher
+        # reused from another loop (e.g. successive asyncio.run calls) starts fresh ones
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._buckets = {}
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        self._bind_loop()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self._buckets[host]
+
+    async def fetch_json(self, url: str, params: Optional[dict] = None, max_retries: Optional[int] = None):
+        """
+        GET a URL and decode its JSON body, retrying failures with capped backoff.
+        """
+        return await self.fetch_parsed(url, lambda response: response.json(), params, max_retries)
+
+    async def fetch_parsed(self, url: str, parse: Callable[[aiohttp.ClientResponse], Awaitable],
+                           params: Optional[dict] = None, max_retries: Optional[int] = None):
+        """
+        GET a URL and hand the open response to ``parse``, e.g. to stream its body.
+
+        A failure while parsing is retried like a failed request.
+        """
+        self._bind_loop()
+        max_retries = self.max_retries if max_retries is None else max_retries
+        last_exc = None
+        for attempt in range(1, max_retries + 1):
+            try:
+                # Wait for the host's token first, so a throttled host never holds concurrency slots
+                await self._bucket(url).acquire()
+                async with self._semaphore:
+                    self.requests_sent += 1
+                    async with self.session.get(url, params=params) as response:
+                        response.raise_for_status()
+                        return await parse(response)
+            except Exception as e:
+                last_exc = e
+                logger.warning(f"Fetch attempt {attempt} for {url} failed: {e}")
+                if attempt < max_retries:
+                    await asyncio.sleep(min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        logger.error(f"Failed to fetch {url} after {max_retries} attempts")
+        raise last_exc
+
+    async def fetch_many(self, requests: Iterable[FetchRequest]) -> list:
+        """
+        Fetch every request concurrently.
+
+        Returns:
+            list: Decoded JSON per request, or the exception raised for it, in request order
+        """
+        jobs = []
+        for request in requests:
+            url, params = (request, None) if isinstance(request, str) else request
+            jobs.append(self.fetch_json(url, params))
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def close(self):
+        # A session left on a previous, already closed loop cannot be closed from this one
+        if self._session is not None and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+
+
+def date_range_requests(url: str, start, end, chunk: str = "30D", start_param: str = "start",
+                        end_param: str = "end", params: Optional[dict] = None) -> list[tuple[str, dict]]:
+    """
+    Split [start, end) into consecutive pages of width ``chunk`` as (url, params) requests.
+
+    Page bounds are passed as epoch seconds in ``start_param``/``end_param``.
+    """
+    bounds = list(pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=chunk))
+    if not bounds or bounds[-1] < pd.Timestamp(end):
+        bounds.append(pd.Timestamp(end))
+    requests = []
+    for page_start, page_end in zip(bounds, bounds[1:]):
+        page = dict(params or {})
+        page[start_param] = int(page_start.timestamp())
+        page[end_param] = int(page_end.timestamp())
+        requests.append((url, page))
+    return requests
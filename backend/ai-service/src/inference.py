@@ -0,0 +1,249 @@
+"""
+inference.py
+
+Micro-batching inference scheduler for the Pi price prediction service.
+
+Features:
+- Gathers concurrent prediction requests over a short, configurable window.
+- Groups pending requests by sequence length so every batch has a uniform shape.
+- Runs one batched forward pass per group on a worker thread, off the event loop.
+- Tracks queue depth, batch-size histogram and per-request wait time for tuning.
+- Optional bound on queued plus in-flight samples: excess requests are rejected
+  immediately instead of piling up behind a slow model.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger("ai-service-inference")
+
+
+class LatencyStats:
+    """
+    Rolling latency statistics over the most recent samples (in milliseconds).
+    """
+
+    def __init__(self, window: int = 1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self.samples.append(value_ms)
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def latest(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        return float(np.percentile(np.fromiter(self.samples, dtype=np.float64), q))
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+class QueueFullError(RuntimeError):
+    """
+    Raised when the scheduler already holds ``max_queue`` queued or in-flight samples.
+    """
+
+
+class _PendingRequest:
+    __slots__ = ("input_seq", "future", "enqueued_at")
+
+    def __init__(self, input_seq: np.ndarray, future: asyncio.Future):
+        self.input_seq = input_seq
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Collects concurrent inference requests into batches keyed by sequence length,
+    forecast horizon and Monte Carlo sample count.
+
+    A group is flushed when it reaches ``max_batch_size`` or when the first request
+    in the group has waited ``batch_window_ms``, whichever comes first. With
+    ``max_queue`` set, requests arriving while that many samples are queued or
+    running raise QueueFullError. Requests with a horizon above 1 or with samples
+    are run through ``forecast_fn(inputs, horizon, samples)`` instead of
+    ``predict_fn(inputs)``. A request with K Monte Carlo samples runs as K model
+    rows, so it counts as K samples towards ``max_queue`` and the batch metrics.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray], max_batch_size: int = 32,
+                 batch_window_ms: float = 2.0, executor: Optional[Executor] = None,
+                 max_queue: Optional[int] = None,
+                 on_batch: Optional[Callable[[int, float], None]] = None,
+                 forecast_fn: Optional[Callable[[np.ndarray, int, int], np.ndarray]] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.forecast_fn = forecast_fn
+        self.max_batch_size = max_batch_size
+        self.batch_window_ms = batch_window_ms
+        self.max_queue = max_queue
+        self.rejected = 0
+        # Called with (rows in the forward pass, seconds) after every pass, e.g. to export metrics
+        self.on_batch = on_batch
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._pending: dict[tuple[int, int, int], list[_PendingRequest]] = {}
+        self._timers: dict[tuple[int, int, int], asyncio.TimerHandle] = {}
+        self._in_flight = 0
+        self.batch_sizes: dict[int, int] = {}
+        self.wait_time = LatencyStats()
+        self.batch_latency = LatencyStats()
+
+    @staticmethod
+    def _rows(requests: int, samples: int) -> int:
+        # Sampled forecasts repeat every window once per sample in the forward pass
+        return requests * max(samples, 1)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._rows(len(group), key[2]) for key, group in self._pending.items())
+
+    def _admit(self, samples: int):
+        if self.max_queue is None:
+            return
+        backlog = self.queue_depth + self._in_flight
+        # An oversized batch is still admitted when nothing else is waiting
+        if backlog and backlog + samples > self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"Inference queue is full ({backlog} samples pending)")
+
+    async def submit(self, input_seq: np.ndarray, horizon: int = 1, samples: int = 0) -> np.ndarray:
+        """
+        Queue a single input sequence and wait for its prediction.
+
+        Args:
+            input_seq (np.ndarray): Input features shape (sequence_length, features)
+            horizon (int): Number of future steps to forecast
+            samples (int): Monte Carlo dropout samples, 0 for a deterministic prediction
+
+        Returns:
+            np.ndarray: Model output row for this sequence, shape (samples, horizon)
+            when sampling
+        """
+        self._admit(self._rows(1, samples))
+        loop = asyncio.get_running_loop()
+        key = (input_seq.shape[0], horizon, samples)
+        request = _PendingRequest(input_seq, loop.create_future())
+        group = self._pending.setdefault(key, [])
+        group.append(request)
+
+        if len(group) >= self.max_batch_size:
+            self._flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.batch_window_ms / 1000.0, self._flush, key)
+        return await request.future
+
+    async def run(self, inputs: np.ndarray, horizon: int = 1, samples: int = 0) -> np.ndarray:
+        """
+        Run an already-batched input directly on the inference executor.
+
+        Args:
+            inputs (np.ndarray): Input features shape (samples, sequence_length, features)
+            horizon (int): Number of future steps to forecast
+            samples (int): Monte Carlo dropout samples, 0 for deterministic predictions
+
+        Returns:
+            np.ndarray: Model outputs for every sample
+        """
+        rows = self._rows(len(inputs), samples)
+        self._admit(rows)
+        self.batch_sizes[rows] = self.batch_sizes.get(rows, 0) + 1
+        started_at = time.perf_counter()
+        self._in_flight += rows
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._forward, inputs, horizon, samples)
+        finally:
+            self._in_flight -= rows
+            self._record_batch(rows, time.perf_counter() - started_at)
+
+    def _forward(self, inputs: np.ndarray, horizon: int, samples: int) -> np.ndarray:
+        if horizon == 1 and not samples:
+            return self.predict_fn(inputs)
+        if self.forecast_fn is None:
+            raise ValueError("Multi-step and sampled forecasts are not supported by this scheduler")
+        return self.forecast_fn(inputs, horizon, samples)
+
+    def _flush(self, key: tuple[int, int, int]):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._pending.pop(key, [])
+        while group:
+            batch, group = group[:self.max_batch_size], group[self.max_batch_size:]
+            asyncio.get_running_loop().create_task(self._run_batch(batch, *key[1:]))
+
+    async def _run_batch(self, batch: list[_PendingRequest], horizon: int = 1, samples: int = 0):
+        dispatched_at = time.perf_counter()
+        for request in batch:
+            self.wait_time.observe((dispatched_at - request.enqueued_at) * 1000.0)
+        rows = self._rows(len(batch), samples)
+        self.batch_sizes[rows] = self.batch_sizes.get(rows, 0) + 1
+        inputs = np.stack([request.input_seq for request in batch])
+
+        self._in_flight += rows
+        try:
+            loop = asyncio.get_running_loop()
+            outputs = await loop.run_in_executor(self.executor, self._forward, inputs, horizon, samples)
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} requests: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= rows
+            self._record_batch(rows, time.perf_counter() - dispatched_at)
+
+        for request, output in zip(batch, outputs):
+            if not request.future.done():
+                request.future.set_result(output)
+
+    def _record_batch(self, size: int, seconds: float):
+        self.batch_latency.observe(seconds * 1000.0)
+        if self.on_batch is not None:
+            self.on_batch(size, seconds)
+
+    def stats(self) -> dict:
+        """
+        Return scheduler statistics for tuning the batching window.
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "batch_window_ms": self.batch_window_ms,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "wait_time": self.wait_time.snapshot(),
+            "batch_latency": self.batch_latency.snapshot(),
+        }
+
+    def shutdown(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,268 @@
+"""
+lite.py
+
+Compact PiPriceLSTM artifacts and a NumPy runtime that serves them without TensorFlow.
+
+Features:
+- Export of a trained Sequential LSTM / Dropout / Dense Keras model to a single
+  .npz file of weight matrices plus layer metadata.
+- Post-training weight quantization: float32, float16, or symmetric per-channel
+  int8 (about 4x smaller than float32), dequantized once at load time.
+- Batched NumPy forward pass: the input projection of every timestep is one
+  matrix product, leaving one recurrent product per step.
+- Dropout-active forward passes for Monte Carlo uncertainty.
+- Importable without TensorFlow; only exporting from Keras needs it.
+
+Usage:
+    python src/lite.py model/pi_price_lstm_best.h5 model/pi_price_lstm.npz --quantization int8
+"""
+
+import argparse
+import json
+from typing import Callable, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+QUANTIZATIONS = ("float32", "float16", "int8")
+
+
+def sigmoid(x):
+    # tanh form of the logistic function, free of exp overflow
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def relu(x):
+    return np.maximum(x, 0.0)
+
+
+def linear(x):
+    return x
+
+
+# Keyed by the Keras activation name; every function's __name__ matches its key
+ACTIVATIONS = {fn.__name__: fn for fn in (np.tanh, sigmoid, relu, linear)}
+
+
+def activation(name: str) -> Callable:
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}' for NumPy inference")
+    return ACTIVATIONS[name]
+
+
+def _name(fn) -> str:
+    return getattr(fn, "__name__", str(fn))
+
+
+def quantize(weights: np.ndarray, quantization: str) -> dict:
+    """
+    Encode a weight matrix for storage.
+
+    int8 uses one symmetric scale per output column, so columns with small weights
+    keep their resolution.
+
+    Returns:
+        dict: Arrays to store, "q" plus "scale" for int8
+    """
+    if quantization == "float32":
+        return {"q": weights.astype(np.float32)}
+    if quantization == "float16":
+        return {"q": weights.astype(np.float16)}
+    if quantization == "int8":
+        scale = np.abs(weights).max(axis=0) / 127.0
+        scale = np.where(scale == 0, 1.0, scale).astype(np.float32)
+        return {"q": np.clip(np.rint(weights / scale), -127, 127).astype(np.int8), "scale": scale}
+    raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+
+
+def dequantize(arrays: dict) -> np.ndarray:
+    q = arrays["q"]
+    if "scale" in arrays:
+        return q.astype(np.float32) * arrays["scale"]
+    return q.astype(np.float32)
+
+
+class LiteModel:
+    """
+    NumPy execution of a stacked LSTM network.
+
+    Layers are ("lstm", (kernel, recurrent_kernel, bias, activation, recurrent_activation,
+    return_sequences)), ("dropout", rate) and ("dense", (kernel, bias, activation)), with
+    weights in the Keras layout (LSTM gate order: input, forget, cell, output).
+
+    Args:
+        layers (list): Layer specs in execution order
+        input_shape (tuple): (None, sequence_length, features); sequence_length may be None
+    """
+
+    def __init__(self, layers: list, input_shape: tuple, quantization: str = "float32"):
+        self.layers = layers
+        self.input_shape = tuple(input_shape)
+        self.quantization = quantization
+        self.rng = np.random.default_rng()
+        dense = self.dense_layers
+        steps = dense[-1][0].shape[1] if dense else self.lstm_layers[-1][1].shape[0]
+        self.output_shape = (None, int(steps))
+
+    @property
+    def lstm_layers(self) -> list:
+        return [params for kind, params in self.layers if kind == "lstm"]
+
+    @property
+    def dense_layers(self) -> list:
+        return [params for kind, params in self.layers if kind == "dense"]
+
+    @classmethod
+    def from_keras(cls, model) -> "LiteModel":
+        """
+        Copy the weights of a Sequential Keras model made of LSTM, Dropout and Dense layers.
+        """
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            weights = [w.astype(np.float32) for w in layer.get_weights()]
+            if kind == "LSTM":
+                if any(k == "dense" for k, _ in layers):
+                    raise ValueError("Every LSTM layer must come before the Dense layers")
+                kernel, recurrent_kernel = weights[:2]
+                bias = weights[2] if len(weights) > 2 else np.zeros(kernel.shape[1], dtype=np.float32)
+                layers.append(("lstm", (kernel, recurrent_kernel, bias, activation(_name(layer.activation)),
+                                        activation(_name(layer.recurrent_activation)), layer.return_sequences)))
+            elif kind == "Dense":
+                kernel = weights[0]
+                bias = weights[1] if len(weights) > 1 else np.zeros(kernel.shape[1], dtype=np.float32)
+                layers.append(("dense", (kernel, bias, activation(_name(layer.activation)))))
+            elif kind == "Dropout":
+                layers.append(("dropout", float(layer.rate)))
+            elif kind != "InputLayer":
+                raise ValueError(f"Unsupported layer '{kind}' for NumPy inference")
+        if not any(k == "lstm" for k, _ in layers):
+            raise ValueError("NumPy inference requires at least one LSTM layer")
+        return cls(layers, model.input_shape)
+
+    def save(self, path: str, quantization: str = "float32"):
+        """
+        Write the model as one .npz file with weights stored at ``quantization``.
+        """
+        arrays, meta = {}, []
+        for index, (kind, params) in enumerate(self.layers):
+            if kind == "dropout":
+                meta.append({"kind": kind, "rate": params})
+                continue
+            if kind == "lstm":
+                kernel, recurrent_kernel, bias, act, recurrent_act, return_sequences = params
+                matrices = {"kernel": kernel, "recurrent_kernel": recurrent_kernel, "bias": bias}
+                meta.append({"kind": kind, "activation": _name(act), "recurrent_activation": _name(recurrent_act),
+                             "return_sequences": bool(return_sequences)})
+            else:
+                kernel, bias, act = params
+                matrices = {"kernel": kernel, "bias": bias}
+                meta.append({"kind": kind, "activation": _name(act)})
+            for name, matrix in matrices.items():
+                # Biases are tiny and sensitive to rounding, so only matrices are quantized
+                encoded = quantize(matrix, quantization if matrix.ndim > 1 else "float32")
+                for part, array in encoded.items():
+                    arrays[f"{index}/{name}/{part}"] = array
+        header = {"format": FORMAT_VERSION, "input_shape": list(self.input_shape), "quantization": quantization,
+                  "layers": meta}
+        with open(path, "wb") as f:
+            np.savez(f, __meta__=np.frombuffer(json.dumps(header).encode(), dtype=np.uint8), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "LiteModel":
+        """
+        Load a model written by ``save``; quantized weights are restored to float32.
+        """
+        with np.load(path) as archive:
+            header = json.loads(archive["__meta__"].tobytes().decode())
+            if header.get("format") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported model file format {header.get('format')} in {path}")
+
+            def matrix(index: int, name: str) -> np.ndarray:
+                prefix = f"{index}/{name}/"
+                return dequantize({key[len(prefix):]: archive[key] for key in archive.files
+                                   if key.startswith(prefix)})
+
+            layers = []
+            for index, spec in enumerate(header["layers"]):
+                if spec["kind"] == "dropout":
+                    layers.append(("dropout", spec["rate"]))
+                elif spec["kind"] == "lstm":
+                    layers.append(("lstm", (matrix(index, "kernel"), matrix(index, "recurrent_kernel"),
+                                            matrix(index, "bias"), activation(spec["activation"]),
+                                            activation(spec["recurrent_activation"]), spec["return_sequences"])))
+                else:
+                    layers.append(("dense", (matrix(index, "kernel"), matrix(index, "bias"),
+                                             activation(spec["activation"]))))
+        return cls(layers, tuple(header["input_shape"]), header["quantization"])
+
+    def predict(self, inputs: np.ndarray, training: bool = False) -> np.ndarray:
+        """
+        Run a forward pass.
+
+        Args:
+            inputs (np.ndarray): Input features shape (samples, sequence_length, features)
+            training (bool): Apply dropout, for Monte Carlo sampling
+
+        Returns:
+            np.ndarray: Model outputs shape (samples, outputs)
+        """
+        x = np.asarray(inputs, dtype=np.float32)
+        for kind, params in self.layers:
+            if kind == "lstm":
+                x = self._lstm(x, *params)
+            elif kind == "dense":
+                kernel, bias, act = params
+                x = act(x @ kernel + bias)
+            elif training and params > 0:
+                keep = self.rng.random(x.shape, dtype=np.float32) >= params
+                x = x * keep / np.float32(1.0 - params)
+        return x
+
+    @staticmethod
+    def _lstm(x: np.ndarray, kernel: np.ndarray, recurrent_kernel: np.ndarray, bias: np.ndarray,
+              act: Callable, recurrent_act: Callable, return_sequences: bool) -> np.ndarray:
+        samples, steps, features = x.shape
+        units = recurrent_kernel.shape[0]
+        # Input contributions of all timesteps in one product: (samples, steps, 4 * units)
+        projected = (x.reshape(-1, features) @ kernel + bias).reshape(samples, steps, 4 * units)
+        h = np.zeros((samples, units), dtype=np.float32)
+        c = np.zeros((samples, units), dtype=np.float32)
+        outputs = np.empty((samples, steps, units), dtype=np.float32) if return_sequences else None
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent_kernel
+            gates = recurrent_act(z)
+            c = gates[:, units:2 * units] * c + gates[:, :units] * act(z[:, 2 * units:3 * units])
+            h = gates[:, 3 * units:] * act(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if return_sequences else h
+
+
+def export_model(model, path: str, quantization: str = "float32") -> LiteModel:
+    """
+    Convert a Keras model (or a path to a saved one) and write it to ``path``.
+
+    Returns:
+        LiteModel: The exported model, as it will be served after loading
+    """
+    if isinstance(model, str):
+        import tensorflow as tf
+        model = tf.keras.models.load_model(model)
+    LiteModel.from_keras(model).save(path, quantization)
+    return LiteModel.load(path)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help="Saved Keras model (SavedModel directory, .h5 or .keras)")
+    parser.add_argument("output", help="Output .npz path")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="float32", help="Weight storage type")
+    args = parser.parse_args(argv)
+    lite = export_model(args.model, args.output, args.quantization)
+    print(f"Exported {len(lite.layers)} layers, input {lite.input_shape}, output {lite.output_shape}, "
+          f"{args.quantization} weights to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,27 @@
-from fastapi import FastAPI, HTTPException, Request
+import time
+_import_started_at = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
-import tensorflow as tf
+from typing import Optional
 import numpy as np
 import uvicorn
-import aioredis
+import asyncio
 import os
 import logging
 
+# TensorFlow and aioredis are imported lazily in the startup tasks so the
+# process can answer /health before the heavy imports finish
+from inference import InferenceScheduler, QueueFullError
+from cache import PredictionCache
+from metrics import StageTimer
+import metrics
+from registry import ModelRegistry
+from streaming import LSTMStepper, PriceStream
+from preprocessing import normalize_windows, denormalize_windows, sliding_windows, summarize_samples
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ai-service")
@@ -16,10 +30,27 @@ logger = logging.getLogger("ai-service")
 class PredictionRequest(BaseModel):
     historical_prices: list[float] = Field(..., description="Historical Pi prices for the sequence")
     sequence_length: int = Field(..., gt=0, description="Sequence length for LSTM model")
+    horizon: int = Field(1, gt=0, description="Number of future prices to forecast")
+    uncertainty: bool = Field(False, description="Estimate confidence and interval with Monte Carlo dropout")
 
 class PredictionResponse(BaseModel):
     predicted_price: float
+    forecast: list[float]
+    confidence: float
+    model_version: str
+    lower: Optional[list[float]] = None
+    upper: Optional[list[float]] = None
+
+class BatchPredictionRequest(BaseModel):
+    sequence_length: int = Field(..., gt=0, description="Sequence length for LSTM model")
+    windows: Optional[list[list[float]]] = Field(None, description="Price windows, each of sequence_length prices")
+    series: Optional[list[float]] = Field(None, description="One long price series to slide a window over")
+    stride: int = Field(1, gt=0, description="Offset between consecutive windows taken from series")
+
+class BatchPredictionResponse(BaseModel):
+    predicted_prices: list[float]
     confidence: float
+    model_version: str
 
 app = FastAPI(title="Pi Price Prediction AI Service",
               description="Provides Pi Network price prediction using LSTM neural network",
@@ -37,85 +68,463 @@ app.add_middleware(
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 redis = None
 
-model = None
+registry = None
+prediction_cache = None
 
-@app.on_event("startup")
-async def startup_event():
+# Model registry: with MODEL_DIR set, every entry in it is a model version that is
+# loaded, warmed and swapped in without a restart; otherwise MODEL_PATH is served
+MODEL_PATH = os.getenv("MODEL_PATH", "backend/ai-service/src/lstm_model")
+MODEL_DIR = os.getenv("MODEL_DIR", "")
+MODEL_POLL_INTERVAL = float(os.getenv("MODEL_POLL_INTERVAL", "5"))
+# Files changed more recently than this are assumed to be still copying
+MODEL_SETTLE_SECONDS = float(os.getenv("MODEL_SETTLE_SECONDS", "2"))
+
+# Two-tier prediction cache: in-process LRU (tier 1) in front of Redis (tier 2)
+LOCAL_CACHE_SIZE = int(os.getenv("LOCAL_CACHE_SIZE", "10000"))
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", "60"))
+REDIS_CACHE_TTL = int(os.getenv("REDIS_CACHE_TTL", "600"))
+# "raw" keys on the exact window; "normalized" keys on the quantized min-max normalized
+# window so affinely rescaled windows share one cached (normalized) prediction
+CACHE_KEY_MODE = os.getenv("CACHE_KEY_MODE", "raw")
+CACHE_KEY_PRECISION = int(os.getenv("CACHE_KEY_PRECISION", "4"))
+
+# Serving path: "compiled" (warmed tf.function per sequence length), "keras" (model.predict)
+# or "numpy" (LiteModel in NumPy; with exported .npz models TensorFlow is never imported)
+SERVING_BACKEND = os.getenv("SERVING_BACKEND", "compiled")
+# Comma-separated sequence lengths to compile and warm; defaults to the model's input length
+SERVING_SEQUENCE_LENGTHS = [int(n) for n in os.getenv("SERVING_SEQUENCE_LENGTHS", "").split(",") if n.strip()]
+
+# Micro-batching window and batch size for the inference scheduler
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "2"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "32"))
+# Upper bound on windows scored by a single /predict/batch call
+MAX_BATCH_WINDOWS = int(os.getenv("MAX_BATCH_WINDOWS", "4096"))
+# Upper bound on the forecast horizon of a single /predict call
+MAX_FORECAST_HORIZON = int(os.getenv("MAX_FORECAST_HORIZON", "365"))
+# Monte Carlo dropout samples (K) per uncertainty request, run as one batched pass;
+# 0 disables uncertainty mode. MC_CONFIDENCE_LEVEL is the coverage of lower/upper
+MC_DROPOUT_SAMPLES = int(os.getenv("MC_DROPOUT_SAMPLES", "32"))
+MC_CONFIDENCE_LEVEL = float(os.getenv("MC_CONFIDENCE_LEVEL", "0.95"))
+
+# Pre-forked worker processes; each loads its own copy of the model once
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Inference threads per worker, by default the cores divided among the workers
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))))
+# Queued plus in-flight samples per model version before requests are rejected with 503
+INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "1024"))
+
+# "lazy": start serving /health at once and load the model in the background (/ready
+# reports when it is warmed); "eager": block startup until the model is loaded
+STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy")
+# Seconds between Redis connection attempts; predictions use the in-process cache meanwhile
+REDIS_RETRY_SECONDS = float(os.getenv("REDIS_RETRY_SECONDS", "5"))
+
+# Streaming predictions: re-anchor normalization when a price leaves the anchor range by
+# more than this fraction of it, and at least every STREAM_MAX_STEPS ticks (0: sequence_length)
+STREAM_REANCHOR_TOLERANCE = float(os.getenv("STREAM_REANCHOR_TOLERANCE", "0.1"))
+STREAM_MAX_STEPS = int(os.getenv("STREAM_MAX_STEPS", "0"))
+
+# Add a Server-Timing header with per-stage durations to prediction responses
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Per-phase startup durations in milliseconds, reported by /ready
+startup_timings = {"app_import_ms": (time.perf_counter() - _import_started_at) * 1000.0}
+startup_error = None
+startup_tasks = set()
+
+
+def record_phase(name: str, started_at: float):
+    startup_timings[f"{name}_ms"] = (time.perf_counter() - started_at) * 1000.0
+    logger.info(f"Startup phase '{name}' took {startup_timings[f'{name}_ms']:.0f}ms")
+
+
+def import_serving_stack():
+    if SERVING_BACKEND != "numpy":
+        import tensorflow  # noqa: F401
+    import serving  # noqa: F401
+
+
+def load_serving_model(path: str):
+    if path.endswith(".npz"):
+        from lite import LiteModel
+        return LiteModel.load(path)
+    if SERVING_BACKEND == "numpy":
+        logger.warning(f"Converting Keras model {path} for the numpy backend; export it with lite.py "
+                       f"to serve without TensorFlow")
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+def create_serving_engine(loaded_model):
+    from serving import create_engine
+    return create_engine(SERVING_BACKEND, loaded_model, SERVING_SEQUENCE_LENGTHS)
+
+
+async def connect_redis():
+    """
+    Connect to Redis, retrying in the background until it succeeds. Until then
+    the prediction cache runs on its in-process tier only.
+    """
     global redis
-    global model
-    # Initialize Redis connection
+    started_at = time.perf_counter()
     try:
-        redis = await aioredis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
-        logger.info(f"Connected to Redis at {REDIS_URL}")
+        import aioredis
     except Exception as e:
-        logger.error(f"Failed to connect to Redis: {str(e)}")
-        raise e
+        logger.error(f"Redis client unavailable, running without the Redis cache tier: {str(e)}")
+        return
+    while True:
+        try:
+            client = await aioredis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+            await client.ping()
+            redis = client
+            prediction_cache.redis = client
+            logger.info(f"Connected to Redis at {REDIS_URL}")
+            record_phase("redis_connect", started_at)
+            return
+        except Exception as e:
+            logger.warning(f"Failed to connect to Redis: {str(e)}, retrying in {REDIS_RETRY_SECONDS}s")
+            await asyncio.sleep(REDIS_RETRY_SECONDS)
 
-    # Load LSTM model from saved file - adjust path as needed
+
+async def load_models():
+    """
+    Import the serving stack (TensorFlow unless SERVING_BACKEND is numpy), then
+    load and warm the model versions.
+    """
+    global startup_error
     try:
-        model_path = os.getenv("MODEL_PATH", "backend/ai-service/src/lstm_model")
-        model = tf.keras.models.load_model(model_path)
-        logger.info(f"LSTM model loaded from {model_path}")
+        started_at = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, import_serving_stack)
+        record_phase("serving_import" if SERVING_BACKEND == "numpy" else "tensorflow_import", started_at)
+
+        if MODEL_DIR:
+            await registry.refresh(settle=False)
+            if not registry.ready:
+                logger.warning(f"No model versions found in {MODEL_DIR}, waiting for one to appear")
+            registry.start()
+        else:
+            await registry.load(MODEL_PATH, prediction_cache.model_version)
+        startup_timings["model_load_ms"] = sum(loaded.load_ms for loaded in registry.versions)
+        startup_timings["warmup_ms"] = sum(loaded.warmup_ms for loaded in registry.versions)
+        startup_timings["ready_ms"] = (time.perf_counter() - _import_started_at) * 1000.0
+        logger.info(f"Serving model versions {registry.active_versions()} with '{SERVING_BACKEND}' engine "
+                    f"(window={BATCH_WINDOW_MS}ms, max_batch={MAX_BATCH_SIZE}, "
+                    f"threads={INFERENCE_THREADS}, queue_limit={INFERENCE_QUEUE_LIMIT}), "
+                    f"startup timings {startup_timings}")
     except Exception as e:
+        startup_error = str(e)
         logger.error(f"Failed to load model: {str(e)}")
         raise e
 
 
+def run_in_background(coro):
+    task = asyncio.get_running_loop().create_task(coro)
+    # Keep a reference until done; errors are already logged by the coroutine
+    startup_tasks.add(task)
+    task.add_done_callback(startup_tasks.discard)
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+@app.on_event("startup")
+async def startup_event():
+    global registry
+    global prediction_cache
+    global startup_error
+    startup_error = None
+    # Cache keys carry the serving model version so a new model never serves stale predictions
+    model_version = os.getenv("MODEL_VERSION", os.path.basename(os.path.normpath(MODEL_PATH)))
+    prediction_cache = PredictionCache(None, model_version,
+                                       local_max_entries=LOCAL_CACHE_SIZE,
+                                       local_ttl_seconds=LOCAL_CACHE_TTL,
+                                       redis_ttl_seconds=REDIS_CACHE_TTL,
+                                       key_mode=CACHE_KEY_MODE,
+                                       key_precision=CACHE_KEY_PRECISION,
+                                       observer=metrics.record_cache_lookup)
+    # Redis is optional at boot: it is attached to the cache once connected
+    run_in_background(connect_redis())
+
+    # Each version gets an engine compiled and warmed before it goes live, and a
+    # micro-batching scheduler on the shared inference thread pool
+    registry = ModelRegistry(
+        MODEL_DIR or None,
+        load_model=load_serving_model,
+        create_engine=create_serving_engine,
+        create_scheduler=lambda engine, executor: InferenceScheduler(engine.predict,
+                                                                     max_batch_size=MAX_BATCH_SIZE,
+                                                                     batch_window_ms=BATCH_WINDOW_MS,
+                                                                     executor=executor,
+                                                                     max_queue=INFERENCE_QUEUE_LIMIT,
+                                                                     on_batch=metrics.record_batch,
+                                                                     forecast_fn=engine.forecast),
+        poll_interval=MODEL_POLL_INTERVAL,
+        settle_seconds=MODEL_SETTLE_SECONDS,
+        inference_threads=INFERENCE_THREADS,
+        on_swap=metrics.set_active_models)
+
+    if STARTUP_MODE == "eager":
+        await load_models()
+    else:
+        run_in_background(load_models())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(startup_tasks):
+        task.cancel()
+    if registry is not None:
+        await registry.close()
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started_at = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so unknown paths do not create new series
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        metrics.record_request(endpoint, status, time.perf_counter() - started_at)
+
+
+def add_server_timing(response: Response, timer: StageTimer):
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = timer.server_timing()
+
+
+def serving_model(sequence_length: int):
+    """
+    Resolve the model version for a request once, so a concurrent swap cannot
+    change the model halfway through it.
+    """
+    serving = registry.resolve(sequence_length) if registry is not None else None
+    if serving is None:
+        raise HTTPException(status_code=503, detail=f"No model loaded for sequence_length {sequence_length}.")
+    return serving
+
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_price(request: PredictionRequest):
+async def predict_price(request: PredictionRequest, response: Response):
     """
     Predict Pi price based on historical prices using LSTM model.
     The request should contain a sequence of historical prices.
+    With horizon > 1 the whole forecast is computed in one inference call.
+    With uncertainty set, MC_DROPOUT_SAMPLES dropout-active forecasts are drawn in
+    one batched pass; their mean is returned with a confidence interval.
     Result is cached for speed.
     """
+    timer = StageTimer("/predict")
     # Validate length of historical_prices matches sequence_length
-    if len(request.historical_prices) != request.sequence_length:
-        raise HTTPException(status_code=400, detail="Length of historical_prices does not match sequence_length.")
+    with timer.stage("validation"):
+        if len(request.historical_prices) != request.sequence_length:
+            raise HTTPException(status_code=400, detail="Length of historical_prices does not match sequence_length.")
+        if request.horizon > MAX_FORECAST_HORIZON:
+            raise HTTPException(status_code=400, detail=f"horizon must be at most {MAX_FORECAST_HORIZON}.")
+        if request.uncertainty and MC_DROPOUT_SAMPLES < 2:
+            raise HTTPException(status_code=400, detail="Uncertainty mode is disabled (MC_DROPOUT_SAMPLES < 2).")
+        samples = MC_DROPOUT_SAMPLES if request.uncertainty else 0
+        serving = serving_model(request.sequence_length)
 
-    # Create a key for caching
-    cache_key = f"pi_pred:{','.join(map(str, request.historical_prices))}"
+    # Normalize input sequence - simple min-max scaling between 0 and 1 for demo
+    with timer.stage("normalization"):
+        prices = np.array(request.historical_prices, dtype=np.float32)
+        norm_prices, min_prices, max_prices = normalize_windows(prices[None, :])
+        min_price, max_price = min_prices[0], max_prices[0]
 
-    # Try to retrieve cached prediction
-    cached = await redis.get(cache_key)
+    # Create a compact key for caching from the raw or normalized window, then try
+    # to retrieve a cached prediction (in-process LRU first, then Redis)
+    with timer.stage("cache_lookup"):
+        cache_key = prediction_cache.make_key(prices, norm_prices[0], serving.cache_identity,
+                                              request.horizon, samples)
+        cached = await prediction_cache.get(cache_key)
     if cached:
-        predicted_price, confidence = map(float, cached.split(","))
-        return PredictionResponse(predicted_price=predicted_price, confidence=confidence)
+        value, confidence, *interval = cached
 
-    # Normalize input sequence - simple min-max scaling between 0 and 1 for demo
-    prices = np.array(request.historical_prices, dtype=np.float32)
-    min_price = np.min(prices)
-    max_price = np.max(prices)
-    if max_price == min_price:
-        norm_prices = np.zeros_like(prices)
+        def to_prices(stored):
+            return np.atleast_1d(prediction_cache.price_from(stored, min_price, max_price)).tolist()
+
+        forecast = to_prices(value)
+        lower, upper = map(to_prices, interval[0]) if interval else (None, None)
+        add_server_timing(response, timer)
+        return PredictionResponse(predicted_price=forecast[0], forecast=forecast, confidence=confidence,
+                                  model_version=serving.version, lower=lower, upper=upper)
+
+    # Prepare input for LSTM (seq_length, features=1); the scheduler adds the batch axis
+    input_seq = norm_prices.reshape((request.sequence_length, 1))
+
+    with timer.stage("mc_inference" if samples else "inference"):
+        try:
+            pred_norm = await serving.scheduler.submit(input_seq, request.horizon, samples)
+        except QueueFullError:
+            raise HTTPException(status_code=503, detail="Inference queue is full, retry later.",
+                                headers={"Retry-After": "1"})
+        except Exception as e:
+            logger.error(f"Model prediction error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Model inference failed")
+
+    if samples:
+        # Mean and interval over the K samples; confidence shrinks as the interval
+        # widens relative to the window's price range
+        metrics.record_mc_overhead(samples, serving.engine.sample_latency.latest(),
+                                   serving.engine.latency.percentile(50))
+        pred_norm_vals, lower_norm, upper_norm, confidence = summarize_samples(
+            np.asarray(pred_norm, dtype=np.float64), MC_CONFIDENCE_LEVEL)
+        confidence = float(confidence)
     else:
-        norm_prices = (prices - min_price) / (max_price - min_price)
+        pred_norm_vals = np.asarray(pred_norm[:request.horizon], dtype=np.float64)
+        # Fixed confidence unless uncertainty mode is requested
+        confidence = 0.95
+
+    # Denormalize prediction
+    forecast = pred_norm_vals * (max_price - min_price) + min_price
+    lower = upper = None
+    value = (prediction_cache.value_for(pred_norm_vals, forecast), confidence)
+    if samples:
+        lower = lower_norm * (max_price - min_price) + min_price
+        upper = upper_norm * (max_price - min_price) + min_price
+        value += ((prediction_cache.value_for(lower_norm, lower), prediction_cache.value_for(upper_norm, upper)),)
+        lower, upper = lower.tolist(), upper.tolist()
+
+    # Cache result locally and in Redis (REDIS_CACHE_TTL, 10 minutes by default)
+    with timer.stage("cache_write"):
+        await prediction_cache.set(cache_key, value)
+
+    add_server_timing(response, timer)
+    return PredictionResponse(predicted_price=forecast[0], forecast=forecast.tolist(), confidence=confidence,
+                              model_version=serving.version, lower=lower, upper=upper)
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_price_batch(request: BatchPredictionRequest, response: Response):
+    """
+    Predict Pi prices for many windows with a single model call.
+    Accepts either a list of windows or one long series plus a stride.
+    Each window is min-max scaled independently, exactly as in /predict.
+    """
+    timer = StageTimer("/predict/batch")
+    with timer.stage("validation"):
+        if (request.windows is None) == (request.series is None):
+            raise HTTPException(status_code=400, detail="Provide exactly one of windows or series.")
+
+        if request.windows is not None:
+            if any(len(window) != request.sequence_length for window in request.windows):
+                raise HTTPException(status_code=400, detail="Every window must contain sequence_length prices.")
+            windows = np.array(request.windows, dtype=np.float32).reshape(-1, request.sequence_length)
+        else:
+            if len(request.series) < request.sequence_length:
+                raise HTTPException(status_code=400, detail="Series is shorter than sequence_length.")
+            windows = sliding_windows(np.array(request.series, dtype=np.float32),
+                                      request.sequence_length, request.stride)
 
-    # Prepare input for LSTM (batch_size=1, seq_length, features=1)
-    input_seq = norm_prices.reshape((1, request.sequence_length, 1))
+        serving = serving_model(request.sequence_length)
+        if len(windows) > MAX_BATCH_WINDOWS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_WINDOWS} windows per request.")
+    if len(windows) == 0:
+        return BatchPredictionResponse(predicted_prices=[], confidence=0.95, model_version=serving.version)
 
+    # Normalize all windows at once, shape (num_windows, seq_length)
+    with timer.stage("normalization"):
+        norm_windows, min_prices, max_prices = normalize_windows(windows)
+
+    with timer.stage("inference"):
+        try:
+            pred_norm = await serving.scheduler.run(norm_windows[:, :, None])
+        except QueueFullError:
+            raise HTTPException(status_code=503, detail="Inference queue is full, retry later.",
+                                headers={"Retry-After": "1"})
+        except Exception as e:
+            logger.error(f"Batch model prediction error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Model inference failed")
+
+    predicted_prices = denormalize_windows(np.asarray(pred_norm)[:, 0], min_prices, max_prices)
+    add_server_timing(response, timer)
+    return BatchPredictionResponse(predicted_prices=predicted_prices.tolist(), confidence=0.95,
+                                   model_version=serving.version)
+
+# Stateful per-tick predictions over a WebSocket
+@app.websocket("/predict/stream")
+async def predict_stream(websocket: WebSocket, sequence_length: int):
+    """
+    Per-tick predictions for a live price stream.
+    Send {"price": p} or {"prices": [...]} messages; every price is answered with the
+    next-price prediction, computed by advancing the stream's LSTM state one step.
+    See streaming.py for the re-anchoring policy.
+    """
+    await websocket.accept()
+    serving = registry.resolve(sequence_length) if registry is not None and sequence_length > 0 else None
+    if serving is None:
+        await websocket.close(code=1013, reason=f"No model loaded for sequence_length {sequence_length}")
+        return
     try:
-        pred_norm = model.predict(input_seq)
-        pred_norm_val = float(pred_norm[0, 0])
-    except Exception as e:
-        logger.error(f"Model prediction error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Model inference failed")
+        if serving.stepper is None:
+            serving.stepper = LSTMStepper(serving.model)
+    except ValueError as e:
+        logger.error(f"Streaming unavailable for model version '{serving.version}': {str(e)}")
+        await websocket.close(code=1011, reason="Streaming is not supported by this model")
+        return
 
-    # Denormalize prediction
-    predicted_price = pred_norm_val * (max_price - min_price) + min_price
+    stream = PriceStream(serving.stepper, sequence_length, STREAM_REANCHOR_TOLERANCE, STREAM_MAX_STEPS or None)
+    try:
+        while True:
+            message = await websocket.receive_json()
+            prices = message.get("prices", [message.get("price")]) if isinstance(message, dict) else None
+            if not isinstance(prices, list):
+                prices = [None]
+            for price in prices:
+                if not isinstance(price, (int, float)) or isinstance(price, bool) or not price > 0:
+                    await websocket.send_json({"error": "Every price must be a positive number."})
+                    continue
+                predicted_price, reanchored = stream.push(price)
+                if predicted_price is not None:
+                    metrics.record_stream_tick(reanchored)
+                await websocket.send_json({"predicted_price": predicted_price, "reanchored": reanchored,
+                                           "model_version": serving.version})
+    except WebSocketDisconnect:
+        logger.info(f"Price stream closed after {stream.ticks} ticks ({stream.reanchors} re-anchors)")
 
-    # Dummy confidence for demo (in real cases, would be derived from model uncertainty)
-    confidence = 0.95
+# Model registry and per-version inference statistics (queue depth, batch sizes, wait times)
+@app.get("/stats/inference")
+async def inference_stats():
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Model registry not started")
+    return registry.stats()
 
-    # Cache result for 10 minutes (600 seconds)
-    await redis.set(cache_key, f"{predicted_price},{confidence}", ex=600)
+# Prediction cache statistics per tier
+@app.get("/stats/cache")
+async def cache_stats():
+    if prediction_cache is None:
+        raise HTTPException(status_code=503, detail="Prediction cache not initialized")
+    return prediction_cache.stats()
 
-    return PredictionResponse(predicted_price=predicted_price, confidence=confidence)
+# Prometheus metrics: stage latencies, request/error counts, cache outcomes, batch sizes, model versions
+@app.get("/metrics")
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
-# Health check endpoint
+# Liveness: answers as soon as the process is up, before the model is loaded
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
 
+# Readiness: 200 once a model version is loaded and warmed, 503 until then
+@app.get("/ready")
+async def ready():
+    is_ready = registry is not None and registry.ready
+    body = {
+        "status": "ready" if is_ready else ("failed" if startup_error else "starting"),
+        "models": registry.active_versions() if registry is not None else {},
+        "redis_connected": redis is not None,
+        "startup": startup_timings,
+    }
+    if startup_error:
+        body["error"] = startup_error
+    return JSONResponse(status_code=200 if is_ready else 503, content=body)
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Set UVICORN_RELOAD=1 for local development; reload implies a single worker
+    reload = os.getenv("UVICORN_RELOAD", "0") == "1"
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=reload,
+                workers=1 if reload else WEB_CONCURRENCY)
 
@@ -0,0 +1,132 @@
+"""
+metrics.py
+
+Prometheus metrics for the AI service.
+
+Features:
+- Per-stage latency histograms for the prediction endpoints (validation,
+  normalization, cache lookup, inference, cache write).
+- Request counts and latency per endpoint and status code, for error rates.
+- Cache lookup outcomes per tier, inference batch sizes and batch latency.
+- Active model version per sequence length.
+- Streaming ticks, split by whether the stream re-anchored.
+- Monte Carlo dropout latency overhead relative to a deterministic forward pass.
+- Server-Timing header values with the stage durations of one request.
+- Multi-worker aggregation when PROMETHEUS_MULTIPROC_DIR is set.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+# Sub-millisecond resolution for cache and normalization stages, up to seconds for inference
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+OVERHEAD_BUCKETS = (1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0, 34.0, 55.0, 89.0)
+
+STAGE_SECONDS = Histogram("ai_predict_stage_seconds", "Time spent in each stage of a prediction request",
+                          ["endpoint", "stage"], buckets=LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram("ai_request_seconds", "End-to-end request latency", ["endpoint"],
+                            buckets=LATENCY_BUCKETS)
+REQUESTS = Counter("ai_requests_total", "Requests by endpoint and status code", ["endpoint", "status"])
+CACHE_LOOKUPS = Counter("ai_cache_lookups_total", "Prediction cache lookups by tier and outcome",
+                        ["tier", "result"])
+BATCH_SIZE = Histogram("ai_inference_batch_size", "Samples per model forward pass", buckets=BATCH_SIZE_BUCKETS)
+BATCH_SECONDS = Histogram("ai_inference_batch_seconds", "Model forward pass latency, including executor queueing",
+                          buckets=LATENCY_BUCKETS)
+STREAM_TICKS = Counter("ai_stream_ticks_total", "Predictions made by /predict/stream", ["reanchored"])
+MC_OVERHEAD = Histogram("ai_mc_dropout_overhead_ratio",
+                        "Monte Carlo dropout forward pass time over the p50 deterministic forward pass",
+                        ["samples"], buckets=OVERHEAD_BUCKETS)
+MODEL_ACTIVE = Gauge("ai_model_active", "1 for the model version serving a sequence length, 0 once replaced",
+                     ["sequence_length", "version"], multiprocess_mode="liveall")
+
+_active_labels = set()
+
+
+class StageTimer:
+    """
+    Times the stages of one request into STAGE_SECONDS and keeps the durations
+    for a Server-Timing header.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.durations[name] = elapsed
+            STAGE_SECONDS.labels(self.endpoint, name).observe(elapsed)
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000.0:.3f}" for name, seconds in self.durations.items())
+
+
+def record_request(endpoint: str, status: int, seconds: float):
+    REQUESTS.labels(endpoint, str(status)).inc()
+    REQUEST_SECONDS.labels(endpoint).observe(seconds)
+
+
+def record_cache_lookup(tier: str, result: str):
+    CACHE_LOOKUPS.labels(tier, result).inc()
+
+
+def record_batch(size: int, seconds: float):
+    BATCH_SIZE.observe(size)
+    BATCH_SECONDS.observe(seconds)
+
+
+def record_stream_tick(reanchored: bool):
+    STREAM_TICKS.labels("true" if reanchored else "false").inc()
+
+
+def record_mc_overhead(samples: int, sampled_ms: float, baseline_ms: float):
+    """
+    Record how much slower a K-sample forward pass was than a plain forward pass.
+
+    Both times are engine forward passes, so queueing and batching waits are excluded.
+
+    Args:
+        samples (int): Monte Carlo samples per window
+        sampled_ms (float): Engine time of the Monte Carlo dropout forward pass
+        baseline_ms (float): Typical deterministic forward pass; nothing is recorded while unknown
+    """
+    if sampled_ms > 0 and baseline_ms > 0:
+        MC_OVERHEAD.labels(str(samples)).observe(sampled_ms / baseline_ms)
+
+
+def set_active_models(active: dict):
+    """
+    Publish the active version per sequence length; replaced versions drop to 0.
+    """
+    labels = {(str(seq_length), version) for seq_length, version in active.items()}
+    for seq_length, version in _active_labels - labels:
+        MODEL_ACTIVE.labels(seq_length, version).set(0)
+    for seq_length, version in labels:
+        MODEL_ACTIVE.labels(seq_length, version).set(1)
+    _active_labels.clear()
+    _active_labels.update(labels)
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Serialize all metrics in the Prometheus text format.
+
+    Returns:
+        (body, content_type)
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -5,8 +5,10 @@ Contains LSTM model architecture and training functions for Pi price prediction.
 
 Features:
 - Configurable LSTM model with multiple layers.
+- Multi-step forecast head predicting ``horizon`` future prices per window.
 - Advanced preprocessing utilities.
 - Training loop with early stopping.
+- Streaming tf.data training with throughput and input-stall reporting.
 - Model saving and loading utilities.
 """
 
@@ -16,11 +18,22 @@ from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 import numpy as np
 import os
+import time
+import logging
+import tempfile
+from typing import Optional
+
+from preprocessing import window_count, window_views
+
+logger = logging.getLogger("ai-service-model")
 
 class PiPriceLSTM:
     def __init__(self, sequence_length: int, feature_dim: int = 1, lstm_units: int = 100,
-                 dropout_rate: float = 0.2, model_dir: str = "model"):
+                 dropout_rate: float = 0.2, model_dir: str = "model", horizon: int = 1):
+        if horizon < 1:
+            raise ValueError("horizon must be at least 1")
         self.sequence_length = sequence_length
+        self.horizon = horizon
         self.feature_dim = feature_dim
         self.lstm_units = lstm_units
         self.dropout_rate = dropout_rate
@@ -33,7 +46,7 @@ class PiPriceLSTM:
             Dropout(self.dropout_rate),
             LSTM(self.lstm_units // 2),
             Dropout(self.dropout_rate),
-            Dense(1, activation='linear')
+            Dense(self.horizon, activation='linear')
         ])
         model.compile(optimizer='adam', loss='mse', metrics=['mae'])
         return model
@@ -46,7 +59,8 @@ class PiPriceLSTM:
 
         Args:
             X_train (np.ndarray): Training feature data shape (samples, sequence_length, features)
-            y_train (np.ndarray): Training labels shape (samples,)
+            y_train (np.ndarray): Training labels shape (samples,), or (samples, horizon)
+                as returned by create_sequences with the model's horizon
             X_val (np.ndarray): Validation feature data
             y_val (np.ndarray): Validation labels
             batch_size (int): Batch size for training
@@ -72,6 +86,117 @@ class PiPriceLSTM:
         )
         return history
 
+    def train_stream(self, source, val_fraction: float = 0.2, batch_size: int = 64,
+                     epochs: int = 100, patience: int = 10, stride: int = 1,
+                     shuffle_buffer: int = 10000, cache: Optional[str] = "disk",
+                     normalize: bool = True):
+        """
+        Train from a price series through a streaming tf.data pipeline.
+
+        Windows are gathered lazily from the series, cached, shuffled, batched and
+        prefetched so preprocessing overlaps with training. Each epoch reports
+        samples/sec and the time spent waiting on the input pipeline, which are
+        also recorded in the returned History as 'samples_per_sec' and
+        'input_stall_seconds'.
+
+        Args:
+            source: 1D price array, or a PiPriceDataManager with loaded data
+            val_fraction (float): Trailing fraction of the series used for validation
+            batch_size (int): Batch size for training
+            epochs (int): Maximum number of epochs
+            patience (int): Number of epochs with no improvement to stop training
+            stride (int): Offset between the starts of consecutive windows
+            shuffle_buffer (int): Number of windows in the shuffle buffer
+            cache (str): "disk" caches windows in a temporary file under model_dir,
+                "memory" caches them in RAM, None gathers them afresh every epoch
+            normalize (bool): Min-max scale the whole series before windowing
+
+        Returns:
+            History object with per-epoch losses and pipeline statistics
+        """
+        series = self._series_from(source)
+        if normalize:
+            series, _, _ = normalize_data(series)
+        split = int(len(series) * (1 - val_fraction))
+        # The validation tail starts sequence_length steps early so its first window ends at the split
+        val_windows = window_count(len(series) - split + self.sequence_length, self.sequence_length, 1, self.horizon)
+        if window_count(split, self.sequence_length, stride, self.horizon) == 0 or val_windows == 0:
+            raise ValueError("Series too short for the requested sequence length and validation split")
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        checkpoint_path = os.path.join(self.model_dir, "pi_price_lstm_best.h5")
+        early_stopping = EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)
+        checkpoint = ModelCheckpoint(checkpoint_path, monitor='val_loss', save_best_only=True, verbose=1)
+        callbacks = tf.keras.callbacks.CallbackList([early_stopping, checkpoint], add_history=True,
+                                                    model=self.model, epochs=epochs, verbose=0)
+
+        with tempfile.TemporaryDirectory(dir=self.model_dir) as cache_dir:
+            def cache_for(name):
+                if cache == "disk":
+                    return os.path.join(cache_dir, name)
+                if cache == "memory":
+                    return ""
+                return None
+
+            train_ds = self._stream_dataset(series[:split], batch_size, stride, shuffle_buffer, cache_for("train"))
+            val_ds = self._stream_dataset(series[split - self.sequence_length:], batch_size, 1, 0, cache_for("val"))
+
+            train_step = tf.function(self.model.train_step)
+            test_step = tf.function(self.model.test_step)
+            self.model.stop_training = False
+            callbacks.on_train_begin()
+            for epoch in range(epochs):
+                self.model.reset_metrics()
+                callbacks.on_epoch_begin(epoch)
+                samples, stall = 0, 0.0
+                started_at = time.perf_counter()
+                iterator = iter(train_ds)
+                while True:
+                    wait_start = time.perf_counter()
+                    try:
+                        x, y = next(iterator)
+                    except StopIteration:
+                        break
+                    stall += time.perf_counter() - wait_start
+                    logs = train_step((x, y))
+                    samples += int(x.shape[0])
+                elapsed = time.perf_counter() - started_at
+
+                epoch_logs = {name: float(value) for name, value in logs.items()}
+                self.model.reset_metrics()
+                for x, y in val_ds:
+                    val_logs = test_step((x, y))
+                epoch_logs.update({f"val_{name}": float(value) for name, value in val_logs.items()})
+                epoch_logs["samples_per_sec"] = samples / elapsed if elapsed > 0 else 0.0
+                epoch_logs["input_stall_seconds"] = stall
+                logger.info(f"Epoch {epoch + 1}/{epochs}: loss={epoch_logs['loss']:.5f} "
+                            f"val_loss={epoch_logs['val_loss']:.5f} "
+                            f"{epoch_logs['samples_per_sec']:.0f} samples/s, "
+                            f"input stall {stall:.3f}s of {elapsed:.3f}s")
+                callbacks.on_epoch_end(epoch, epoch_logs)
+                if self.model.stop_training:
+                    break
+            callbacks.on_train_end()
+        return self.model.history
+
+    def _series_from(self, source) -> np.ndarray:
+        if hasattr(source, "get_historical_prices"):
+            if source.data is None or source.data.empty:
+                raise ValueError("Data manager has no data loaded")
+            return source.data["price"].to_numpy(dtype=np.float32)
+        return np.asarray(source, dtype=np.float32).reshape(-1)
+
+    def _stream_dataset(self, series: np.ndarray, batch_size: int, stride: int,
+                        shuffle_buffer: int, cache: Optional[str]) -> tf.data.Dataset:
+        # Gather windows in large chunks, then re-batch after cache/shuffle
+        dataset = window_dataset(series, self.sequence_length, batch_size=1024, stride=stride,
+                                 horizon=self.horizon).unbatch()
+        if cache is not None:
+            dataset = dataset.cache(cache)
+        if shuffle_buffer > 0:
+            dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
     def predict(self, X_input: np.ndarray) -> np.ndarray:
         """
         Perform prediction given input sequences
@@ -80,7 +205,7 @@ class PiPriceLSTM:
             X_input (np.ndarray): Input features shape (samples, sequence_length, features)
 
         Returns:
-            np.ndarray: Predicted price values
+            np.ndarray: Predicted price values shape (samples, horizon)
         """
         return self.model.predict(X_input)
 
@@ -121,25 +246,67 @@ def denormalize_data(normalized_data: np.ndarray, min_val: float, max_val: float
     """
     return normalized_data * (max_val - min_val) + min_val
 
-def create_sequences(data: np.ndarray, seq_length: int):
+def create_sequences(data: np.ndarray, seq_length: int, stride: int = 1, horizon: int = 1,
+                     target_col: int = 0):
+    """
+    Create overlapping sequences from price data for LSTM input.
+
+    The returned arrays are read-only strided views of ``data`` rather than copies.
+
+    Args:
+        data (np.ndarray): 1D array of price data, or 2D array (timesteps, features)
+        seq_length (int): Length of each sequence
+        stride (int): Offset between the starts of consecutive sequences
+        horizon (int): Number of future steps used as labels for each sequence
+        target_col (int): Feature column used for the labels
+
+    Returns:
+        np.ndarray: Array of shape (num_samples, seq_length, features) and labels of
+        shape (num_samples,) when horizon is 1, otherwise (num_samples, horizon)
     """
-    Create overlapping sequences from 1D data array for LSTM input.
+    return window_views(data, seq_length, stride, horizon, target_col)
+
+def window_dataset(data: np.ndarray, seq_length: int, batch_size: int = 64, stride: int = 1,
+                   horizon: int = 1, target_col: int = 0, shuffle: bool = False,
+                   seed: Optional[int] = None) -> tf.data.Dataset:
+    """
+    Build a tf.data pipeline that gathers windows lazily, one batch at a time.
+
+    Only the series itself and the window start indices are held; each batch of
+    windows is gathered on demand, so the (num_samples, seq_length, features)
+    tensor is never materialized.
 
     Args:
-        data (np.ndarray): 1D array of price data
+        data (np.ndarray): 1D array of price data, or 2D array (timesteps, features)
         seq_length (int): Length of each sequence
+        batch_size (int): Number of windows per batch
+        stride (int): Offset between the starts of consecutive sequences
+        horizon (int): Number of future steps used as labels for each sequence
+        target_col (int): Feature column used for the labels
+        shuffle (bool): Reshuffle window order on every pass
+        seed (int): Optional shuffle seed
 
     Returns:
-        np.ndarray: Array of shape (num_samples, seq_length, 1)
+        tf.data.Dataset yielding (inputs, labels) batches
     """
-    sequences = []
-    labels = []
-    for i in range(len(data) - seq_length):
-        seq = data[i:i+seq_length]
-        label = data[i+seq_length]
-        sequences.append(seq)
-        labels.append(label)
-    return np.array(sequences).reshape(-1, seq_length, 1), np.array(labels)
+    series = np.asarray(data, dtype=np.float32)
+    series = tf.constant(series[:, None] if series.ndim == 1 else series)
+    num_windows = window_count(int(series.shape[0]), seq_length, stride, horizon)
+
+    input_offsets = tf.range(seq_length, dtype=tf.int64)
+    label_offsets = tf.range(seq_length, seq_length + horizon, dtype=tf.int64)
+    target = series[:, target_col]
+
+    def gather(indices):
+        starts = indices[:, None] * stride
+        inputs = tf.gather(series, starts + input_offsets)
+        labels = tf.gather(target, starts + label_offsets)
+        return inputs, (labels[:, 0] if horizon == 1 else labels)
+
+    dataset = tf.data.Dataset.range(num_windows)
+    if shuffle:
+        dataset = dataset.shuffle(max(num_windows, 1), seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE)
 
 if __name__ == "__main__":
     # Example usage: train on dummy data for testing
@@ -0,0 +1,154 @@
+"""
+parsing.py
+
+Vectorized parsing of Pi price API responses.
+
+Features:
+- Single pass extraction of timestamp/price fields with the 'time'/'date'/'close'
+  fallbacks, followed by one vectorized datetime and numeric conversion.
+- Invalid rows dropped with masks instead of per-row exception handling.
+- Streaming mode that decodes a JSON array incrementally from byte chunks and
+  keeps only the two extracted columns, never the full decoded list.
+"""
+
+import codecs
+import json
+from typing import AsyncIterable, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def extract_columns(records: Iterable[dict]):
+    """
+    Pull raw timestamp and price values from API records.
+
+    Returns:
+        (timestamps, prices): Lists of raw values (None where missing)
+    """
+    timestamps, prices = [], []
+    for entry in records:
+        timestamps.append(entry.get("timestamp") or entry.get("time") or entry.get("date"))
+        prices.append(entry.get("price") or entry.get("close"))
+    return timestamps, prices
+
+
+def columns_to_frame(timestamps: list, prices: list) -> pd.DataFrame:
+    """
+    Convert raw timestamp/price columns to a sorted DataFrame.
+
+    Numeric timestamps are epoch seconds; other values are parsed as date strings.
+    Rows with a missing or unparseable timestamp or price are dropped.
+    """
+    raw_ts = pd.Series(timestamps, dtype=object)
+    kinds = raw_ts.map(type)
+    is_numeric = kinds.isin([int, float]).to_numpy()
+    is_text = ~is_numeric & raw_ts.notna().to_numpy()
+
+    parsed_text = pd.to_datetime(raw_ts[is_text], errors="coerce", format="mixed")
+    tz = getattr(parsed_text.dtype, "tz", None)
+    parsed = pd.Series(pd.NaT, index=raw_ts.index, dtype=parsed_text.dtype if tz else "datetime64[ns]")
+    if is_numeric.any():
+        seconds = pd.to_datetime(raw_ts[is_numeric].astype(np.float64), unit="s", errors="coerce")
+        parsed[is_numeric] = seconds.dt.tz_localize("UTC").dt.tz_convert(tz) if tz else seconds
+    parsed[is_text] = parsed_text
+
+    price = pd.to_numeric(pd.Series(prices, dtype=object), errors="coerce").astype(np.float64)
+    valid = parsed.notna() & price.notna()
+    df = pd.DataFrame({"timestamp": parsed[valid], "price": price[valid]})
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def parse_price_records(records: list) -> pd.DataFrame:
+    """
+    Parse a decoded JSON list of price records into a DataFrame.
+    """
+    return columns_to_frame(*extract_columns(records))
+
+
+class JsonArrayDecoder:
+    """
+    Incrementally decode the items of a top-level JSON array from text chunks.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self.finished = False
+
+    def feed(self, text: str) -> list:
+        """
+        Add text and return every array item completed by it.
+        """
+        self._buffer += text
+        items = []
+        pos = 0
+        buffer = self._buffer
+        while not self.finished:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not self._started:
+                if buffer[pos] != "[":
+                    raise ValueError("Unexpected API data format")
+                self._started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                self.finished = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break
+            # A scalar at the very end of the buffer may still be incomplete
+            if end == len(buffer) and not isinstance(item, (dict, list, str)):
+                break
+            items.append(item)
+            pos = end
+        self._buffer = buffer[pos:]
+        return items
+
+
+async def parse_price_stream(chunks: AsyncIterable[bytes], batch_rows: int = 50000) -> pd.DataFrame:
+    """
+    Parse a streamed JSON array of price records.
+
+    Records are decoded incrementally and reduced to their timestamp/price fields
+    in batches of ``batch_rows``, so the full decoded list is never held.
+
+    Args:
+        chunks: Async iterable of raw response bytes, e.g. response.content.iter_chunked(n)
+        batch_rows (int): Records converted per vectorized batch
+
+    Returns:
+        pd.DataFrame: Sorted timestamp/price frame
+    """
+    decoder = JsonArrayDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    frames, timestamps, prices = [], [], []
+
+    def flush():
+        if timestamps:
+            frames.append(columns_to_frame(timestamps[:], prices[:]))
+            timestamps.clear()
+            prices.clear()
+
+    async for chunk in chunks:
+        for entry in decoder.feed(text_decoder.decode(chunk)):
+            if not isinstance(entry, dict):
+                continue
+            timestamps.append(entry.get("timestamp") or entry.get("time") or entry.get("date"))
+            prices.append(entry.get("price") or entry.get("close"))
+        if len(timestamps) >= batch_rows:
+            flush()
+    decoder.feed(text_decoder.decode(b"", final=True))
+    if not decoder.finished:
+        raise ValueError("Truncated JSON array in API response")
+    flush()
+    if not frames:
+        return pd.DataFrame({"timestamp": pd.Series(dtype="datetime64[ns]"), "price": pd.Series(dtype=np.float64)})
+    return pd.concat(frames, ignore_index=True).sort_values("timestamp", kind="stable").reset_index(drop=True)
@@ -0,0 +1,159 @@
+"""
+preprocessing.py
+
+Vectorized NumPy preprocessing utilities shared by the API and training code.
+
+Features:
+- Per-window min-max normalization over a 2-D batch of windows in one pass.
+- Matching per-window denormalization of model outputs.
+- Strided sliding windows over a long price series without copying.
+- Zero-copy (inputs, labels) windowing with stride, multi-step horizon and
+  multiple feature columns, plus a lazy batch generator for training.
+- Mean and confidence interval of Monte Carlo dropout samples.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def normalize_windows(windows: np.ndarray):
+    """
+    Min-max normalize each window (row) independently to [0,1].
+
+    Windows with a constant price normalize to all zeros, matching the
+    single-window behaviour of the /predict endpoint.
+
+    Args:
+        windows (np.ndarray): Array of shape (num_windows, sequence_length)
+
+    Returns:
+        normalized_windows, min_vals, max_vals (min/max have shape (num_windows,))
+    """
+    min_vals = windows.min(axis=1)
+    max_vals = windows.max(axis=1)
+    span = (max_vals - min_vals)[:, None]
+    flat = span == 0
+    normalized = (windows - min_vals[:, None]) / np.where(flat, 1, span)
+    normalized[np.broadcast_to(flat, normalized.shape)] = 0
+    return normalized, min_vals, max_vals
+
+
+def denormalize_windows(normalized_preds: np.ndarray, min_vals: np.ndarray, max_vals: np.ndarray):
+    """
+    Restore per-window scale for normalized predictions.
+
+    Args:
+        normalized_preds (np.ndarray): Predictions of shape (num_windows,) or (num_windows, k)
+        min_vals (np.ndarray): Per-window minimum, shape (num_windows,)
+        max_vals (np.ndarray): Per-window maximum, shape (num_windows,)
+
+    Returns:
+        Denormalized predictions with the same shape as normalized_preds
+    """
+    if normalized_preds.ndim > 1:
+        min_vals = min_vals[:, None]
+        max_vals = max_vals[:, None]
+    return normalized_preds * (max_vals - min_vals) + min_vals
+
+
+def sliding_windows(series: np.ndarray, seq_length: int, stride: int = 1) -> np.ndarray:
+    """
+    Build overlapping windows over a 1-D series as a read-only strided view.
+
+    Args:
+        series (np.ndarray): 1-D price series
+        seq_length (int): Length of each window
+        stride (int): Offset between the starts of consecutive windows
+
+    Returns:
+        np.ndarray: View of shape (num_windows, seq_length)
+    """
+    if len(series) < seq_length:
+        raise ValueError("Series is shorter than the window length")
+    return np.lib.stride_tricks.sliding_window_view(series, seq_length)[::stride]
+
+
+def window_count(num_steps: int, seq_length: int, stride: int = 1, horizon: int = 1) -> int:
+    """
+    Number of complete (window, label) pairs in a series of ``num_steps`` timesteps.
+    """
+    available = num_steps - seq_length - horizon
+    return available // stride + 1 if available >= 0 else 0
+
+
+def window_views(data: np.ndarray, seq_length: int, stride: int = 1, horizon: int = 1,
+                 target_col: int = 0):
+    """
+    Build (inputs, labels) training windows as strided views of ``data``.
+
+    No window data is copied: both arrays share memory with ``data`` and are read-only.
+
+    Args:
+        data (np.ndarray): Series of shape (timesteps,) or (timesteps, features)
+        seq_length (int): Length of each input window
+        stride (int): Offset between the starts of consecutive windows
+        horizon (int): Number of future steps to predict after each window
+        target_col (int): Feature column used for the labels
+
+    Returns:
+        inputs of shape (num_windows, seq_length, features) and labels of shape
+        (num_windows,) when horizon is 1, otherwise (num_windows, horizon)
+    """
+    if seq_length < 1 or stride < 1 or horizon < 1:
+        raise ValueError("seq_length, stride and horizon must all be positive")
+    series = data[:, None] if data.ndim == 1 else data
+    num_windows = window_count(len(series), seq_length, stride, horizon)
+    if num_windows == 0:
+        return (np.empty((0, seq_length, series.shape[1]), dtype=series.dtype),
+                np.empty((0,) if horizon == 1 else (0, horizon), dtype=series.dtype))
+
+    windows = np.lib.stride_tricks.sliding_window_view(series, seq_length, axis=0)
+    inputs = windows[::stride][:num_windows].transpose(0, 2, 1)
+
+    targets = np.lib.stride_tricks.sliding_window_view(series[seq_length:, target_col], horizon)
+    labels = targets[::stride][:num_windows]
+    return inputs, (labels[:, 0] if horizon == 1 else labels)
+
+
+def iter_window_batches(data: np.ndarray, seq_length: int, batch_size: int = 64, stride: int = 1,
+                        horizon: int = 1, target_col: int = 0, shuffle: bool = False,
+                        seed: Optional[int] = None):
+    """
+    Lazily yield (inputs, labels) batches so the full window tensor is never held.
+
+    Only one batch is materialized at a time; window positions are optionally
+    shuffled once per pass.
+
+    Yields:
+        Tuples of contiguous float32 arrays (inputs, labels) for each batch
+    """
+    inputs, labels = window_views(data, seq_length, stride, horizon, target_col)
+    order = np.arange(len(inputs))
+    if shuffle:
+        np.random.default_rng(seed).shuffle(order)
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        yield inputs[idx].astype(np.float32), labels[idx].astype(np.float32)
+
+
+def summarize_samples(samples: np.ndarray, level: float = 0.95):
+    """
+    Summarize Monte Carlo forecast samples of normalized windows.
+
+    Args:
+        samples (np.ndarray): Normalized forecasts shape (..., num_samples, horizon)
+        level (float): Coverage of the central interval, e.g. 0.95
+
+    Returns:
+        mean, lower, upper with shape (..., horizon), and confidence with shape (...):
+        1 minus the mean interval width, clipped to [0, 1]. Widths are in units of
+        each window's min-max range.
+    """
+    if not 0 < level < 1:
+        raise ValueError("level must be between 0 and 1")
+    alpha = (1.0 - level) / 2.0
+    mean = samples.mean(axis=-2)
+    lower, upper = np.quantile(samples, [alpha, 1.0 - alpha], axis=-2)
+    confidence = np.clip(1.0 - (upper - lower).mean(axis=-1), 0.0, 1.0)
+    return mean, lower, upper, confidence
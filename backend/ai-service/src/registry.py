@@ -0,0 +1,278 @@
+"""
+registry.py
+
+Hot-reloadable registry of resident, versioned prediction models.
+
+Features:
+- Watches a model directory: every entry (SavedModel directory, .h5, .keras or
+  exported .npz file) is one version, named after the entry.
+- New or changed versions are loaded and warmed on a background thread, then
+  swapped in atomically between requests; in-flight requests finish on the
+  version they started with.
+- Several models stay resident at once: each sequence length is served by the
+  newest version whose model accepts it, with variable-length models as fallback.
+- Entries removed from the directory are unloaded.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger("ai-service-registry")
+
+MODEL_EXTENSIONS = (".h5", ".keras", ".npz")
+
+
+class ModelVersion:
+    """
+    One loaded model with its warmed serving engine and inference scheduler.
+    """
+
+    def __init__(self, version: str, path: str, model, engine, mtime: float):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.engine = engine
+        self.mtime = mtime
+        self.scheduler = None
+        # Built on first use by streaming clients
+        self.stepper = None
+        self.loaded_at = time.time()
+        self.load_ms = 0.0
+        self.warmup_ms = 0.0
+
+    @property
+    def cache_identity(self) -> str:
+        """
+        Version name plus checkpoint mtime (ms) for cache keys, so a version
+        overwritten in place under the same name does not serve stale entries.
+        """
+        return f"{self.version}@{self.mtime * 1000:.0f}"
+
+    @property
+    def sequence_lengths(self) -> list[int]:
+        return self.engine.sequence_lengths
+
+    @property
+    def accepts_any_length(self) -> bool:
+        input_shape = getattr(self.model, "input_shape", None)
+        return input_shape is not None and input_shape[1] is None
+
+    def stats(self) -> dict:
+        stats = {
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "sequence_lengths": self.sequence_lengths,
+            "accepts_any_length": self.accepts_any_length,
+            "engine": self.engine.stats(),
+        }
+        if self.scheduler is not None:
+            stats["scheduler"] = self.scheduler.stats()
+        return stats
+
+
+def _tree_mtime(path: str) -> float:
+    """
+    Latest modification time of a file or of anything inside a directory.
+    """
+    latest = os.path.getmtime(path)
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+    return latest
+
+
+class ModelRegistry:
+    """
+    Keeps the active model per sequence length and swaps in new versions from ``model_dir``.
+
+    Args:
+        model_dir (str): Directory to watch, or None to only serve explicitly loaded models
+        load_model (Callable): path -> model, run on the loader thread
+        create_engine (Callable): model -> serving engine, run on the loader thread
+        create_scheduler (Callable): (engine, executor) -> InferenceScheduler
+        poll_interval (float): Seconds between directory scans
+        settle_seconds (float): Minimum age of an entry's newest file before loading it,
+            so half-copied checkpoints are not picked up
+        inference_threads (int): Size of the inference thread pool shared by all versions
+        on_swap (Callable): Called with active_versions() whenever the active mapping changes
+    """
+
+    def __init__(self, model_dir: Optional[str], load_model: Callable, create_engine: Callable,
+                 create_scheduler: Callable, poll_interval: float = 5.0, settle_seconds: float = 2.0,
+                 inference_threads: int = 1, on_swap: Optional[Callable[[dict], None]] = None):
+        self.model_dir = model_dir
+        self.load_model = load_model
+        self.create_engine = create_engine
+        self.create_scheduler = create_scheduler
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.on_swap = on_swap
+        # Every scheduler shares one bounded inference pool; loading uses its own thread
+        self.executor = ThreadPoolExecutor(max_workers=inference_threads, thread_name_prefix="inference")
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        self._versions: dict[str, ModelVersion] = {}
+        self._active: dict[Optional[int], ModelVersion] = {}
+        self._attempted: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.swaps = 0
+        self.load_failures = 0
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._active)
+
+    @property
+    def versions(self) -> list[ModelVersion]:
+        return list(self._versions.values())
+
+    def resolve(self, sequence_length: int) -> Optional[ModelVersion]:
+        """
+        Return the version serving a sequence length, or None.
+
+        Callers keep the returned version for the whole request, so a swap never
+        changes the model underneath an in-flight prediction.
+        """
+        active = self._active
+        return active.get(sequence_length) or active.get(None)
+
+    async def load(self, path: str, version: Optional[str] = None) -> ModelVersion:
+        """
+        Load, warm and activate one model path outside the watched directory.
+        """
+        version = version or os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+        async with self._lock:
+            loaded = await self._load(version, path, _tree_mtime(path))
+            self._versions[version] = loaded
+            self._activate()
+        return loaded
+
+    async def refresh(self, settle: bool = True) -> list[str]:
+        """
+        Scan the model directory once, loading new or changed versions and
+        unloading removed ones.
+
+        Returns:
+            list[str]: Versions loaded by this scan
+        """
+        if self.model_dir is None:
+            return []
+        async with self._lock:
+            entries = self._scan()
+            loaded = []
+            now = time.time()
+            for version, (path, mtime) in sorted(entries.items(), key=lambda item: item[1][1]):
+                if self._attempted.get(version) == mtime:
+                    continue
+                if settle and now - mtime < self.settle_seconds:
+                    continue
+                self._attempted[version] = mtime
+                try:
+                    self._versions[version] = await self._load(version, path, mtime)
+                    loaded.append(version)
+                except Exception as e:
+                    self.load_failures += 1
+                    logger.error(f"Failed to load model version '{version}' from {path}: {e}")
+
+            for version in set(self._versions) - set(entries):
+                if self._versions[version].path.startswith(os.path.abspath(self.model_dir)):
+                    logger.info(f"Model version '{version}' removed from {self.model_dir}, unloading")
+                    del self._versions[version]
+            self._attempted = {v: m for v, m in self._attempted.items() if v in entries}
+            self._activate()
+            return loaded
+
+    def _scan(self) -> dict[str, tuple[str, float]]:
+        entries = {}
+        if not os.path.isdir(self.model_dir):
+            logger.warning(f"Model directory {self.model_dir} does not exist")
+            return entries
+        for name in os.listdir(self.model_dir):
+            if name.startswith("."):
+                continue
+            path = os.path.abspath(os.path.join(self.model_dir, name))
+            stem, extension = os.path.splitext(name)
+            if os.path.isdir(path):
+                entries[name] = (path, _tree_mtime(path))
+            elif extension in MODEL_EXTENSIONS:
+                entries[stem] = (path, os.path.getmtime(path))
+        return entries
+
+    async def _load(self, version: str, path: str, mtime: float) -> ModelVersion:
+        started_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        loaded = await loop.run_in_executor(self._loader, self._load_sync, version, path, mtime)
+        loaded.scheduler = self.create_scheduler(loaded.engine, self.executor)
+        logger.info(f"Loaded and warmed model version '{version}' from {path} for sequence lengths "
+                    f"{loaded.sequence_lengths} in {(time.perf_counter() - started_at) * 1000.0:.0f}ms")
+        return loaded
+
+    def _load_sync(self, version: str, path: str, mtime: float) -> ModelVersion:
+        started_at = time.perf_counter()
+        model = self.load_model(path)
+        engine = self.create_engine(model)
+        loaded_at = time.perf_counter()
+        engine.warmup()
+        loaded = ModelVersion(version, path, model, engine, mtime)
+        loaded.load_ms = (loaded_at - started_at) * 1000.0
+        loaded.warmup_ms = (time.perf_counter() - loaded_at) * 1000.0
+        return loaded
+
+    def _activate(self):
+        # Newer versions overwrite older ones for every length they serve
+        active: dict[Optional[int], ModelVersion] = {}
+        for loaded in sorted(self._versions.values(), key=lambda v: (v.mtime, v.version)):
+            for seq_length in loaded.sequence_lengths:
+                active[seq_length] = loaded
+            if loaded.accepts_any_length or not loaded.sequence_lengths:
+                active[None] = loaded
+        changes = {key: loaded.version for key, loaded in active.items()
+                   if self._active.get(key) is not loaded}
+        if changes:
+            self.swaps += 1
+            logger.info(f"Activated model versions {changes}")
+        # Single assignment: requests see either the old or the new mapping
+        self._active = active
+        if changes and self.on_swap is not None:
+            self.on_swap(self.active_versions())
+
+    def active_versions(self) -> dict:
+        return {("any" if key is None else key): loaded.version for key, loaded in self._active.items()}
+
+    def start(self):
+        """
+        Start polling the model directory in the background.
+        """
+        if self.model_dir is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Model directory scan failed: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._loader.shutdown(wait=False)
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "model_dir": self.model_dir,
+            "active": self.active_versions(),
+            "swaps": self.swaps,
+            "load_failures": self.load_failures,
+            "versions": {version: loaded.stats() for version, loaded in self._versions.items()},
+        }
@@ -0,0 +1,174 @@
+"""
+rollups.py
+
+Precomputed OHLC/mean rollups of Pi price ticks at a fixed or calendar bucket width.
+
+Features:
+- Full rebuild from cleaned raw ticks with linear interpolation of empty buckets.
+- Incremental update from new ticks, touching only the last bucket and the
+  buckets covered by the update.
+- Growable column buffers exposed as zero-copy DataFrames and array slices,
+  so reading the last N bars costs O(N).
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+ROLLUP_COLUMNS = ("open", "high", "low", "close", "price")
+
+
+class SeriesBuffer:
+    """
+    Growable timestamp and float64 value columns exposed as a zero-copy DataFrame.
+
+    Capacity doubles when full, so appending k rows costs O(k) amortized. Frames
+    returned by ``frame`` share memory with the buffer; the last row of an earlier
+    frame may change when a later update replaces it.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str]):
+        self.columns = tuple(columns)
+        size = len(df)
+        capacity = max(16, 2 * size)
+        self.timestamps = np.empty(capacity, dtype="datetime64[ns]")
+        self.timestamps[:size] = df["timestamp"].to_numpy(dtype="datetime64[ns]")
+        self.values = {}
+        for column in self.columns:
+            self.values[column] = np.empty(capacity, dtype=np.float64)
+            self.values[column][:size] = df[column].to_numpy(dtype=np.float64)
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def replace_tail(self, drop: int, rows: pd.DataFrame):
+        start = self.size - drop
+        end = start + len(rows)
+        if end > len(self.timestamps):
+            capacity = max(end, 2 * len(self.timestamps))
+            self.timestamps = self._grow(self.timestamps, start, capacity)
+            self.values = {column: self._grow(array, start, capacity) for column, array in self.values.items()}
+        self.timestamps[start:end] = rows["timestamp"].to_numpy(dtype="datetime64[ns]")
+        for column, array in self.values.items():
+            array[start:end] = rows[column].to_numpy(dtype=np.float64)
+        self.size = end
+
+    @staticmethod
+    def _grow(array: np.ndarray, keep: int, capacity: int) -> np.ndarray:
+        grown = np.empty(capacity, dtype=array.dtype)
+        grown[:keep] = array[:keep]
+        return grown
+
+    def frame(self, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        columns = self.columns if columns is None else columns
+        data = {"timestamp": self.timestamps[:self.size]}
+        data.update({column: self.values[column][:self.size] for column in columns})
+        return pd.DataFrame(data, copy=False)
+
+    def tail(self, count: int, column: str) -> np.ndarray:
+        start = max(0, self.size - max(count, 0))
+        return self.values[column][start:self.size]
+
+
+class Rollup:
+    """
+    OHLC plus mean ('price') bars of one bucket width, e.g. '1min', '5min', '1H', 'D', 'W' or 'M'.
+
+    Empty buckets get a linearly interpolated mean, and their open/high/low/close
+    are set to that mean. The raw sum/count and OHLC of the last bucket are kept
+    so later ticks falling into it can be merged exactly.
+    """
+
+    def __init__(self, freq: str):
+        self.freq = freq
+        self.buffer: Optional[SeriesBuffer] = None
+        self.tail_state: Optional[dict] = None
+
+    def __len__(self):
+        return len(self.buffer) if self.buffer is not None else 0
+
+    def rebuild(self, ticks: pd.DataFrame):
+        """
+        Recompute all bars from cleaned ticks sorted by timestamp.
+        """
+        resampler = ticks.set_index("timestamp")["price"].resample(self.freq)
+        agg = pd.DataFrame({
+            "open": resampler.first(), "high": resampler.max(), "low": resampler.min(),
+            "close": resampler.last(), "sum": resampler.sum(), "count": resampler.count(),
+        })
+        bars = self._finish(agg)
+        self.buffer = SeriesBuffer(bars, ROLLUP_COLUMNS)
+        self._remember_tail(agg)
+
+    def update(self, ticks: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merge ticks newer than every tick seen so far.
+
+        Returns:
+            pd.DataFrame: Rows replacing the previous last bar, followed by new bars
+        """
+        tail = self.tail_state
+        bucket = tail["bucket"]
+        # Same bucketing as rebuild, so calendar frequencies ('W', 'M') work too; fixed
+        # widths are anchored on the last bar so the bins line up with the existing ones
+        resampler = ticks.set_index("timestamp")["price"].resample(self.freq, origin=bucket)
+        agg = pd.DataFrame({
+            "open": resampler.first(), "high": resampler.max(), "low": resampler.min(),
+            "close": resampler.last(), "sum": resampler.sum(), "count": resampler.count(),
+        })
+        agg = agg[agg["count"] > 0]
+        if bucket in agg.index:
+            row = agg.loc[bucket]
+            agg.loc[bucket] = (tail["open"], max(tail["high"], row["high"]), min(tail["low"], row["low"]),
+                               row["close"], tail["sum"] + row["sum"], tail["count"] + row["count"])
+        else:
+            agg.loc[bucket] = (tail["open"], tail["high"], tail["low"], tail["close"], tail["sum"], tail["count"])
+            agg = agg.sort_index()
+
+        agg = agg.reindex(pd.date_range(bucket, agg.index[-1], freq=self.freq))
+        rows = self._finish(agg)
+        self.buffer.replace_tail(1, rows)
+        self._remember_tail(agg)
+        return rows
+
+    def _finish(self, agg: pd.DataFrame) -> pd.DataFrame:
+        price = (agg["sum"] / agg["count"]).interpolate(method="linear")
+        bars = pd.DataFrame({"timestamp": agg.index, "price": price.to_numpy()})
+        empty = ~(agg["count"].to_numpy() > 0)
+        for column in ("open", "high", "low", "close"):
+            bars[column] = np.where(empty, bars["price"], agg[column].to_numpy(dtype=np.float64))
+        return bars
+
+    def _remember_tail(self, agg: pd.DataFrame):
+        last = agg.iloc[-1]
+        self.tail_state = {"bucket": agg.index[-1], "open": float(last["open"]), "high": float(last["high"]),
+                           "low": float(last["low"]), "close": float(last["close"]),
+                           "sum": float(last["sum"]), "count": int(last["count"])}
+
+    def frame(self, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        return self.buffer.frame(columns)
+
+    def tail(self, bars: int, column: str = "price") -> np.ndarray:
+        return self.buffer.tail(bars, column)
+
+    def dump_tail(self) -> dict:
+        state = dict(self.tail_state)
+        state["bucket"] = state["bucket"].isoformat()
+        return state
+
+    def restore_tail(self, state: dict):
+        state = dict(state)
+        state["bucket"] = pd.Timestamp(state["bucket"])
+        self.tail_state = state
+
+
+def freq_nanos(freq: str) -> Optional[int]:
+    """
+    Fixed bucket width in nanoseconds, or None for calendar frequencies.
+    """
+    try:
+        return pd.tseries.frequencies.to_offset(freq).nanos
+    except ValueError:
+        return None
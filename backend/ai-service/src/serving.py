@@ -0,0 +1,284 @@
+"""
+serving.py
+
+Serving engines that wrap the loaded model for low-latency inference.
+
+Features:
+- Keras engine using model.predict (reference path).
+- NumPy engine serving exported LiteModel artifacts without importing TensorFlow.
+- Compiled engine using one tf.function per supported sequence length with a
+  fixed input signature, avoiding Keras's per-call predict-loop setup.
+- Multi-step forecasts in one call: sliced from a multi-output head, or rolled
+  out autoregressively (inside a single tf.function on the compiled engine).
+- Monte Carlo dropout: K stochastic forecasts per window, run as one batched
+  forward pass with dropout active.
+- Warmup of every signature at startup so no request pays tracing cost.
+- Per-engine latency tracking (p50/p99) to compare the paths.
+"""
+
+import logging
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from inference import LatencyStats
+from lite import LiteModel
+
+logger = logging.getLogger("ai-service-serving")
+
+SERVING_BACKENDS = ("keras", "compiled", "numpy")
+
+# Imported by the engines that need it, so the numpy backend runs without TensorFlow
+tf = None
+
+
+def _import_tensorflow():
+    global tf
+    if tf is None:
+        import tensorflow
+        tf = tensorflow
+    return tf
+
+
+def model_sequence_lengths(model) -> list[int]:
+    """
+    Return the sequence length fixed by the model's input shape, if any.
+    """
+    timesteps = model.input_shape[1]
+    return [int(timesteps)] if timesteps is not None else []
+
+
+def model_output_steps(model) -> int:
+    """
+    Return the number of future steps the model predicts per window.
+    """
+    output_shape = getattr(model, "output_shape", None)
+    return int(output_shape[-1]) if output_shape and output_shape[-1] else 1
+
+
+class ServingEngine:
+    """
+    Base class for serving engines: times every forward pass.
+    """
+
+    name = "base"
+
+    def __init__(self, model, sequence_lengths: Iterable[int], feature_dim: int = 1):
+        self.model = model
+        self.sequence_lengths = sorted(set(sequence_lengths))
+        self.feature_dim = feature_dim
+        self.output_steps = model_output_steps(model)
+        self.latency = LatencyStats()
+        self.sample_latency = LatencyStats()
+
+    def predict(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Run a forward pass.
+
+        Args:
+            inputs (np.ndarray): Input features shape (samples, sequence_length, features)
+
+        Returns:
+            np.ndarray: Model outputs shape (samples, outputs)
+        """
+        started_at = time.perf_counter()
+        outputs = self._predict(np.asarray(inputs, dtype=np.float32))
+        self.latency.observe((time.perf_counter() - started_at) * 1000.0)
+        return outputs
+
+    def _predict(self, inputs: np.ndarray, training: bool = False) -> np.ndarray:
+        raise NotImplementedError
+
+    def forecast(self, inputs: np.ndarray, horizon: int, samples: int = 0) -> np.ndarray:
+        """
+        Forecast ``horizon`` future steps for every window in one call.
+
+        A model whose output head covers the horizon is run once and sliced. Longer
+        horizons feed the model's outputs back into the window until enough steps
+        have been produced, keeping the scale of the original window.
+
+        With ``samples`` set, every window is repeated that many times and the
+        whole stack runs with dropout active (Monte Carlo dropout), so the K
+        stochastic forecasts cost one batched pass rather than K calls.
+
+        Args:
+            inputs (np.ndarray): Input features shape (windows, sequence_length, features)
+            horizon (int): Number of future steps
+            samples (int): Monte Carlo dropout samples per window, 0 for a deterministic forecast
+
+        Returns:
+            np.ndarray: Forecasts shape (windows, horizon), or (windows, samples, horizon)
+            when sampling
+        """
+        started_at = time.perf_counter()
+        inputs = np.asarray(inputs, dtype=np.float32)
+        training = samples > 0
+        if training:
+            # Sample-major stack: rows [k * windows + i] hold sample k of window i
+            inputs = np.tile(inputs, (samples, 1, 1))
+        if horizon <= self.output_steps:
+            outputs = self._predict(inputs, training)[:, :horizon]
+        elif self.feature_dim != 1:
+            raise ValueError("Autoregressive forecasts require a single-feature model")
+        else:
+            passes = -(-horizon // self.output_steps)
+            outputs = self._rollout(inputs, passes, training)[:, :horizon]
+        if training:
+            outputs = outputs.reshape(samples, -1, horizon).transpose(1, 0, 2)
+        latency = self.sample_latency if training else self.latency
+        latency.observe((time.perf_counter() - started_at) * 1000.0)
+        return outputs
+
+    def _rollout(self, inputs: np.ndarray, passes: int, training: bool = False) -> np.ndarray:
+        seq_length = inputs.shape[1]
+        steps = []
+        for _ in range(passes):
+            outputs = self._predict(inputs, training)
+            steps.append(outputs)
+            inputs = np.concatenate([inputs, outputs[:, :, None]], axis=1)[:, -seq_length:]
+        return np.concatenate(steps, axis=1)
+
+    def warmup(self):
+        """
+        Run a dummy batch through every supported sequence length.
+        """
+        for seq_length in self.sequence_lengths:
+            started_at = time.perf_counter()
+            self._predict(np.zeros((1, seq_length, self.feature_dim), dtype=np.float32))
+            logger.info(f"Warmed {self.name} engine for sequence_length={seq_length} "
+                        f"in {(time.perf_counter() - started_at) * 1000.0:.1f}ms")
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "sequence_lengths": self.sequence_lengths,
+            "output_steps": self.output_steps,
+            "latency": self.latency.snapshot(),
+            "mc_dropout_latency": self.sample_latency.snapshot(),
+        }
+
+
+class KerasEngine(ServingEngine):
+    """
+    Reference engine calling model.predict for every batch.
+    """
+
+    name = "keras"
+
+    def _predict(self, inputs: np.ndarray, training: bool = False) -> np.ndarray:
+        if training:
+            # model.predict always runs in inference mode
+            return self.model(inputs, training=True).numpy()
+        return self.model.predict(inputs, verbose=0)
+
+
+class CompiledEngine(ServingEngine):
+    """
+    Engine calling a tf.function traced once per sequence length.
+
+    The batch dimension is left unspecified so micro-batches of any size reuse
+    the same concrete function. Autoregressive forecasts run as a graph loop in
+    a second tf.function per sequence length, with the number of passes as an
+    input, so any horizon is one call into TensorFlow. Dropout-active variants
+    for Monte Carlo sampling are traced on first use.
+    """
+
+    name = "compiled"
+
+    def __init__(self, model, sequence_lengths: Iterable[int], feature_dim: int = 1):
+        _import_tensorflow()
+        super().__init__(model, sequence_lengths, feature_dim)
+        self._functions = {}
+        self._rollouts = {}
+        for seq_length in self.sequence_lengths:
+            self._functions[(seq_length, False)] = self._compile(seq_length)
+
+    def _compile(self, seq_length: int, training: bool = False):
+        signature = [tf.TensorSpec(shape=(None, seq_length, self.feature_dim), dtype=tf.float32)]
+        return tf.function(lambda x: self.model(x, training=training), input_signature=signature)
+
+    def _predict(self, inputs: np.ndarray, training: bool = False) -> np.ndarray:
+        key = (inputs.shape[1], training)
+        function = self._functions.get(key)
+        if function is None:
+            if not training:
+                logger.warning(f"No warmed signature for sequence_length={key[0]}, tracing on demand")
+            function = self._functions[key] = self._compile(*key)
+        return function(tf.convert_to_tensor(inputs)).numpy()
+
+    def _compile_rollout(self, seq_length: int, training: bool = False):
+        signature = [tf.TensorSpec(shape=(None, seq_length, self.feature_dim), dtype=tf.float32),
+                     tf.TensorSpec(shape=(), dtype=tf.int32)]
+
+        def rollout(x, passes):
+            steps = tf.TensorArray(tf.float32, size=passes)
+            for i in tf.range(passes):
+                outputs = self.model(x, training=training)
+                steps = steps.write(i, outputs)
+                x = tf.concat([x, outputs[:, :, None]], axis=1)[:, -seq_length:]
+            # (passes, samples, output_steps) -> (samples, passes * output_steps)
+            stacked = tf.transpose(steps.stack(), [1, 0, 2])
+            return tf.reshape(stacked, [tf.shape(stacked)[0], -1])
+
+        return tf.function(rollout, input_signature=signature)
+
+    def _rollout(self, inputs: np.ndarray, passes: int, training: bool = False) -> np.ndarray:
+        key = (inputs.shape[1], training)
+        function = self._rollouts.get(key)
+        if function is None:
+            function = self._rollouts[key] = self._compile_rollout(*key)
+        return function(tf.convert_to_tensor(inputs), tf.constant(passes, dtype=tf.int32)).numpy()
+
+    def warmup(self):
+        super().warmup()
+        if self.feature_dim == 1:
+            # Trace the forecast loop too, so the first long-horizon request is not slow
+            for seq_length in self.sequence_lengths:
+                self._rollout(np.zeros((1, seq_length, 1), dtype=np.float32), 2)
+        for seq_length in self.sequence_lengths:
+            self._predict(np.zeros((1, seq_length, self.feature_dim), dtype=np.float32), training=True)
+
+
+class NumpyEngine(ServingEngine):
+    """
+    Engine running a LiteModel in NumPy; a Keras model is converted on construction.
+    """
+
+    name = "numpy"
+
+    def __init__(self, model, sequence_lengths: Iterable[int], feature_dim: int = 1):
+        lite = model if isinstance(model, LiteModel) else LiteModel.from_keras(model)
+        super().__init__(lite, sequence_lengths, feature_dim)
+
+    def _predict(self, inputs: np.ndarray, training: bool = False) -> np.ndarray:
+        return self.model.predict(inputs, training)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "quantization": self.model.quantization}
+
+
+def create_engine(backend: str, model, sequence_lengths: Optional[Iterable[int]] = None,
+                  feature_dim: int = 1) -> ServingEngine:
+    """
+    Build a serving engine for the given backend name.
+
+    Args:
+        backend (str): One of SERVING_BACKENDS; LiteModel artifacts always use "numpy"
+        model: Loaded Keras model or LiteModel
+        sequence_lengths (Iterable[int]): Sequence lengths to compile and warm; defaults
+            to the length fixed by the model's input shape
+        feature_dim (int): Number of features per timestep
+
+    Returns:
+        ServingEngine
+    """
+    if not sequence_lengths:
+        sequence_lengths = model_sequence_lengths(model)
+    if backend == "numpy" or isinstance(model, LiteModel):
+        return NumpyEngine(model, sequence_lengths, feature_dim)
+    if backend == "keras":
+        return KerasEngine(model, sequence_lengths, feature_dim)
+    if backend == "compiled":
+        return CompiledEngine(model, sequence_lengths, feature_dim)
+    raise ValueError(f"Unknown serving backend '{backend}', expected one of {SERVING_BACKENDS}")
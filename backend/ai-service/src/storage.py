@@ -0,0 +1,212 @@
+"""
+storage.py
+
+On-disk cache formats for Pi price time series.
+
+Features:
+- CSV (original format, human readable, slow to parse).
+- Memory-mapped NumPy layout: raw int64 epoch-nanosecond timestamps plus float64
+  prices, sliceable without building a DataFrame.
+- Parquet and Feather via pyarrow (optional dependency).
+- In-place append for CSV and mmap caches: the last rows can be replaced and
+  new rows appended without rewriting the file.
+"""
+
+import os
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("ai-service-storage")
+
+
+class CacheStore:
+    """
+    Base class for a versioned price cache stored under ``base_path`` plus an extension.
+    """
+
+    format = "base"
+    extension = ""
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+
+    @property
+    def path(self) -> str:
+        return self.base_path + self.extension
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def save(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def load(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def append(self, rows: pd.DataFrame, replace_last: int, full: pd.DataFrame):
+        """
+        Replace the last ``replace_last`` cached rows with ``rows``.
+
+        Formats without in-place append rewrite the cache from ``full``.
+
+        Args:
+            rows (pd.DataFrame): New tail rows
+            replace_last (int): Number of existing rows superseded by ``rows``
+            full (pd.DataFrame): Complete series after the update
+        """
+        self.save(full)
+
+
+def _truncate_last_lines(path: str, count: int):
+    """
+    Drop the last ``count`` newline-terminated lines of a text file in place.
+    """
+    if count <= 0:
+        return
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos, found = end, 0
+        # The final newline terminates the last line rather than starting one
+        skip_trailing = True
+        while pos > 0:
+            chunk_start = max(0, pos - 4096)
+            f.seek(chunk_start)
+            chunk = f.read(pos - chunk_start)
+            for i in range(len(chunk) - 1, -1, -1):
+                if chunk[i] != 0x0A:
+                    continue
+                if skip_trailing and chunk_start + i == end - 1:
+                    skip_trailing = False
+                    continue
+                found += 1
+                if found == count:
+                    f.truncate(chunk_start + i + 1)
+                    return
+            pos = chunk_start
+        raise ValueError(f"Cannot drop {count} lines from {path}: file is too short")
+
+
+class CsvStore(CacheStore):
+    format = "csv"
+    extension = ".csv"
+
+    def save(self, df: pd.DataFrame):
+        df.to_csv(self.path, index=False)
+
+    def append(self, rows: pd.DataFrame, replace_last: int, full: pd.DataFrame):
+        if not self.exists():
+            return self.save(full)
+        _truncate_last_lines(self.path, replace_last)
+        rows.to_csv(self.path, mode="a", header=False, index=False)
+
+    def load(self) -> pd.DataFrame:
+        return pd.read_csv(self.path, parse_dates=["timestamp"])
+
+
+class MmapStore(CacheStore):
+    """
+    Two flat little-endian binary files read back with np.memmap.
+
+    The primary path holds int64 nanoseconds since the epoch; the companion
+    file holds float64 prices in the same order.
+    """
+
+    format = "mmap"
+    extension = ".timestamps.bin"
+    price_extension = ".prices.bin"
+
+    @property
+    def price_path(self) -> str:
+        return self.base_path + self.price_extension
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.exists(self.price_path)
+
+    def save(self, df: pd.DataFrame):
+        timestamps = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("<i8")
+        np.ascontiguousarray(timestamps, dtype="<i8").tofile(self.path)
+        np.ascontiguousarray(df["price"].to_numpy(), dtype="<f8").tofile(self.price_path)
+
+    def append(self, rows: pd.DataFrame, replace_last: int, full: pd.DataFrame):
+        if not self.exists():
+            return self.save(full)
+        timestamps = rows["timestamp"].to_numpy(dtype="datetime64[ns]").view("<i8")
+        for path, values, dtype in ((self.path, timestamps, "<i8"),
+                                    (self.price_path, rows["price"].to_numpy(), "<f8")):
+            with open(path, "r+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                f.truncate(max(0, end - replace_last * 8))
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def load_arrays(self):
+        """
+        Memory-map the cached arrays without reading them into memory.
+
+        Returns:
+            (timestamps, prices): read-only int64 and float64 arrays
+        """
+        return self._map(self.path, "<i8"), self._map(self.price_path, "<f8")
+
+    @staticmethod
+    def _map(path: str, dtype: str) -> np.ndarray:
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    def load(self) -> pd.DataFrame:
+        timestamps, prices = self.load_arrays()
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(np.asarray(timestamps), unit="ns"),
+            "price": np.array(prices),
+        })
+
+
+class ParquetStore(CacheStore):
+    format = "parquet"
+    extension = ".parquet"
+
+    def save(self, df: pd.DataFrame):
+        df.to_parquet(self.path, index=False)
+
+    def load(self) -> pd.DataFrame:
+        return pd.read_parquet(self.path)
+
+
+class FeatherStore(CacheStore):
+    format = "feather"
+    extension = ".feather"
+
+    def save(self, df: pd.DataFrame):
+        df.reset_index(drop=True).to_feather(self.path)
+
+    def load(self) -> pd.DataFrame:
+        return pd.read_feather(self.path)
+
+
+CACHE_FORMATS = {store.format: store for store in (CsvStore, MmapStore, ParquetStore, FeatherStore)}
+
+
+def get_store(cache_format: str, base_path: str) -> CacheStore:
+    """
+    Create the cache store for a format name.
+
+    Args:
+        cache_format (str): One of CACHE_FORMATS
+        base_path (str): Cache path without extension
+
+    Returns:
+        CacheStore
+    """
+    store_cls: Optional[type] = CACHE_FORMATS.get(cache_format)
+    if store_cls is None:
+        raise ValueError(f"Unknown cache format '{cache_format}', expected one of {sorted(CACHE_FORMATS)}")
+    if store_cls in (ParquetStore, FeatherStore):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"The '{cache_format}' cache format requires pyarrow") from e
+    return store_cls(base_path)
@@ -0,0 +1,174 @@
+"""
+streaming.py
+
+Stateful per-tick inference for live Pi price streams.
+
+Features:
+- NumPy stepper for the stacked PiPriceLSTM network (LSTM / Dropout / Dense
+  layers), built from a Keras model or an exported LiteModel: one tick advances
+  every LSTM layer by a single timestep.
+- Per-stream state: recurrent state, anchored normalization and the last
+  ``sequence_length`` raw prices.
+- Re-anchoring policy that bounds drift from the windowed /predict result.
+
+Re-anchoring policy:
+    /predict scales each window by its own min/max and runs the LSTM from a zero
+    state over exactly ``sequence_length`` prices. A stream instead fixes the
+    min/max of one window (the anchor) and keeps feeding new prices into the same
+    state, so its context grows beyond the window. A stream re-anchors (resets
+    the state, takes min/max from the last ``sequence_length`` prices and replays
+    them) when:
+
+    - the first ``sequence_length`` prices have arrived,
+    - a new price normalizes outside [-tolerance, 1 + tolerance] of the anchor
+      range, i.e. the window's min/max would have moved noticeably, or
+    - ``max_steps`` ticks have passed since the last anchor, so the context is
+      never longer than ``sequence_length + max_steps`` prices.
+
+    Right after a re-anchor the prediction equals /predict for the same window.
+    Between re-anchors each tick costs one timestep instead of ``sequence_length``.
+    The amortized cost is 1 + sequence_length / max_steps timesteps per tick.
+"""
+
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from lite import LiteModel
+
+
+class LSTMStepper:
+    """
+    Single-timestep NumPy execution of a Sequential model made of LSTM, Dropout
+    and Dense layers. Weights are copied once; no TensorFlow calls are made while
+    stepping.
+
+    Args:
+        model: Keras model or LiteModel
+    """
+
+    def __init__(self, model):
+        lite = model if isinstance(model, LiteModel) else LiteModel.from_keras(model)
+        self.lstm_layers = [params[:5] for params in lite.lstm_layers]
+        self.dense_layers = lite.dense_layers
+
+    def initial_state(self) -> list:
+        return [(np.zeros(k.shape[1] // 4, dtype=np.float32), np.zeros(k.shape[1] // 4, dtype=np.float32))
+                for k, *_ in self.lstm_layers]
+
+    def step(self, x: np.ndarray, state: list) -> tuple[np.ndarray, list]:
+        """
+        Advance by one timestep.
+
+        Args:
+            x (np.ndarray): Input features shape (features,)
+            state (list): Per-layer (h, c) from initial_state or a previous step
+
+        Returns:
+            (output, new_state)
+        """
+        new_state = []
+        inputs = np.asarray(x, dtype=np.float32)
+        for (kernel, recurrent_kernel, bias, activation, recurrent_activation), (h, c) in zip(self.lstm_layers, state):
+            z = inputs @ kernel + h @ recurrent_kernel + bias
+            # Keras gate order: input, forget, cell, output
+            i, f, g, o = np.split(z, 4)
+            c = recurrent_activation(f) * c + recurrent_activation(i) * activation(g)
+            h = recurrent_activation(o) * activation(c)
+            new_state.append((h, c))
+            inputs = h
+        for kernel, bias, activation in self.dense_layers:
+            inputs = activation(inputs @ kernel + bias)
+        return inputs, new_state
+
+    def run(self, sequence: np.ndarray, state: Optional[list] = None) -> tuple[np.ndarray, list]:
+        """
+        Step through a (timesteps, features) sequence and return the last output.
+        """
+        state = self.initial_state() if state is None else state
+        output = None
+        for x in sequence:
+            output, state = self.step(x, state)
+        return output, state
+
+
+class PriceStream:
+    """
+    One live price stream: feeds each new price into the stepper and returns the
+    next-price prediction, re-anchoring as described in the module docstring.
+
+    Args:
+        stepper (LSTMStepper): Stepper for the serving model
+        sequence_length (int): Window length the model was trained on
+        reanchor_tolerance (float): Allowed excursion outside the anchor range, as a
+            fraction of that range
+        max_steps (int): Ticks between forced re-anchors; defaults to sequence_length
+    """
+
+    def __init__(self, stepper: LSTMStepper, sequence_length: int, reanchor_tolerance: float = 0.1,
+                 max_steps: Optional[int] = None):
+        self.stepper = stepper
+        self.sequence_length = sequence_length
+        self.reanchor_tolerance = reanchor_tolerance
+        self.max_steps = max_steps or sequence_length
+        self.window = deque(maxlen=sequence_length)
+        self.state = None
+        self.min_price = self.max_price = 0.0
+        self.steps_since_anchor = 0
+        self.ticks = 0
+        self.reanchors = 0
+        self.timesteps = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.state is not None
+
+    def _normalize(self, price: float) -> float:
+        if self.max_price == self.min_price:
+            return 0.0 if price == self.min_price else np.inf
+        return (price - self.min_price) / (self.max_price - self.min_price)
+
+    def _needs_reanchor(self, norm: float) -> bool:
+        return (self.state is None or self.steps_since_anchor >= self.max_steps
+                or not -self.reanchor_tolerance <= norm <= 1 + self.reanchor_tolerance)
+
+    def push(self, price: float) -> tuple[Optional[float], bool]:
+        """
+        Add the newest price.
+
+        Returns:
+            (predicted_price, reanchored): prediction is None until sequence_length
+            prices have been seen
+        """
+        self.window.append(float(price))
+        self.ticks += 1
+        if len(self.window) < self.sequence_length:
+            return None, False
+
+        norm = self._normalize(float(price)) if self.state is not None else 0.0
+        reanchored = self._needs_reanchor(norm)
+        if reanchored:
+            window = np.fromiter(self.window, dtype=np.float32)
+            self.min_price, self.max_price = float(window.min()), float(window.max())
+            span = self.max_price - self.min_price
+            norm_window = (window - self.min_price) / span if span else np.zeros_like(window)
+            output, self.state = self.stepper.run(norm_window[:, None])
+            self.steps_since_anchor = 0
+            self.reanchors += 1
+            self.timesteps += self.sequence_length
+        else:
+            output, self.state = self.stepper.step(np.array([norm], dtype=np.float32), self.state)
+            self.steps_since_anchor += 1
+            self.timesteps += 1
+        predicted = float(output[0]) * (self.max_price - self.min_price) + self.min_price
+        return predicted, reanchored
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "reanchors": self.reanchors,
+            "timesteps": self.timesteps,
+            "steps_since_anchor": self.steps_since_anchor,
+            "anchor": [self.min_price, self.max_price] if self.ready else None,
+        }
@@ -0,0 +1,333 @@
+"""
+training.py
+
+Parallel hyperparameter search and multi-model training for PiPriceLSTM.
+
+Features:
+- Grid and random search over model (sequence_length, lstm_units, dropout_rate,
+  horizon) and training (batch_size, epochs, patience) parameters.
+- Process-pool fan-out with TensorFlow intra/inter-op threads pinned per worker,
+  so workers together use the cores once instead of oversubscribing them.
+- One memory-mapped copy of the windowed dataset per (sequence_length, horizon),
+  written once and read by every worker.
+- Per-run checkpoint and metrics.json under model_dir, plus a runs.json summary.
+- Best run (lowest validation loss) copied to a serving path for the model registry.
+- Headless; reports wall-clock speedup against a serial run.
+
+Usage:
+    python src/training.py --data prices.csv --model-dir runs \\
+        --grid sequence_length=30,60 lstm_units=32,64 dropout_rate=0.1,0.2 --epochs 50
+    python src/training.py --synthetic 20000 --model-dir runs --grid lstm_units=16,32,64 \\
+        --random 8 --workers 4 --serving-path models/best.h5 --serial-baseline
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+
+from preprocessing import window_views
+
+logger = logging.getLogger("ai-service-training")
+
+MODEL_PARAMS = {"sequence_length": 60, "lstm_units": 100, "dropout_rate": 0.2, "horizon": 1}
+TRAIN_PARAMS = {"batch_size": 64, "epochs": 100, "patience": 10}
+
+
+def grid_search(space: dict) -> list[dict]:
+    """
+    Every combination of the values in ``space``.
+
+    Args:
+        space (dict): Parameter name -> list of candidate values
+
+    Returns:
+        list[dict]: One config per combination, in a stable order
+    """
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space: dict, n_runs: int, seed: Optional[int] = None) -> list[dict]:
+    """
+    ``n_runs`` distinct configs drawn at random from the grid over ``space``.
+    """
+    grid = grid_search(space)
+    return random.Random(seed).sample(grid, min(n_runs, len(grid)))
+
+
+def full_config(config: dict) -> dict:
+    unknown = set(config) - set(MODEL_PARAMS) - set(TRAIN_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown training parameters {sorted(unknown)}")
+    return {**MODEL_PARAMS, **TRAIN_PARAMS, **config}
+
+
+def prepare_datasets(series: np.ndarray, configs: list[dict], data_dir: str) -> dict:
+    """
+    Min-max scale the series and write the windowed (inputs, labels) arrays once per
+    distinct (sequence_length, horizon) as .npy files that workers memory-map.
+
+    Returns:
+        dict: (sequence_length, horizon) -> (inputs_path, labels_path)
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    series = np.asarray(series, dtype=np.float32).reshape(-1)
+    min_val, max_val = series.min(), series.max()
+    scaled = (series - min_val) / (max_val - min_val) if max_val > min_val else np.zeros_like(series)
+
+    datasets = {}
+    for seq_length, horizon in sorted({(c["sequence_length"], c["horizon"]) for c in configs}):
+        inputs, labels = window_views(scaled, seq_length, horizon=horizon)
+        if len(inputs) == 0:
+            raise ValueError(f"Series too short for sequence_length={seq_length}, horizon={horizon}")
+        paths = (os.path.join(data_dir, f"windows_s{seq_length}_h{horizon}_x.npy"),
+                 os.path.join(data_dir, f"windows_s{seq_length}_h{horizon}_y.npy"))
+        for path, array in zip(paths, (inputs, labels)):
+            out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=array.shape)
+            out[:] = array
+            out.flush()
+            del out
+        datasets[(seq_length, horizon)] = paths
+        logger.info(f"Wrote {len(inputs)} windows for sequence_length={seq_length}, horizon={horizon}")
+    return datasets
+
+
+def _init_worker(intra_threads: int, inter_threads: int):
+    # Must run before TensorFlow creates its thread pools
+    os.environ["OMP_NUM_THREADS"] = str(intra_threads)
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_threads)
+
+
+def _window_batches(inputs: np.ndarray, labels: np.ndarray, start: int, stop: int, batch_size: int):
+    """
+    Keras Sequence reading contiguous batches straight from the memory-mapped arrays,
+    so no worker holds its own copy of the windows.
+    """
+    import tensorflow as tf
+
+    class WindowBatches(tf.keras.utils.Sequence):
+        def __len__(self):
+            return -(-(stop - start) // batch_size)
+
+        def __getitem__(self, index):
+            lo = start + index * batch_size
+            hi = min(lo + batch_size, stop)
+            return np.asarray(inputs[lo:hi]), np.asarray(labels[lo:hi])
+
+    return WindowBatches()
+
+
+def train_run(run_id: str, config: dict, dataset: tuple[str, str], run_dir: str,
+              val_fraction: float = 0.2) -> dict:
+    """
+    Train one configuration and write its checkpoint and metrics.json to ``run_dir``.
+
+    Returns:
+        dict: Run summary (status, val_loss, checkpoint, timings); failures are
+        reported with status "failed" instead of raising
+    """
+    from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+    from model import PiPriceLSTM
+
+    os.makedirs(run_dir, exist_ok=True)
+    checkpoint_path = os.path.join(run_dir, "checkpoint.h5")
+    result = {"run_id": run_id, "config": config, "pid": os.getpid(), "status": "failed"}
+    started_at = time.perf_counter()
+    try:
+        inputs = np.load(dataset[0], mmap_mode="r")
+        labels = np.load(dataset[1], mmap_mode="r")
+        split = int(len(inputs) * (1 - val_fraction))
+        if split == 0 or split == len(inputs):
+            raise ValueError("Not enough windows for the validation split")
+
+        lstm = PiPriceLSTM(config["sequence_length"], lstm_units=config["lstm_units"],
+                           dropout_rate=config["dropout_rate"], model_dir=run_dir, horizon=config["horizon"])
+        history = lstm.model.fit(
+            _window_batches(inputs, labels, 0, split, config["batch_size"]),
+            validation_data=_window_batches(inputs, labels, split, len(inputs), config["batch_size"]),
+            epochs=config["epochs"],
+            callbacks=[EarlyStopping(monitor="val_loss", patience=config["patience"], restore_best_weights=True),
+                       ModelCheckpoint(checkpoint_path, monitor="val_loss", save_best_only=True)],
+            shuffle=True,
+            verbose=0,
+        ).history
+        best_epoch = int(np.argmin(history["val_loss"]))
+        train_seconds = time.perf_counter() - started_at
+        result.update({
+            "status": "ok",
+            "val_loss": float(history["val_loss"][best_epoch]),
+            "val_mae": float(history["val_mae"][best_epoch]),
+            "best_epoch": best_epoch + 1,
+            "epochs_run": len(history["val_loss"]),
+            "train_samples": split,
+            "samples_per_sec": split * len(history["val_loss"]) / train_seconds,
+            "checkpoint": checkpoint_path,
+        })
+    except Exception as e:
+        logger.error(f"Run {run_id} failed: {str(e)}")
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started_at
+    with open(os.path.join(run_dir, "metrics.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def publish_model(checkpoint: str, serving_path: str):
+    """
+    Copy a checkpoint to ``serving_path`` atomically, so a model registry watching
+    that directory never loads a half-written file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(serving_path)), exist_ok=True)
+    partial = f"{serving_path}.partial"
+    shutil.copy2(checkpoint, partial)
+    os.replace(partial, serving_path)
+
+
+def run_search(series: np.ndarray, configs: list[dict], model_dir: str, workers: Optional[int] = None,
+               threads_per_worker: Optional[int] = None, val_fraction: float = 0.2,
+               serving_path: Optional[str] = None) -> dict:
+    """
+    Train every config on a process pool and pick the best run.
+
+    Args:
+        series (np.ndarray): 1D price series
+        configs (list[dict]): Parameter overrides per run, see MODEL_PARAMS and TRAIN_PARAMS
+        model_dir (str): Output directory for datasets, runs and the summary
+        workers (int): Worker processes; defaults to one per run, at most the CPU count
+        threads_per_worker (int): TensorFlow intra-op threads per worker; defaults to
+            the CPU count divided by the workers
+        val_fraction (float): Trailing fraction of windows used for validation
+        serving_path (str): Where to copy the best checkpoint, e.g. a file in MODEL_DIR
+
+    Returns:
+        dict: runs sorted by validation loss, best run, wall_seconds and pool settings
+    """
+    if not configs:
+        raise ValueError("No configurations to train")
+    configs = [full_config(config) for config in configs]
+    cpu_count = os.cpu_count() or 1
+    workers = workers or min(len(configs), cpu_count)
+    threads_per_worker = threads_per_worker or max(1, cpu_count // workers)
+
+    started_at = time.perf_counter()
+    datasets = prepare_datasets(series, configs, os.path.join(model_dir, "data"))
+    # spawn: TensorFlow is not fork-safe, and fresh workers pick up the thread settings
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(threads_per_worker, 1)) as pool:
+        futures = [pool.submit(train_run, f"run_{index:03d}", config,
+                               datasets[(config["sequence_length"], config["horizon"])],
+                               os.path.join(model_dir, f"run_{index:03d}"), val_fraction)
+                   for index, config in enumerate(configs)]
+        for future in as_completed(futures):
+            run = future.result()
+            runs.append(run)
+            logger.info(f"{run['run_id']} {run['status']}: val_loss={run.get('val_loss')} "
+                        f"in {run['seconds']:.1f}s ({len(runs)}/{len(configs)})")
+    wall_seconds = time.perf_counter() - started_at
+
+    runs.sort(key=lambda run: (run["status"] != "ok", run.get("val_loss", float("inf")), run["run_id"]))
+    best = runs[0] if runs[0]["status"] == "ok" else None
+    if best is not None and serving_path:
+        publish_model(best["checkpoint"], serving_path)
+        logger.info(f"Published {best['run_id']} (val_loss={best['val_loss']:.6f}) to {serving_path}")
+
+    report = {
+        "workers": workers,
+        "threads_per_worker": threads_per_worker,
+        "wall_seconds": wall_seconds,
+        # Sum of per-run times: what the runs cost back to back under the same contention
+        "run_seconds": sum(run["seconds"] for run in runs),
+        "best": best,
+        "serving_path": serving_path if best is not None else None,
+        "runs": runs,
+    }
+    with open(os.path.join(model_dir, "runs.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def parse_space(items: list[str]) -> dict:
+    """
+    Parse ``name=v1,v2`` arguments into a search space, as ints where possible.
+    """
+    space = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if not values:
+            raise ValueError(f"Expected name=value[,value...], got '{item}'")
+        space[name] = [int(v) if v.lstrip("-").isdigit() else float(v) for v in values.split(",")]
+    return space
+
+
+def load_series(args) -> np.ndarray:
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        steps = np.arange(args.synthetic)
+        return (1.0 + 0.2 * np.sin(steps / 50.0) + np.cumsum(rng.normal(scale=2e-3, size=args.synthetic)))
+    from data import PiPriceDataManager
+    manager = PiPriceDataManager(cache_dir=os.path.join(args.model_dir, "cache"))
+    manager.load_from_csv(args.data)
+    return manager.data["price"].to_numpy(dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="CSV with timestamp and price columns")
+    source.add_argument("--synthetic", type=int, help="Train on a synthetic series of this many prices")
+    parser.add_argument("--model-dir", default="model/search", help="Output directory for runs and datasets")
+    parser.add_argument("--grid", nargs="*", default=[], help="Search space as name=v1,v2 (model and training params)")
+    parser.add_argument("--random", type=int, help="Train this many random configs from the grid instead of all")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --random")
+    parser.add_argument("--epochs", type=int, help="Epochs for every run unless given in --grid")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per run, up to the CPU count)")
+    parser.add_argument("--threads-per-worker", type=int, help="TensorFlow threads per worker")
+    parser.add_argument("--val-fraction", type=float, default=0.2, help="Trailing fraction used for validation")
+    parser.add_argument("--serving-path", help="Copy the best checkpoint here, e.g. $MODEL_DIR/best.h5")
+    parser.add_argument("--serial-baseline", action="store_true",
+                        help="Also train the same configs on one worker and report the speedup")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    space = parse_space(args.grid)
+    if args.epochs and "epochs" not in space:
+        space["epochs"] = [args.epochs]
+    configs = random_search(space, args.random, args.seed) if args.random else grid_search(space)
+    series = load_series(args)
+
+    report = run_search(series, configs, args.model_dir, args.workers, args.threads_per_worker,
+                        args.val_fraction, args.serving_path)
+    print(f"\n{'run':<10}{'val_loss':>12}{'seconds':>10}  config")
+    for run in report["runs"]:
+        val_loss = f"{run['val_loss']:.6f}" if run["status"] == "ok" else run["status"]
+        print(f"{run['run_id']:<10}{val_loss:>12}{run['seconds']:>10.1f}  {run['config']}")
+    print(f"\n{len(configs)} runs on {report['workers']} workers x {report['threads_per_worker']} threads: "
+          f"{report['wall_seconds']:.1f}s wall clock, {report['run_seconds']:.1f}s of run time")
+
+    if args.serial_baseline:
+        serial = run_search(series, configs, os.path.join(args.model_dir, "serial"), workers=1,
+                            threads_per_worker=os.cpu_count() or 1, val_fraction=args.val_fraction)
+        print(f"Serial baseline: {serial['wall_seconds']:.1f}s wall clock, "
+              f"speedup {serial['wall_seconds'] / report['wall_seconds']:.2f}x")
+    if report["best"] is None:
+        raise SystemExit("Every run failed")
+    print(f"Best: {report['best']['run_id']} {report['best']['config']}")
+
+
+if __name__ == "__main__":
+    main()
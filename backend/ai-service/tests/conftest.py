@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from model import PiPriceLSTM
+
+# Input length of the shared keras_model fixture
+SEQUENCE_LENGTH = 10
+
+
+@pytest.fixture(scope="session")
+def keras_model():
+    # Small untrained PiPriceLSTM shared by the serving, streaming, export and backtest tests
+    return PiPriceLSTM(sequence_length=SEQUENCE_LENGTH, lstm_units=16).model
@@ -0,0 +1,96 @@
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backtest import BacktestMetrics, backtest_manager, backtest_series, run_backtest, split_ranges
+from data import PiPriceDataManager
+from lite import export_model
+from preprocessing import normalize_windows
+from serving import create_engine
+from conftest import SEQUENCE_LENGTH as SEQ
+
+
+@pytest.fixture(scope="module")
+def prices():
+    rng = np.random.default_rng(0)
+    return (1.0 + 0.1 * np.sin(np.arange(300) / 7.0) + np.cumsum(rng.normal(scale=1e-2, size=300))).astype(np.float32)
+
+
+def test_metrics_by_hand():
+    metrics = BacktestMetrics(horizon=1)
+    # Last prices 1, 1, 2; up is predicted for all three, the last window stays flat
+    metrics.update(np.array([[1.5], [1.2], [2.5]]), np.array([[2.0], [0.5], [2.0]]), np.array([1.0, 1.0, 2.0]))
+    result = metrics.result()
+    assert result["windows"] == 3
+    assert result["mae"] == pytest.approx((0.5 + 0.7 + 0.5) / 3)
+    assert result["mape"] == pytest.approx(100 * (0.25 + 1.4 + 0.25) / 3)
+    assert result["directional_accuracy"] == pytest.approx(0.5)
+    assert result["naive_mae"] == pytest.approx((1.0 + 0.5 + 0.0) / 3)
+
+    # Merging partial sums equals one update over both chunks
+    other = BacktestMetrics(horizon=1)
+    other.update(np.array([[3.0]]), np.array([[4.0]]), np.array([2.0]))
+    metrics.merge(other)
+    assert metrics.result()["directional_accuracy"] == pytest.approx(2 / 3)
+    assert metrics.result()["windows"] == 4
+
+
+def test_chunked_backtest_matches_per_window_predictions(keras_model, prices):
+    engine = create_engine("keras", keras_model)
+    horizon, stride = 2, 3
+    output = np.zeros((97, horizon), dtype=np.float32)
+    metrics = backtest_series(prices, engine, SEQ, horizon, stride, chunk_size=16, output=output)
+
+    # Reference: one /predict-style call per window
+    expected, actual, last = [], [], []
+    for start in range(0, len(prices) - SEQ - horizon + 1, stride):
+        window = prices[start:start + SEQ]
+        norm, mins, maxs = normalize_windows(window[None, :])
+        forecast = engine.forecast(norm[:, :, None], horizon)[0]
+        expected.append(forecast * (maxs[0] - mins[0]) + mins[0])
+        actual.append(prices[start + SEQ:start + SEQ + horizon])
+        last.append(window[-1])
+    expected, actual = np.array(expected), np.array(actual)
+    assert len(expected) == 97
+    np.testing.assert_allclose(output, expected, atol=1e-5)
+
+    result = metrics.result()
+    np.testing.assert_allclose(result["per_step"]["mae"], np.abs(expected - actual).mean(axis=0), rtol=1e-4)
+    direction = np.sign(expected - np.array(last)[:, None]) == np.sign(actual - np.array(last)[:, None])
+    np.testing.assert_allclose(result["per_step"]["directional_accuracy"], direction.mean(axis=0))
+
+
+def test_split_ranges_cover_every_window_once():
+    assert split_ranges(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert split_ranges(2, 4) == [(0, 1), (1, 2)]
+
+
+def test_workers_match_single_process(keras_model, prices, tmp_path):
+    model_path = str(tmp_path / "model.npz")
+    export_model(keras_model, model_path)
+    serial = run_backtest(prices, model_path, horizon=3, chunk_size=50, output_path=str(tmp_path / "serial.npy"))
+    split = run_backtest(prices, model_path, horizon=3, chunk_size=50, workers=3,
+                         output_path=str(tmp_path / "split.npy"))
+    assert split["workers"] == 3
+    assert serial["windows"] == split["windows"] == len(prices) - SEQ - 3 + 1
+    assert split["metrics"]["windows"] == serial["windows"]
+    for name in ("mae", "mape", "directional_accuracy", "naive_mae"):
+        assert split["metrics"][name] == pytest.approx(serial["metrics"][name])
+    np.testing.assert_array_equal(np.load(tmp_path / "split.npy"), np.load(tmp_path / "serial.npy"))
+
+
+def test_backtest_over_data_manager(keras_model, prices, tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    timestamps = pd.date_range("2023-01-01", periods=len(prices), freq="min")
+    pd.DataFrame({"timestamp": timestamps, "price": prices}).to_csv(csv_path, index=False)
+    manager = PiPriceDataManager(cache_dir=str(tmp_path / "cache"), freq="1min")
+    manager.load_from_csv(str(csv_path))
+
+    report = backtest_manager(manager, keras_model, bars=100, backend="keras")
+    assert report["windows"] == 100 - SEQ
+    assert report["sequence_length"] == SEQ
+    with pytest.raises(ValueError):
+        run_backtest(prices, keras_model, workers=2)
@@ -0,0 +1,107 @@
+import os
+import sys
+import asyncio
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from cache import LRUCache, PredictionCache
+
+
+class FakeRedis:
+    """In-memory stand-in for the aioredis client used by PredictionCache."""
+
+    def __init__(self):
+        self.store = {}
+        self.gets = 0
+
+    async def get(self, key):
+        self.gets += 1
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+def test_lru_evicts_least_recently_used_and_expires():
+    now = [0.0]
+    cache = LRUCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+    now[0] = 11.0
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_keys_are_compact_and_versioned():
+    long_window = np.linspace(1.0, 2.0, 5000)
+    v1 = PredictionCache(model_version="v1")
+    v2 = PredictionCache(model_version="v2")
+    key = v1.make_key(long_window)
+    assert len(key) < 64
+    assert key == v1.make_key(list(long_window.astype(np.float32)))
+    assert key != v2.make_key(long_window)
+    assert key != v1.make_key(long_window[:-1])
+
+
+def test_local_tier_serves_hot_keys_without_redis_round_trip():
+    redis = FakeRedis()
+    cache = PredictionCache(redis, "v1")
+    key = cache.make_key(np.array([1.0, 2.0, 3.0]))
+
+    async def run():
+        assert await cache.get(key) is None
+        await cache.set(key, (2.5, 0.95))
+        assert await cache.get(key) == (2.5, 0.95)
+
+        # A fresh replica finds the value in Redis and promotes it locally
+        other = PredictionCache(redis, "v1")
+        assert await other.get(key) == (2.5, 0.95)
+        assert await other.get(key) == (2.5, 0.95)
+        return other
+
+    other = asyncio.run(run())
+    assert redis.gets == 2
+    stats = other.stats()
+    assert stats["local"]["hits"] == 1
+    assert stats["redis"]["hits"] == 1
+
+
+def test_forecast_vectors_are_keyed_by_horizon_and_round_trip_redis():
+    redis = FakeRedis()
+    cache = PredictionCache(redis, "v1")
+    window = np.array([1.0, 2.0, 3.0])
+    assert cache.make_key(window, horizon=1) == cache.make_key(window)
+    assert cache.make_key(window, horizon=7) != cache.make_key(window, horizon=3)
+
+    key = cache.make_key(window, horizon=3)
+    stored = cache.value_for(np.array([0.1, 0.2, 0.3]), np.array([3.1, 3.2, 3.3]))
+    assert stored == (3.1, 3.2, 3.3)
+
+    async def run():
+        await cache.set(key, (stored, 0.95))
+        return await PredictionCache(redis, "v1").get(key)
+
+    assert asyncio.run(run()) == ((3.1, 3.2, 3.3), 0.95)
+
+
+def test_normalized_keys_share_entries_across_affine_rescales():
+    cache = PredictionCache(model_version="v1", key_mode="normalized", key_precision=4)
+    window = np.array([1.0, 3.0, 2.0, 5.0])
+    rescaled = window * 10.0 + 7.0
+    norm = (window - window.min()) / (window.max() - window.min())
+    norm_rescaled = (rescaled - rescaled.min()) / (rescaled.max() - rescaled.min())
+    key = cache.make_key(window, norm)
+    assert key == cache.make_key(rescaled, norm_rescaled)
+    assert key != cache.make_key(window, norm + 1e-3)
+
+    # The stored normalized prediction is restored with each window's own scale
+    stored = cache.value_for(0.5, 3.0)
+    assert stored == 0.5
+    assert cache.price_from(stored, window.min(), window.max()) == 3.0
+    assert cache.price_from(stored, rescaled.min(), rescaled.max()) == 37.0
+    assert cache.stats()["key_precision"] == 4
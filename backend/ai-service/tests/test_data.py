@@ -0,0 +1,145 @@
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from data import PiPriceDataManager
+from storage import CACHE_FORMATS
+
+
+@pytest.fixture
+def price_csv(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    timestamps = pd.date_range("2023-01-01", periods=60, freq="D")
+    prices = np.linspace(0.5, 1.1, 60)
+    pd.DataFrame({"timestamp": timestamps, "price": prices}).to_csv(csv_path, index=False)
+    return str(csv_path)
+
+
+@pytest.mark.parametrize("cache_format", sorted(CACHE_FORMATS))
+def test_cache_roundtrip_per_format(tmp_path, price_csv, cache_format):
+    if cache_format in ("parquet", "feather"):
+        pytest.importorskip("pyarrow")
+    manager = PiPriceDataManager(cache_dir=str(tmp_path / "cache"), cache_format=cache_format)
+    loaded = manager.load_from_csv(price_csv)
+
+    fresh = PiPriceDataManager(cache_dir=str(tmp_path / "cache"), cache_format=cache_format)
+    cached = fresh.load_cache()
+    pd.testing.assert_frame_equal(cached.reset_index(drop=True), loaded.reset_index(drop=True), check_freq=False)
+    np.testing.assert_allclose(fresh.get_historical_prices(5), loaded["price"].to_numpy()[-5:])
+
+
+def test_cache_is_keyed_by_version_and_format(tmp_path, price_csv):
+    v1 = PiPriceDataManager(cache_dir=str(tmp_path), version="v1", cache_format="mmap")
+    v1.load_from_csv(price_csv)
+    assert PiPriceDataManager(cache_dir=str(tmp_path), version="v2", cache_format="mmap").load_cache() is None
+    assert PiPriceDataManager(cache_dir=str(tmp_path), version="v1", cache_format="csv").load_cache() is None
+
+
+def test_open_cache_slices_memory_map_without_frame(tmp_path, price_csv):
+    writer = PiPriceDataManager(cache_dir=str(tmp_path), cache_format="mmap")
+    expected = writer.load_from_csv(price_csv)["price"].to_numpy()
+
+    reader = PiPriceDataManager(cache_dir=str(tmp_path), cache_format="mmap")
+    assert reader.open_cache()
+    assert reader.data is None
+    window = reader.get_historical_prices(7)
+    np.testing.assert_array_equal(window, expected[-7:])
+    assert isinstance(reader._mapped[1], np.memmap)
+    assert reader.get_latest_price() == expected[-1]
+
+
+def test_unknown_cache_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        PiPriceDataManager(cache_dir=str(tmp_path), cache_format="xml")
+
+
+def raw_ticks(periods, start="2023-01-01", freq="7H", seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=periods, freq=freq)
+    return pd.DataFrame({"timestamp": timestamps, "price": rng.uniform(0.5, 1.5, periods)})
+
+
+@pytest.mark.parametrize("cache_format", ["csv", "mmap"])
+def test_incremental_ingest_matches_full_rebuild(tmp_path, cache_format):
+    ticks = raw_ticks(400)
+    # Leave a multi-day gap inside one update so interpolation is exercised
+    ticks = ticks[(ticks["timestamp"] < "2023-02-10") | (ticks["timestamp"] > "2023-02-14")]
+    manager = PiPriceDataManager(cache_dir=str(tmp_path), cache_format=cache_format)
+    manager.ingest(ticks.iloc[:100])
+    for start, end in ((100, 101), (101, 150), (150, 151), (151, len(ticks))):
+        manager.ingest(ticks.iloc[start:end])
+
+    expected = PiPriceDataManager(cache_dir=str(tmp_path / "full"))._validate_and_clean(ticks)
+    pd.testing.assert_frame_equal(manager.data, expected, check_freq=False)
+
+    # The appended cache on disk matches the in-memory series
+    reloaded = PiPriceDataManager(cache_dir=str(tmp_path), cache_format=cache_format).load_cache()
+    np.testing.assert_allclose(reloaded["price"], expected["price"])
+    np.testing.assert_array_equal(reloaded["timestamp"].to_numpy(), expected["timestamp"].to_numpy())
+
+
+def test_ingest_resumes_from_cache_and_drops_late_rows(tmp_path):
+    ticks = raw_ticks(200)
+    PiPriceDataManager(cache_dir=str(tmp_path)).ingest(ticks.iloc[:120])
+
+    resumed = PiPriceDataManager(cache_dir=str(tmp_path))
+    late = ticks.iloc[110:115]
+    resumed.ingest(pd.concat([late, ticks.iloc[120:]]))
+    expected = PiPriceDataManager(cache_dir=str(tmp_path / "full"))._validate_and_clean(ticks)
+    np.testing.assert_allclose(resumed.data["price"], expected["price"])
+
+
+def test_rollups_stay_consistent_under_incremental_ingest(tmp_path):
+    ticks = raw_ticks(3000, freq="7min", seed=3)
+    ticks = ticks[(ticks["timestamp"] < "2023-01-04 02:00") | (ticks["timestamp"] > "2023-01-04 09:00")]
+    resolutions = ("5min", "1H", "D")
+    manager = PiPriceDataManager(cache_dir=str(tmp_path), freq="1H", rollups=resolutions)
+    manager.ingest(ticks.iloc[:500])
+    for start in range(500, len(ticks), 333):
+        manager.ingest(ticks.iloc[start:start + 333])
+
+    full = PiPriceDataManager(cache_dir=str(tmp_path / "full"), freq="1H", rollups=resolutions)
+    full._validate_and_clean(ticks)
+    for resolution in resolutions:
+        pd.testing.assert_frame_equal(manager.get_ohlc(10 ** 6, resolution), full.get_ohlc(10 ** 6, resolution))
+
+    # Observed buckets match a direct pandas resample of the raw ticks
+    hourly = ticks.set_index("timestamp")["price"].resample("1H")
+    ohlc = manager.get_ohlc(5, "1H").set_index("timestamp")
+    np.testing.assert_allclose(ohlc["high"], hourly.max().iloc[-5:])
+    np.testing.assert_allclose(ohlc["open"], hourly.first().iloc[-5:])
+    np.testing.assert_allclose(manager.get_historical_prices(3, resolution="D"), ticks.set_index("timestamp")["price"].resample("D").mean().iloc[-3:])
+    assert len(manager.get_historical_prices(24)) == 24
+
+    with pytest.raises(ValueError):
+        manager.get_historical_prices(5, resolution="15min")
+
+
+def test_calendar_frequencies_ingest_incrementally(tmp_path):
+    ticks = raw_ticks(600, freq="5H", seed=4)
+    manager = PiPriceDataManager(cache_dir=str(tmp_path), freq="W", rollups=("M",))
+    manager.ingest(ticks.iloc[:100])
+    for start in range(100, len(ticks), 77):
+        manager.ingest(ticks.iloc[start:start + 77])
+
+    full = PiPriceDataManager(cache_dir=str(tmp_path / "full"), freq="W", rollups=("M",))
+    pd.testing.assert_frame_equal(manager.data, full._validate_and_clean(ticks), check_freq=False)
+    pd.testing.assert_frame_equal(manager.get_ohlc(10 ** 6, "M"), full.get_ohlc(10 ** 6, "M"))
+
+
+def test_all_invalid_payload_cleans_to_empty_frame(tmp_path):
+    manager = PiPriceDataManager(cache_dir=str(tmp_path))
+    payload = [{"timestamp": "2023-01-01T00:00:00", "price": 0.0}, {"timestamp": "2023-01-02T00:00:00", "price": -1.0}]
+    cleaned = manager._validate_and_clean(manager._parse_api_response(payload))
+    assert cleaned.empty
+    assert list(cleaned.columns) == ["timestamp", "price"]
+    assert manager._last_ts is None
+
+    # An empty update leaves the manager ready for the next valid one
+    assert manager.ingest(manager._parse_api_response(payload)).empty
+    ticks = raw_ticks(20)
+    np.testing.assert_allclose(manager.ingest(ticks)["price"],
+                               PiPriceDataManager(cache_dir=str(tmp_path / "full"))._validate_and_clean(ticks)["price"])
@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+import asyncio
+import numpy as np
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from fetcher import PriceFetcher, TokenBucket, date_range_requests
+from data import PiPriceDataManager
+
+LATENCY = 0.05
+
+
+def make_app(arrivals):
+    """Stub price API: each page returns one day of prices after a fixed latency."""
+
+    async def prices(request):
+        arrivals.append(time.monotonic())
+        await asyncio.sleep(LATENCY)
+        day = int(request.query.get("day", 0))
+        return web.json_response([{"time": 1672531200 + day * 86400, "close": 1.0 + day}])
+
+    app = web.Application()
+    app.router.add_get("/prices", prices)
+    return app
+
+
+async def fetch_pages(fetcher, count):
+    arrivals = []
+    async with TestServer(make_app(arrivals)) as server:
+        url = str(server.make_url("/prices"))
+        started_at = time.perf_counter()
+        async with fetcher:
+            results = await fetcher.fetch_many([(url, {"day": day}) for day in range(count)])
+        return time.perf_counter() - started_at, results, arrivals
+
+
+def test_concurrent_fetch_beats_sequential():
+    sequential, _, _ = asyncio.run(fetch_pages(PriceFetcher(rate_per_host=1000, max_concurrency=1), 20))
+    concurrent, results, _ = asyncio.run(fetch_pages(PriceFetcher(rate_per_host=1000, max_concurrency=10), 20))
+    assert [r[0]["close"] for r in results] == [1.0 + day for day in range(20)]
+    assert sequential >= 20 * LATENCY
+    assert concurrent * 3 < sequential
+
+
+def test_rate_limit_is_respected():
+    rate = 20.0
+    _, _, arrivals = asyncio.run(fetch_pages(PriceFetcher(rate_per_host=rate, burst=1, max_concurrency=10), 8))
+    gaps = np.diff(sorted(arrivals))
+    # Every request after the first waits for a fresh token (allow timer jitter)
+    assert gaps.min() >= 0.8 / rate
+    assert arrivals[-1] - arrivals[0] >= 0.9 * 7 / rate
+
+
+def test_token_bucket_allows_initial_burst():
+    async def run():
+        bucket = TokenBucket(rate=10, capacity=3)
+        started_at = time.perf_counter()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.perf_counter() - started_at
+
+    assert asyncio.run(run()) < 0.05
+
+
+def test_manager_merges_many_pages(tmp_path):
+    async def run():
+        async with TestServer(make_app([])) as server:
+            url = str(server.make_url("/prices"))
+            manager = PiPriceDataManager(cache_dir=str(tmp_path),
+                                         fetcher=PriceFetcher(rate_per_host=1000, max_concurrency=5))
+            try:
+                requests = [(url, {"day": day}) for day in (3, 0, 1, 2)] + ["http://127.0.0.1:9/unreachable"]
+                manager.fetcher.max_retries = 1
+                return await manager.fetch_many_from_api(requests)
+            finally:
+                await manager.close()
+
+    data = asyncio.run(run())
+    assert data["price"].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_manager_fetches_again_from_a_new_event_loop(tmp_path):
+    manager = PiPriceDataManager(cache_dir=str(tmp_path), fetcher=PriceFetcher(rate_per_host=1000))
+
+    async def run(day):
+        async with TestServer(make_app([])) as server:
+            data = await manager.fetch_from_api(str(server.make_url("/prices")), {"day": day})
+            session = manager.fetcher._session
+            return data, session
+
+    first, first_session = asyncio.run(run(0))
+    second, second_session = asyncio.run(run(1))
+    assert first["price"].tolist() == [1.0] and second["price"].tolist() == [2.0]
+    # The session left on the first loop is replaced, not reused
+    assert second_session is not first_session
+    asyncio.run(manager.close())
+
+
+def test_manager_reuses_one_session_across_fetches(tmp_path):
+    manager = PiPriceDataManager(cache_dir=str(tmp_path), fetcher=PriceFetcher(rate_per_host=1000))
+
+    async def run():
+        async with TestServer(make_app([])) as server:
+            url = str(server.make_url("/prices"))
+            try:
+                await manager.fetch_from_api(url, {"day": 0})
+                session = manager.fetcher._session
+                await manager.fetch_many_from_api([(url, {"day": 1})])
+                assert not session.closed
+                assert manager.fetcher._session is session
+            finally:
+                await manager.close()
+            assert session.closed
+
+    asyncio.run(run())
+
+
+def test_throttled_host_does_not_hold_concurrency_slots():
+    async def run():
+        async with TestServer(make_app([])) as server:
+            throttled = str(server.make_url("/prices"))
+            # Same server under a second host name, so it gets its own token bucket
+            other = throttled.replace("127.0.0.1", "localhost")
+            finished = {}
+
+            async def fetch(name, url):
+                await fetcher.fetch_json(url)
+                finished[name] = time.perf_counter()
+
+            fetcher = PriceFetcher(rate_per_host=2, burst=1, max_concurrency=1)
+            async with fetcher:
+                await asyncio.gather(*[fetch(f"throttled{i}", throttled) for i in range(3)], fetch("other", other))
+            return finished
+
+    finished = asyncio.run(run())
+    # The other host runs right after the first throttled request, not after the throttled backlog
+    assert finished["other"] < finished["throttled1"]
+
+
+def test_date_range_requests_cover_range():
+    requests = date_range_requests("http://api/prices", "2023-01-01", "2023-03-15", chunk="30D")
+    assert len(requests) == 3
+    assert requests[0][1]["start"] == 1672531200
+    assert requests[-1][1]["end"] == 1678838400
+    assert all(a[1]["end"] == b[1]["start"] for a, b in zip(requests, requests[1:]))
@@ -0,0 +1,127 @@
+import os
+import sys
+import asyncio
+import threading
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from inference import InferenceScheduler, QueueFullError
+
+
+def sum_predict(batch):
+    # Deterministic stand-in for the model: one output per sequence
+    return batch.sum(axis=1)
+
+
+def test_concurrent_requests_share_one_batch():
+    """Requests submitted within the window are answered by a single forward pass."""
+    calls = []
+
+    def predict(batch):
+        calls.append(batch.shape)
+        return sum_predict(batch)
+
+    async def run():
+        scheduler = InferenceScheduler(predict, max_batch_size=16, batch_window_ms=20)
+        inputs = [np.full((5, 1), i, dtype=np.float32) for i in range(8)]
+        results = await asyncio.gather(*(scheduler.submit(x) for x in inputs))
+        scheduler.shutdown()
+        return results, scheduler.stats()
+
+    results, stats = asyncio.run(run())
+    assert calls == [(8, 5, 1)]
+    assert [float(r[0]) for r in results] == [5.0 * i for i in range(8)]
+    assert stats["batch_size_histogram"] == {8: 1}
+    assert stats["wait_time"]["count"] == 8
+    assert stats["queue_depth"] == 0
+
+
+def test_requests_grouped_by_sequence_length_and_capped():
+    """Mixed sequence lengths are batched separately and never exceed max_batch_size."""
+    shapes = []
+
+    def predict(batch):
+        shapes.append(batch.shape)
+        return sum_predict(batch)
+
+    async def run():
+        scheduler = InferenceScheduler(predict, max_batch_size=3, batch_window_ms=20)
+        inputs = [np.ones((5, 1))] * 4 + [np.ones((7, 1))] * 2
+        results = await asyncio.gather(*(scheduler.submit(x) for x in inputs))
+        scheduler.shutdown()
+        return results
+
+    results = asyncio.run(run())
+    assert sorted(shapes) == [(1, 5, 1), (2, 7, 1), (3, 5, 1)]
+    assert [float(r[0]) for r in results] == [5.0] * 4 + [7.0] * 2
+
+
+def test_inference_errors_propagate_to_callers():
+    def failing_predict(batch):
+        raise RuntimeError("boom")
+
+    async def run():
+        scheduler = InferenceScheduler(failing_predict, batch_window_ms=1)
+        try:
+            await scheduler.submit(np.ones((5, 1)))
+        finally:
+            scheduler.shutdown()
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run())
+
+
+def test_full_queue_rejects_instead_of_waiting():
+    release = threading.Event()
+
+    def slow_predict(batch):
+        release.wait(5)
+        return sum_predict(batch)
+
+    async def run():
+        scheduler = InferenceScheduler(slow_predict, max_batch_size=2, batch_window_ms=1, max_queue=3)
+        accepted = [asyncio.ensure_future(scheduler.submit(np.ones((5, 1)))) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await scheduler.submit(np.ones((5, 1)))
+        with pytest.raises(QueueFullError):
+            await scheduler.run(np.ones((2, 5, 1)))
+        release.set()
+        results = await asyncio.gather(*accepted)
+        # Once drained, even a batch larger than the limit is admitted on its own
+        batch = await scheduler.run(np.ones((4, 5, 1)))
+        scheduler.shutdown()
+        return results, batch, scheduler.stats()
+
+    results, batch, stats = asyncio.run(run())
+    assert [float(r[0]) for r in results] == [5.0] * 3 and len(batch) == 4
+    assert stats["rejected"] == 2 and stats["in_flight"] == 0
+
+
+def test_mc_requests_count_every_sample_row():
+    release = threading.Event()
+    batches = []
+
+    def slow_forecast(inputs, horizon, samples):
+        release.wait(5)
+        return np.zeros((len(inputs), samples, horizon))
+
+    async def run():
+        scheduler = InferenceScheduler(sum_predict, max_batch_size=4, batch_window_ms=1, max_queue=40,
+                                       forecast_fn=slow_forecast, on_batch=lambda size, _: batches.append(size))
+        accepted = [asyncio.ensure_future(scheduler.submit(np.ones((5, 1)), 2, samples=16)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        in_flight = scheduler.stats()["in_flight"]
+        # 32 sample rows are running, so another 16 would exceed the limit of 40
+        with pytest.raises(QueueFullError):
+            await scheduler.submit(np.ones((5, 1)), 2, samples=16)
+        release.set()
+        results = await asyncio.gather(*accepted)
+        scheduler.shutdown()
+        return in_flight, results
+
+    in_flight, results = asyncio.run(run())
+    assert in_flight == 32
+    assert batches == [32]
+    assert results[0].shape == (16, 2)
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import pytest
+import numpy as np
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(SRC)
+from model import PiPriceLSTM
+from lite import LiteModel, export_model
+from serving import create_engine, NumpyEngine
+from streaming import LSTMStepper
+from conftest import SEQUENCE_LENGTH as SEQ
+
+
+@pytest.fixture
+def inputs():
+    return np.random.default_rng(0).uniform(size=(8, SEQ, 1)).astype(np.float32)
+
+
+@pytest.mark.parametrize("quantization, atol", [("float32", 1e-5), ("float16", 1e-3), ("int8", 1e-2)])
+def test_exported_model_matches_keras(keras_model, inputs, tmp_path, quantization, atol):
+    path = str(tmp_path / f"model_{quantization}.npz")
+    lite = export_model(keras_model, path, quantization)
+    assert lite.quantization == quantization
+    assert lite.input_shape == (None, SEQ, 1) and lite.output_shape == (None, 1)
+    expected = keras_model.predict(inputs, verbose=0)
+    np.testing.assert_allclose(lite.predict(inputs), expected, atol=atol)
+
+
+def test_quantized_artifacts_are_smaller(tmp_path):
+    # Production-sized layers, so the weights outweigh the per-array archive overhead
+    model = PiPriceLSTM(sequence_length=SEQ).model
+    sizes = {}
+    for quantization in ("float32", "float16", "int8"):
+        path = tmp_path / f"{quantization}.npz"
+        export_model(model, str(path), quantization)
+        sizes[quantization] = path.stat().st_size
+    assert sizes["int8"] < sizes["float32"] / 3
+    assert sizes["float16"] < sizes["float32"] / 1.8
+
+
+def test_numpy_engine_forecasts_like_keras(keras_model, inputs, tmp_path):
+    path = str(tmp_path / "model.npz")
+    export_model(keras_model, path)
+    engine = create_engine("compiled", LiteModel.load(path))
+    # Exported artifacts are always served by the numpy engine
+    assert isinstance(engine, NumpyEngine)
+    assert engine.sequence_lengths == [SEQ]
+    engine.warmup()
+    expected = create_engine("keras", keras_model).forecast(inputs, 4)
+    np.testing.assert_allclose(engine.forecast(inputs, 4), expected, atol=1e-5)
+
+    samples = engine.forecast(inputs, 2, samples=8)
+    assert samples.shape == (8, 8, 2)
+    assert np.ptp(samples[:, :, 0], axis=1).min() > 0
+    assert engine.stats()["quantization"] == "float32"
+
+
+def test_stepper_runs_from_exported_model(keras_model, tmp_path):
+    path = str(tmp_path / "model.npz")
+    stepper = LSTMStepper(export_model(keras_model, path))
+    sequence = np.random.default_rng(2).uniform(size=(SEQ, 1)).astype(np.float32)
+    output, _ = stepper.run(sequence)
+    np.testing.assert_allclose(output, keras_model.predict(sequence[None], verbose=0)[0], atol=1e-5)
+
+
+def test_numpy_serving_stack_never_imports_tensorflow(keras_model, tmp_path):
+    path = str(tmp_path / "model.npz")
+    export_model(keras_model, path, "int8")
+    script = (
+        "import sys, numpy as np\n"
+        "from lite import LiteModel\n"
+        "from serving import create_engine\n"
+        f"engine = create_engine('numpy', LiteModel.load({path!r}))\n"
+        "engine.warmup()\n"
+        f"assert engine.forecast(np.zeros((1, {SEQ}, 1), dtype=np.float32), 3).shape == (1, 3)\n"
+        "print('tensorflow' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=SRC, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": SRC}, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
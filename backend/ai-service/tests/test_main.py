@@ -0,0 +1,191 @@
+import os
+import sys
+import time
+import pytest
+import numpy as np
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import main
+
+
+def wait_until_settled(client, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/ready")
+        if response.json()["status"] != "starting":
+            return response
+        time.sleep(0.1)
+    raise AssertionError("service did not finish starting")
+
+
+@pytest.fixture
+def saved_model(tmp_path):
+    from model import PiPriceLSTM
+    path = str(tmp_path / "lstm_v1")
+    PiPriceLSTM(sequence_length=10, lstm_units=8).model.save(path)
+    return path
+
+
+def test_lazy_startup_is_live_before_ready(monkeypatch, saved_model):
+    monkeypatch.setattr(main, "MODEL_PATH", saved_model)
+    monkeypatch.setattr(main, "REDIS_URL", "redis://127.0.0.1:1")
+    with TestClient(main.app) as client:
+        assert client.get("/health").json() == {"status": "healthy"}
+        ready = wait_until_settled(client)
+        assert ready.status_code == 200
+        body = ready.json()
+        assert body["models"] == {"10": "lstm_v1"}
+        assert body["redis_connected"] is False
+        for phase in ("app_import_ms", "tensorflow_import_ms", "model_load_ms", "warmup_ms", "ready_ms"):
+            assert body["startup"][phase] >= 0
+
+        # Without Redis, predictions are served and cached in-process
+        prices = list(np.linspace(1.0, 2.0, 10))
+        for _ in range(2):
+            response = client.post("/predict", json={"historical_prices": prices, "sequence_length": 10})
+            assert response.status_code == 200 and response.json()["model_version"] == "lstm_v1"
+        assert client.get("/stats/cache").json()["local"]["hits"] == 1
+
+
+def test_forecast_horizon_in_one_request(monkeypatch, saved_model):
+    monkeypatch.setattr(main, "MODEL_PATH", saved_model)
+    monkeypatch.setattr(main, "REDIS_URL", "redis://127.0.0.1:1")
+    with TestClient(main.app) as client:
+        assert wait_until_settled(client).status_code == 200
+        prices = list(np.linspace(1.0, 2.0, 10))
+        single = client.post("/predict", json={"historical_prices": prices, "sequence_length": 10}).json()
+        assert single["forecast"] == [single["predicted_price"]]
+
+        body = {"historical_prices": prices, "sequence_length": 10, "horizon": 7}
+        forecast = client.post("/predict", json=body).json()
+        assert len(forecast["forecast"]) == 7
+        assert forecast["predicted_price"] == pytest.approx(single["predicted_price"], rel=1e-5)
+        # The second request is a cache hit holding the whole vector
+        assert client.post("/predict", json=body).json()["forecast"] == forecast["forecast"]
+        assert client.get("/stats/cache").json()["local"]["hits"] == 1
+
+        body["horizon"] = main.MAX_FORECAST_HORIZON + 1
+        assert client.post("/predict", json=body).status_code == 400
+
+
+def test_uncertainty_mode_returns_interval_and_caches_it(monkeypatch, saved_model):
+    monkeypatch.setattr(main, "MODEL_PATH", saved_model)
+    monkeypatch.setattr(main, "REDIS_URL", "redis://127.0.0.1:1")
+    monkeypatch.setattr(main, "MC_DROPOUT_SAMPLES", 16)
+    with TestClient(main.app) as client:
+        assert wait_until_settled(client).status_code == 200
+        prices = list(np.linspace(1.0, 2.0, 10))
+        # A deterministic request first gives the overhead metric its baseline
+        client.post("/predict", json={"historical_prices": prices, "sequence_length": 10})
+
+        body = {"historical_prices": prices, "sequence_length": 10, "horizon": 3, "uncertainty": True}
+        first = client.post("/predict", json=body).json()
+        assert len(first["lower"]) == len(first["upper"]) == len(first["forecast"]) == 3
+        assert all(lo <= mid <= hi for lo, mid, hi in zip(first["lower"], first["forecast"], first["upper"]))
+        assert 0.0 <= first["confidence"] <= 1.0 and first["confidence"] != 0.95
+        assert client.post("/predict", json=body).json() == first
+
+        text = client.get("/metrics").text
+        assert 'ai_predict_stage_seconds_count{endpoint="/predict",stage="mc_inference"} 1.0' in text
+        assert 'ai_mc_dropout_overhead_ratio_count{samples="16"} 1.0' in text
+        # The ratio compares engine forward passes, without the queueing in the mc_inference stage
+        engine = client.get("/stats/inference").json()["versions"]["lstm_v1"]["engine"]
+        ratio = next(float(line.split()[-1]) for line in text.splitlines()
+                     if line.startswith('ai_mc_dropout_overhead_ratio_sum{samples="16"}'))
+        assert ratio == pytest.approx(engine["mc_dropout_latency"]["max_ms"] / engine["latency"]["p50_ms"])
+
+        monkeypatch.setattr(main, "MC_DROPOUT_SAMPLES", 0)
+        assert client.post("/predict", json=body).status_code == 400
+
+
+def test_batch_predictions_match_single_predictions(monkeypatch, saved_model):
+    monkeypatch.setattr(main, "MODEL_PATH", saved_model)
+    monkeypatch.setattr(main, "REDIS_URL", "redis://127.0.0.1:1")
+    monkeypatch.setattr(main, "MAX_BATCH_WINDOWS", 4)
+    with TestClient(main.app) as client:
+        assert wait_until_settled(client).status_code == 200
+        series = np.sin(np.arange(16) / 3.0) + 2.0
+        windows = [series[start:start + 10].tolist() for start in (0, 3, 6)]
+        single = [client.post("/predict", json={"historical_prices": window, "sequence_length": 10}).json()
+                  for window in windows]
+
+        by_windows = client.post("/predict/batch", json={"sequence_length": 10, "windows": windows})
+        assert by_windows.status_code == 200
+        body = by_windows.json()
+        assert body["model_version"] == "lstm_v1"
+        assert body["predicted_prices"] == pytest.approx([s["predicted_price"] for s in single], rel=1e-5)
+
+        # Windows starting at 0, 3 and 6 of the same series
+        by_series = client.post("/predict/batch", json={"sequence_length": 10, "series": series.tolist(), "stride": 3})
+        assert by_series.status_code == 200
+        assert by_series.json()["predicted_prices"] == pytest.approx(body["predicted_prices"], rel=1e-5)
+
+        empty = client.post("/predict/batch", json={"sequence_length": 10, "windows": []})
+        assert empty.status_code == 200 and empty.json()["predicted_prices"] == []
+
+        for request in ({"sequence_length": 10},
+                        {"sequence_length": 10, "windows": windows, "series": series.tolist()},
+                        {"sequence_length": 10, "windows": [windows[0][:9]]},
+                        {"sequence_length": 10, "series": series[:9].tolist()},
+                        {"sequence_length": 10, "windows": windows * 2}):
+            assert client.post("/predict/batch", json=request).status_code == 400
+        unknown = client.post("/predict/batch", json={"sequence_length": 7, "windows": [[1.0] * 7]})
+        assert unknown.status_code == 503
+
+
+def test_failed_model_load_keeps_service_unready(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "MODEL_PATH", str(tmp_path / "missing"))
+    monkeypatch.setattr(main, "REDIS_URL", "redis://127.0.0.1:1")
+    with TestClient(main.app) as client:
+        ready = wait_until_settled(client)
+        assert ready.status_code == 503 and ready.json()["status"] == "failed"
+        assert client.get("/health").status_code == 200
+        response = client.post("/predict", json={"historical_prices": [1.0] * 10, "sequence_length": 10})
+        assert response.status_code == 503
+
+
+def test_metrics_and_server_timing(monkeypatch, saved_model):
+    monkeypatch.setattr(main, "MODEL_PATH", saved_model)
+    monkeypatch.setattr(main, "REDIS_URL", "redis://127.0.0.1:1")
+    monkeypatch.setattr(main, "SERVER_TIMING", True)
+    with TestClient(main.app) as client:
+        assert wait_until_settled(client).status_code == 200
+        prices = list(np.linspace(5.0, 6.0, 10))
+        miss = client.post("/predict", json={"historical_prices": prices, "sequence_length": 10})
+        hit = client.post("/predict", json={"historical_prices": prices, "sequence_length": 10})
+        stages = [part.split(";")[0] for part in miss.headers["Server-Timing"].split(", ")]
+        assert stages == ["validation", "normalization", "cache_lookup", "inference", "cache_write"]
+        assert "inference" not in hit.headers["Server-Timing"]
+        client.post("/predict", json={"historical_prices": prices, "sequence_length": 3})
+
+        text = client.get("/metrics").text
+        assert 'ai_predict_stage_seconds_count{endpoint="/predict",stage="inference"}' in text
+        assert 'ai_requests_total{endpoint="/predict",status="400"}' in text
+        assert 'ai_cache_lookups_total{result="hit",tier="local"}' in text
+        assert 'ai_model_active{sequence_length="10",version="lstm_v1"} 1.0' in text
+        assert "ai_inference_batch_size_bucket" in text
+
+
+def test_stream_predictions_over_websocket(monkeypatch, saved_model):
+    monkeypatch.setattr(main, "MODEL_PATH", saved_model)
+    monkeypatch.setattr(main, "REDIS_URL", "redis://127.0.0.1:1")
+    with TestClient(main.app) as client:
+        assert wait_until_settled(client).status_code == 200
+        prices = list(np.linspace(1.0, 2.0, 10))
+        with client.websocket_connect("/predict/stream?sequence_length=10") as ws:
+            ws.send_json({"prices": prices})
+            replies = [ws.receive_json() for _ in prices]
+            assert [r["predicted_price"] for r in replies[:-1]] == [None] * 9
+            assert isinstance(replies[-1]["predicted_price"], float) and replies[-1]["reanchored"]
+
+            # The first full window matches the windowed /predict result
+            windowed = client.post("/predict", json={"historical_prices": prices, "sequence_length": 10}).json()
+            assert replies[-1]["predicted_price"] == pytest.approx(windowed["predicted_price"], rel=1e-4)
+
+            ws.send_json({"price": 1.9})
+            tick = ws.receive_json()
+            assert tick["reanchored"] is False and tick["model_version"] == "lstm_v1"
+            ws.send_json({"price": -1})
+            assert "error" in ws.receive_json()
+        assert 'ai_stream_ticks_total{reanchored="false"} 1.0' in client.get("/metrics").text
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import asyncio
+import pandas as pd
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from parsing import parse_price_records, parse_price_stream, JsonArrayDecoder
+from data import PiPriceDataManager
+
+RECORDS = [
+    {"timestamp": 1672617600, "price": "1.5"},
+    {"time": 1672531200.5, "price": 2},
+    {"date": "2023-01-03", "close": 3.25},
+    {"timestamp": "2023-01-04T12:00:00", "price": 0, "close": 4.0},
+    {"timestamp": 1672876800},
+    {"price": 5.0},
+    {"timestamp": 1672963200, "price": "n/a"},
+    {"date": "not a date", "price": 6.0},
+]
+
+
+def loop_parse(json_data):
+    # Reference implementation: the original per-row loop in _parse_api_response
+    rows = []
+    for entry in json_data:
+        ts = entry.get("timestamp") or entry.get("time") or entry.get("date")
+        price = entry.get("price") or entry.get("close")
+        if ts is None or price is None:
+            continue
+        ts = pd.to_datetime(ts, unit='s') if isinstance(ts, (int, float)) else pd.to_datetime(ts)
+        try:
+            price = float(price)
+        except Exception:
+            continue
+        rows.append({"timestamp": ts, "price": price})
+    return pd.DataFrame(rows).sort_values("timestamp").reset_index(drop=True)
+
+
+def test_vectorized_parse_matches_loop_and_drops_bad_rows():
+    df = parse_price_records(RECORDS)
+    # The loop raised on unparseable dates; the vectorized path drops them
+    expected = loop_parse(RECORDS[:-1])
+    pd.testing.assert_frame_equal(df, expected)
+    assert len(df) == 4
+
+
+def chunked(data: bytes, size: int):
+    async def chunks():
+        for i in range(0, len(data), size):
+            yield data[i:i + size]
+    return chunks()
+
+
+def test_stream_parse_matches_bulk_for_any_chunking():
+    records = RECORDS[:-1] * 50 + [{"timestamp": 1672531200 + i, "price": f"{1 + i / 7:.5f}"} for i in range(300)]
+    body = json.dumps(records, indent=1).encode("utf-8")
+    expected = parse_price_records(records)
+    for size in (1, 7, 4096):
+        df = asyncio.run(parse_price_stream(chunked(body, size), batch_rows=64))
+        pd.testing.assert_frame_equal(df, expected)
+
+    decoder = JsonArrayDecoder()
+    assert decoder.feed('[{"a": 1}, 12') == [{"a": 1}]
+    assert decoder.feed('3, "x"]') == [123, "x"] and decoder.finished
+
+
+def test_fetch_from_api_stream_mode(tmp_path):
+    records = [{"time": 1672531200 + day * 86400, "close": 1.0 + day} for day in range(30)]
+
+    async def prices(request):
+        return web.json_response(records)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/prices", prices)
+        async with TestServer(app) as server:
+            url = str(server.make_url("/prices"))
+            streamed = PiPriceDataManager(cache_dir=str(tmp_path / "a"))
+            bulk = PiPriceDataManager(cache_dir=str(tmp_path / "b"))
+            try:
+                return await streamed.fetch_from_api(url, stream=True), await bulk.fetch_from_api(url)
+            finally:
+                await streamed.close()
+                await bulk.close()
+
+    streamed, bulk = asyncio.run(run())
+    pd.testing.assert_frame_equal(streamed, bulk)
+    assert len(streamed) == 30
@@ -0,0 +1,98 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from preprocessing import (normalize_windows, denormalize_windows, sliding_windows,
+                           window_views, iter_window_batches, summarize_samples)
+from model import create_sequences, window_dataset
+
+
+def scalar_normalize(prices):
+    # Reference implementation: the original per-request scaling in /predict
+    min_price, max_price = np.min(prices), np.max(prices)
+    if max_price == min_price:
+        return np.zeros_like(prices), min_price, max_price
+    return (prices - min_price) / (max_price - min_price), min_price, max_price
+
+
+def test_normalize_windows_matches_per_window_scaling():
+    rng = np.random.default_rng(0)
+    windows = rng.uniform(0.5, 2.0, size=(50, 20)).astype(np.float32)
+    windows[3] = 1.25  # constant window
+    norm, mins, maxs = normalize_windows(windows)
+    for i, window in enumerate(windows):
+        expected, min_price, max_price = scalar_normalize(window)
+        np.testing.assert_allclose(norm[i], expected, rtol=1e-6)
+        assert mins[i] == min_price and maxs[i] == max_price
+    assert norm.dtype == np.float32
+    assert not norm[3].any()
+
+
+def test_denormalize_windows_roundtrip():
+    windows = np.array([[1.0, 2.0, 3.0], [10.0, 30.0, 20.0]])
+    norm, mins, maxs = normalize_windows(windows)
+    np.testing.assert_allclose(denormalize_windows(norm[:, -1], mins, maxs), windows[:, -1])
+    np.testing.assert_allclose(denormalize_windows(norm, mins, maxs), windows)
+
+
+def test_sliding_windows_stride_is_a_view():
+    series = np.arange(10, dtype=np.float32)
+    windows = sliding_windows(series, 4, stride=3)
+    np.testing.assert_array_equal(windows, [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]])
+    assert np.shares_memory(windows, series)
+
+
+def loop_sequences(data, seq_length, stride=1, horizon=1):
+    # Reference implementation: the original Python loop in create_sequences
+    sequences, labels = [], []
+    for i in range(0, len(data) - seq_length - horizon + 1, stride):
+        sequences.append(data[i:i + seq_length])
+        labels.append(data[i + seq_length:i + seq_length + horizon])
+    return np.array(sequences), np.array(labels)
+
+
+def test_create_sequences_matches_loop_without_copying():
+    data = np.random.default_rng(1).normal(size=200)
+    X, y = create_sequences(data, 20)
+    X_ref, y_ref = loop_sequences(data, 20)
+    assert X.shape == (180, 20, 1) and y.shape == (180,)
+    np.testing.assert_array_equal(X[:, :, 0], X_ref)
+    np.testing.assert_array_equal(y, y_ref[:, 0])
+    assert np.shares_memory(X, data) and np.shares_memory(y, data)
+
+
+def test_window_views_stride_horizon_and_features():
+    data = np.random.default_rng(2).normal(size=(100, 3))
+    X, y = window_views(data, 10, stride=4, horizon=5, target_col=2)
+    X_ref, y_ref = loop_sequences(data, 10, stride=4, horizon=5)
+    assert X.shape == (len(X_ref), 10, 3) and y.shape == (len(X_ref), 5)
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref[:, :, 2])
+
+
+def test_lazy_batches_cover_every_window_once():
+    data = np.arange(50, dtype=np.float32)
+    X, y = window_views(data, 8, stride=2)
+    batches = list(iter_window_batches(data, 8, batch_size=7, stride=2, shuffle=True, seed=0))
+    assert max(len(b[0]) for b in batches) == 7
+    assert sorted(np.concatenate([b[1] for b in batches])) == sorted(y)
+
+    dataset_labels = np.concatenate([labels.numpy() for _, labels in window_dataset(data, 8, batch_size=7, stride=2)])
+    np.testing.assert_array_equal(dataset_labels, y)
+    first_inputs, _ = next(iter(window_dataset(data, 8, batch_size=7, stride=2)))
+    np.testing.assert_array_equal(first_inputs.numpy(), X[:7])
+
+
+def test_summarize_samples_interval_and_confidence():
+    rng = np.random.default_rng(0)
+    tight = 0.5 + rng.normal(scale=0.01, size=(2, 1000, 3))
+    wide = 0.5 + rng.normal(scale=0.5, size=(2, 1000, 3))
+    mean, lower, upper, confidence = summarize_samples(tight, level=0.9)
+    assert mean.shape == lower.shape == upper.shape == (2, 3)
+    np.testing.assert_allclose(mean, 0.5, atol=0.005)
+    assert np.all(lower < mean) and np.all(mean < upper)
+    # Normal samples: the 90% interval spans about 2 * 1.645 standard deviations
+    np.testing.assert_allclose(upper - lower, 2 * 1.645 * 0.01, rtol=0.15)
+    assert confidence.shape == (2,) and np.all(confidence > 0.95)
+    assert np.all(summarize_samples(wide)[3] == 0.0)
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import json
+import asyncio
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from inference import InferenceScheduler
+from registry import ModelRegistry
+from cache import PredictionCache
+
+
+class FakeModel:
+    """Stand-in model: predicts a constant read from its checkpoint file."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            spec = json.load(f)
+        self.value = spec["value"]
+        self.input_shape = (None, spec["sequence_length"], 1)
+
+
+class FakeEngine:
+    def __init__(self, model):
+        self.model = model
+        length = model.input_shape[1]
+        self.sequence_lengths = [length] if length is not None else []
+        self.warmed = False
+
+    def warmup(self):
+        self.warmed = True
+
+    def predict(self, inputs):
+        return np.full((len(inputs), 1), self.model.value, dtype=np.float32)
+
+    def stats(self):
+        return {"backend": "fake", "sequence_lengths": self.sequence_lengths}
+
+
+def write_version(model_dir, name, value, sequence_length, age=10.0):
+    path = os.path.join(model_dir, name + ".h5")
+    with open(path, "w") as f:
+        json.dump({"value": value, "sequence_length": sequence_length}, f)
+    # Backdate the checkpoint so it is past the settle time, newest last
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def make_registry(model_dir):
+    return ModelRegistry(str(model_dir), load_model=FakeModel, create_engine=FakeEngine,
+                         create_scheduler=lambda engine, executor: InferenceScheduler(
+                             engine.predict, batch_window_ms=1.0, executor=executor))
+
+
+def test_newest_version_per_sequence_length_is_active(tmp_path):
+    write_version(tmp_path, "v1", 1.0, 20, age=30)
+    write_version(tmp_path, "v1-long", 5.0, 60, age=30)
+    write_version(tmp_path, "v2", 2.0, 20, age=20)
+    write_version(tmp_path, "any", 9.0, None, age=40)
+
+    async def run():
+        registry = make_registry(tmp_path)
+        try:
+            await registry.refresh()
+            served = {}
+            for length in (20, 60, 7):
+                version = registry.resolve(length)
+                output = await version.scheduler.submit(np.zeros((length, 1), dtype=np.float32))
+                served[length] = (version.version, float(output[0]))
+            return served, registry.stats()
+        finally:
+            await registry.close()
+
+    served, stats = asyncio.run(run())
+    assert served == {20: ("v2", 2.0), 60: ("v1-long", 5.0), 7: ("any", 9.0)}
+    assert stats["active"] == {20: "v2", 60: "v1-long", "any": "any"}
+    assert set(stats["versions"]) == {"v1", "v1-long", "v2", "any"}
+
+
+def test_hot_swap_keeps_in_flight_requests_on_old_version(tmp_path):
+    write_version(tmp_path, "v1", 1.0, 20, age=30)
+
+    async def run():
+        registry = make_registry(tmp_path)
+        try:
+            await registry.refresh()
+            old = registry.resolve(20)
+            in_flight = asyncio.ensure_future(old.scheduler.submit(np.zeros((20, 1), dtype=np.float32)))
+
+            # A fresh checkpoint is skipped until it has settled, then swapped in
+            path = write_version(tmp_path, "v2", 2.0, 20, age=0)
+            assert await registry.refresh() == []
+            os.utime(path, (time.time() - 10, time.time() - 10))
+            assert await registry.refresh() == ["v2"]
+            new = registry.resolve(20)
+            assert new.version == "v2" and new.engine.warmed
+            assert float((await in_flight)[0]) == 1.0
+
+            # Broken checkpoints are logged and not retried until they change
+            with open(os.path.join(tmp_path, "v3.h5"), "w") as f:
+                f.write("not a model")
+            os.utime(os.path.join(tmp_path, "v3.h5"), (time.time() - 10, time.time() - 10))
+            await registry.refresh()
+            await registry.refresh()
+            assert registry.resolve(20).version == "v2" and registry.load_failures == 1
+
+            # Removing the active version falls back to the older one
+            os.remove(path)
+            await registry.refresh()
+            return registry.resolve(20).version, registry.swaps
+        finally:
+            await registry.close()
+
+    version, swaps = asyncio.run(run())
+    assert version == "v1"
+    assert swaps == 3
+
+
+def test_version_overwritten_in_place_misses_old_cache_entries(tmp_path):
+    write_version(tmp_path, "v1", 1.0, 20, age=30)
+    cache = PredictionCache()
+    window = np.zeros(20, dtype=np.float32)
+
+    async def run():
+        registry = make_registry(tmp_path)
+        try:
+            await registry.refresh()
+            old = registry.resolve(20)
+            await cache.set(cache.make_key(window, model_version=old.cache_identity), (1.0, 0.95))
+
+            # Same name, new weights
+            write_version(tmp_path, "v1", 2.0, 20, age=10)
+            assert await registry.refresh() == ["v1"]
+            new = registry.resolve(20)
+            assert new.version == old.version == "v1"
+            assert new.cache_identity != old.cache_identity
+            return await cache.get(cache.make_key(window, model_version=new.cache_identity))
+        finally:
+            await registry.close()
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,79 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from model import PiPriceLSTM
+from serving import create_engine, CompiledEngine, KerasEngine
+
+
+@pytest.fixture
+def inputs():
+    return np.random.default_rng(0).uniform(size=(4, 10, 1)).astype(np.float32)
+
+
+def test_engine_defaults_to_model_sequence_length(keras_model):
+    engine = create_engine("compiled", keras_model)
+    assert isinstance(engine, CompiledEngine)
+    assert engine.sequence_lengths == [10]
+    assert isinstance(create_engine("keras", keras_model), KerasEngine)
+
+
+def test_compiled_engine_matches_keras_predict(keras_model, inputs):
+    compiled = create_engine("compiled", keras_model)
+    compiled.warmup()
+    expected = create_engine("keras", keras_model).predict(inputs)
+    np.testing.assert_allclose(compiled.predict(inputs), expected, atol=1e-5)
+    # Different batch sizes reuse the warmed signature
+    np.testing.assert_allclose(compiled.predict(inputs[:1]), expected[:1], atol=1e-5)
+    assert compiled.stats()["latency"]["count"] == 2
+
+
+def test_unknown_backend_rejected(keras_model):
+    with pytest.raises(ValueError):
+        create_engine("onnx", keras_model)
+
+
+def test_long_horizon_forecast_rolls_out_in_one_call(keras_model, inputs):
+    keras = create_engine("keras", keras_model)
+    compiled = create_engine("compiled", keras_model)
+    compiled.warmup()
+
+    # Reference: feed every prediction back into the window, one step at a time
+    window, expected = inputs.copy(), []
+    for _ in range(7):
+        step = keras_model.predict(window, verbose=0)
+        expected.append(step[:, 0])
+        window = np.concatenate([window[:, 1:], step[:, :, None]], axis=1)
+    expected = np.stack(expected, axis=1)
+
+    np.testing.assert_allclose(keras.forecast(inputs, 7), expected, atol=1e-5)
+    np.testing.assert_allclose(compiled.forecast(inputs, 7), expected, atol=1e-5)
+    np.testing.assert_allclose(compiled.forecast(inputs, 1), keras.predict(inputs), atol=1e-5)
+
+
+def test_multi_step_head_is_sliced_and_extended():
+    model = PiPriceLSTM(sequence_length=10, lstm_units=8, horizon=3).model
+    engine = create_engine("compiled", model)
+    assert engine.output_steps == 3
+    inputs = np.random.default_rng(1).uniform(size=(2, 10, 1)).astype(np.float32)
+    head = model.predict(inputs, verbose=0)
+    np.testing.assert_allclose(engine.forecast(inputs, 2), head[:, :2], atol=1e-5)
+
+    # Beyond the head, whole 3-step outputs are appended to the window
+    extended = engine.forecast(inputs, 5)
+    assert extended.shape == (2, 5)
+    follow_up = model.predict(np.concatenate([inputs[:, 3:], head[:, :, None]], axis=1), verbose=0)
+    np.testing.assert_allclose(extended[:, 3:], follow_up[:, :2], atol=1e-5)
+
+
+def test_mc_dropout_samples_in_one_batched_pass(keras_model, inputs):
+    for backend in ("keras", "compiled"):
+        engine = create_engine(backend, keras_model)
+        samples = engine.forecast(inputs, 3, samples=16)
+        assert samples.shape == (4, 16, 3)
+        # Dropout is active, so samples of one window differ from each other
+        assert np.ptp(samples[:, :, 0], axis=1).min() > 0
+        assert engine.stats()["mc_dropout_latency"]["count"] == 1
+        assert engine.stats()["latency"]["count"] == 0
@@ -0,0 +1,53 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from preprocessing import normalize_windows
+from streaming import LSTMStepper, PriceStream
+from conftest import SEQUENCE_LENGTH as SEQ
+
+
+def windowed_prediction(model, window):
+    # Reference: /predict scales the window by its own min/max and runs the full LSTM
+    norm, mins, maxs = normalize_windows(np.asarray(window, dtype=np.float32)[None, :])
+    pred = model.predict(norm[:, :, None], verbose=0)[0, 0]
+    return pred * (maxs[0] - mins[0]) + mins[0]
+
+
+def test_stepper_matches_keras_over_a_sequence(keras_model):
+    stepper = LSTMStepper(keras_model)
+    inputs = np.random.default_rng(0).uniform(size=(3, SEQ, 1)).astype(np.float32)
+    expected = keras_model.predict(inputs, verbose=0)
+    for sequence, row in zip(inputs, expected):
+        output, _ = stepper.run(sequence)
+        np.testing.assert_allclose(output, row, atol=1e-5)
+
+
+def test_stream_reanchors_by_policy_and_steps_once_in_between(keras_model):
+    stream = PriceStream(LSTMStepper(keras_model), SEQ, reanchor_tolerance=0.1, max_steps=5)
+    prices = list(1.0 + 0.1 * np.sin(np.arange(SEQ)))
+    outputs = [stream.push(p) for p in prices]
+    assert all(pred is None for pred, _ in outputs[:-1])
+    predicted, reanchored = outputs[-1]
+    # First full window anchors and matches the windowed prediction exactly
+    assert reanchored
+    assert predicted == pytest.approx(windowed_prediction(keras_model, prices), abs=1e-5)
+
+    # In-range ticks advance by a single timestep
+    for price in (1.0, 1.02, 0.98):
+        _, reanchored = stream.push(price)
+        assert not reanchored
+    assert stream.timesteps == SEQ + 3
+
+    # A price far outside the anchor range forces a re-anchor on the latest window
+    predicted, reanchored = stream.push(2.0)
+    assert reanchored
+    window = list(stream.window)
+    assert predicted == pytest.approx(windowed_prediction(keras_model, window), abs=1e-5)
+
+    # max_steps bounds the context even when prices stay in range
+    flags = [stream.push(1.5)[1] for _ in range(6)]
+    assert flags == [False] * 5 + [True]
+    assert stream.stats()["reanchors"] == 3
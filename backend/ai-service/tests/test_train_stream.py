@@ -0,0 +1,50 @@
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from model import PiPriceLSTM
+from data import PiPriceDataManager
+
+
+def test_train_stream_reports_pipeline_stats(tmp_path):
+    series = np.sin(np.linspace(0, 60, 1200)) + 2.0
+    lstm = PiPriceLSTM(sequence_length=10, lstm_units=8, model_dir=str(tmp_path / "model"))
+    history = lstm.train_stream(series, epochs=2, batch_size=64, patience=5)
+
+    assert len(history.history["loss"]) == 2
+    for key in ("val_loss", "samples_per_sec", "input_stall_seconds"):
+        assert key in history.history
+    assert all(rate > 0 for rate in history.history["samples_per_sec"])
+    assert os.path.exists(tmp_path / "model" / "pi_price_lstm_best.h5")
+    # The temporary window cache is removed after training
+    assert os.listdir(tmp_path / "model") == ["pi_price_lstm_best.h5"]
+
+
+def test_train_stream_accepts_data_manager(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    timestamps = pd.date_range("2023-01-01", periods=300, freq="D")
+    pd.DataFrame({"timestamp": timestamps, "price": np.linspace(0.5, 1.5, 300)}).to_csv(csv_path, index=False)
+    manager = PiPriceDataManager(cache_dir=str(tmp_path / "cache"))
+    manager.load_from_csv(str(csv_path))
+
+    lstm = PiPriceLSTM(sequence_length=10, lstm_units=8, model_dir=str(tmp_path / "model"))
+    history = lstm.train_stream(manager, epochs=1, cache="memory")
+    assert len(history.history["val_loss"]) == 1
+
+
+def test_train_stream_fits_multi_step_head(tmp_path):
+    series = np.sin(np.linspace(0, 60, 600)) + 2.0
+    lstm = PiPriceLSTM(sequence_length=10, lstm_units=8, model_dir=str(tmp_path / "model"), horizon=5)
+    history = lstm.train_stream(series, epochs=1, cache=None)
+    assert len(history.history["val_loss"]) == 1
+    assert lstm.predict(np.zeros((3, 10, 1), dtype=np.float32)).shape == (3, 5)
+
+
+def test_train_stream_rejects_validation_tail_without_windows(tmp_path):
+    lstm = PiPriceLSTM(sequence_length=10, lstm_units=8, model_dir=str(tmp_path / "model"), horizon=5)
+    # 200 * 0.98 leaves a 4-step tail, shorter than the 5-step horizon
+    with pytest.raises(ValueError):
+        lstm.train_stream(np.linspace(1.0, 2.0, 200), val_fraction=0.02, epochs=1)
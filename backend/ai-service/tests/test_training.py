@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from training import grid_search, random_search, parse_space, prepare_datasets, run_search
+
+
+def test_search_spaces():
+    space = parse_space(["lstm_units=8,16", "dropout_rate=0.1,0.2", "sequence_length=20"])
+    assert space == {"lstm_units": [8, 16], "dropout_rate": [0.1, 0.2], "sequence_length": [20]}
+    grid = grid_search(space)
+    assert len(grid) == 4 and {"dropout_rate": 0.2, "lstm_units": 16, "sequence_length": 20} in grid
+    sampled = random_search(space, 3, seed=1)
+    assert len(sampled) == 3 and all(config in grid for config in sampled)
+    assert sampled == random_search(space, 3, seed=1)
+
+
+def test_datasets_are_written_once_per_window_shape(tmp_path):
+    series = np.linspace(1.0, 2.0, 100)
+    configs = [{"sequence_length": 10, "horizon": 1, "lstm_units": units} for units in (8, 16)]
+    datasets = prepare_datasets(series, configs + [{"sequence_length": 5, "horizon": 3}], str(tmp_path))
+    assert sorted(datasets) == [(5, 3), (10, 1)]
+    inputs = np.load(datasets[(5, 3)][0], mmap_mode="r")
+    labels = np.load(datasets[(5, 3)][1], mmap_mode="r")
+    assert isinstance(inputs, np.memmap) and inputs.shape == (93, 5, 1) and labels.shape == (93, 3)
+    np.testing.assert_allclose(labels[0], inputs[3, 2:, 0])
+
+
+def test_parallel_runs_write_metrics_and_publish_best(tmp_path):
+    series = np.sin(np.linspace(0, 30, 600)) + 2.0
+    configs = [{"sequence_length": 10, "lstm_units": units, "epochs": 2} for units in (4, 8)]
+    serving_path = str(tmp_path / "serving" / "best.h5")
+    report = run_search(series, configs, str(tmp_path / "runs"), workers=2, threads_per_worker=1,
+                        serving_path=serving_path)
+
+    assert report["workers"] == 2 and len(report["runs"]) == 2
+    losses = [run["val_loss"] for run in report["runs"]]
+    assert losses == sorted(losses) and report["best"] == report["runs"][0]
+    for run in report["runs"]:
+        with open(tmp_path / "runs" / run["run_id"] / "metrics.json") as f:
+            assert json.load(f)["status"] == "ok"
+        assert os.path.exists(run["checkpoint"])
+    with open(serving_path, "rb") as published, open(report["best"]["checkpoint"], "rb") as best:
+        assert published.read() == best.read()
+    assert os.path.exists(tmp_path / "runs" / "runs.json")